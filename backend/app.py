@@ -1,10 +1,21 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), "../.env.local"))
+
+# A Socket.IO message queue listens on a background thread, which needs eventlet's cooperative
+# sockets; patch before anything else imports the standard library networking modules
+if os.getenv("SOCKETIO_MESSAGE_QUEUE", "local") not in ("", "local"):
+    import eventlet
+    eventlet.monkey_patch()
+
 from datetime import timedelta
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
-from src.db_config import db
+from src.db_config import init_db
+from src.utils.user_loader import init_user_loader
 from src.routes.auth_routes import auth_bp
 from src.routes.service_board_routes import service_board_bp
 from src.routes.profile_routes import profile_bp
@@ -14,6 +25,7 @@ from src.routes.pet_routes import pet_bp
 from src.routes.chat_routes import chat_bp
 
 from src.socket_config import socketio, init_socketio
+from src.service_lifecycle import init_service_lifecycle
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -40,9 +52,18 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization", "X-Requested-With", "X-CSRF-Token"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
-# Initialize SocketIO
+# Initialize the lazy database layer and its CLI commands (flask db-check / flask ensure-indexes)
+init_db(app)
+
+# Report per-request user cache statistics (X-User-Loader response header)
+init_user_loader(app)
+
+# Initialize SocketIO (SOCKETIO_MESSAGE_QUEUE selects the cross-worker backend)
 init_socketio(app)
 
+# Expire, complete and archive service posts past their availability (SERVICE_LIFECYCLE_*)
+init_service_lifecycle(app, socketio)
+
 # Initialize extensions
 bcrypt = Bcrypt(app)
 app.extensions["bcrypt"] = bcrypt
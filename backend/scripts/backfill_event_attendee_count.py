@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+
+def backfill_event_attendee_count():
+    """
+    Sets attendee_count from the size of the attendees array on every event.
+    Events created before attendee_count existed need this once before attendance is toggled.
+    """
+    print("🔍 Backfilling event attendee counts...")
+    result = db.event.update_many(
+        {},
+        [{"$set": {"attendee_count": {"$size": {"$ifNull": ["$attendees", []]}}}}]
+    )
+    print(f"✅ Updated {result.modified_count} event(s)")
+
+if __name__ == "__main__":
+    backfill_event_attendee_count()
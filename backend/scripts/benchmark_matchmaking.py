@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import DB_SETTINGS
+
+"""
+Matchmaking latency over a synthetic board.
+
+Seeds --posts open service posts (requests and offers across all categories, pet types, two
+months of availability windows, scattered around Toronto, a third without a location) into a
+scratch database, builds the declared indexes, then times find_candidates() for --queries
+random posts and prints the winning plan of one query of each kind.
+
+    python scripts/benchmark_matchmaking.py --posts 100000 --db pawfectly_matchmaking_bench
+
+Never point --db at the application database: the service collection is dropped first.
+"""
+
+CENTER_LAT, CENTER_LNG = 43.6532, -79.3832  # Toronto
+PET_TYPES = ["dog", "cat", "other", "either"]
+
+
+def make_post(rng, i, today):
+    start = today + timedelta(days=rng.randint(0, 60))
+    end = start + timedelta(days=rng.randint(0, 14))
+    post = {
+        "user_name": f"bench-user-{rng.randint(0, 20000)}",
+        "service_type": rng.randint(0, 1),
+        "service_category": rng.randint(0, 3),
+        "pet_type": rng.choice(PET_TYPES),
+        "status": 0,
+        "availability": {"start": start.isoformat(), "end": end.isoformat()},
+        "post_time": datetime.utcnow() - timedelta(minutes=i),
+        "location": None,
+        "place_name": None,
+    }
+    if rng.random() < 2 / 3:
+        post["location"] = {
+            "type": "Point",
+            "coordinates": [CENTER_LNG + rng.uniform(-0.5, 0.5), CENTER_LAT + rng.uniform(-0.5, 0.5)],
+        }
+        post["place_name"] = "Toronto"
+    return post
+
+
+def seed(database, count):
+    from src.db_indexes import ensure_indexes
+    rng = random.Random(42)
+    today = date.today()
+    database.service.drop()
+    batch = []
+    for i in range(count):
+        batch.append(make_post(rng, i, today))
+        if len(batch) == 10_000:
+            database.service.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        database.service.insert_many(batch, ordered=False)
+    ensure_indexes(database)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def show_plan(database, service, radius_km):
+    from src.models.service_matching import candidate_specs
+    from src.specifications.service_specifications import compile_matchmaking_query
+    from src.specifications.compiler import explain
+    plan = explain(database.service, compile_matchmaking_query(candidate_specs(service, radius_km)))
+    kind = "geo" if plan["geo"] else "interval"
+    print(f"   {kind:<9} stages {' > '.join(plan['stages'])}  index {', '.join(plan['index_names']) or '-'}")
+
+
+def run(args):
+    DB_SETTINGS["MONGO_DB_NAME"] = args.db
+    from src.db_config import get_db
+    from src.models.service_matching import find_candidates
+
+    database = get_db()
+    if not args.skip_seed:
+        print(f"🌱 Seeding {args.posts} open posts into {args.db}...")
+        started = time.perf_counter()
+        seed(database, args.posts)
+        print(f"   done in {time.perf_counter() - started:.1f} s")
+
+    sample = list(database.service.aggregate([{"$sample": {"size": args.queries}}]))
+    timings = {"geo": [], "interval": []}
+    returned = 0
+    for service in sample:
+        kind = "geo" if service.get("location") else "interval"
+        started = time.perf_counter()
+        candidates = find_candidates(service, args.limit, args.radius_km)
+        timings[kind].append(time.perf_counter() - started)
+        returned += len(candidates)
+
+    print(f"\n📊 find_candidates over {database.service.estimated_document_count()} posts, radius {args.radius_km} km")
+    for kind, values in timings.items():
+        if not values:
+            continue
+        ms = [value * 1000 for value in values]
+        print(f"{kind:<9} {len(ms):>5} queries  p50 {percentile(ms, 0.5):7.2f} ms"
+              f"  p95 {percentile(ms, 0.95):7.2f} ms  max {max(ms):7.2f} ms")
+    print(f"   {returned / max(len(sample), 1):.1f} candidates per query on average")
+
+    print("\n🔍 Winning plans")
+    for kind in ("geo", "interval"):
+        service = next((s for s in sample if bool(s.get("location")) == (kind == "geo")), None)
+        if service:
+            show_plan(database, service, args.radius_km)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure matchmaking latency on a synthetic service board")
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=25)
+    parser.add_argument("--db", default="pawfectly_matchmaking_bench")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the posts of a previous run")
+    args = parser.parse_args()
+    if args.db == os.getenv("MONGO_DB_NAME", "pawfectly"):
+        print("⚠️ Refusing to seed the application database, pass a scratch --db")
+        sys.exit(2)
+    run(args)
+
+if __name__ == "__main__":
+    main()
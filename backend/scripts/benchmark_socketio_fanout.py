@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import argparse
+import socket
+import subprocess
+import threading
+import time
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+"""
+Socket.IO fan-out latency across N workers.
+
+Starts N app workers on consecutive ports, all pointed at the same message queue, connects
+--clients receivers to each worker and subscribes them to one item room, then sends chat
+messages with chat_send from a client on the first worker, through the same persist-and-push
+path as the app. Every receiver records how long each chat_message took to arrive, so the
+report shows what crossing the queue costs per worker. --sender must be an existing user; the
+workers run with the chat rate limit lifted, and the benchmark's messages are deleted afterwards.
+
+    python scripts/benchmark_socketio_fanout.py --workers 4 --clients 50 --sender alice \\
+        --message-queue redis://localhost:6379/0
+
+With --message-queue local only a single worker makes sense: there is nothing to carry
+messages between processes. Needs the python-socketio client extras
+(pip install "python-socketio[client]"), and the queue server for non-local runs.
+"""
+
+BENCH_ITEM_ID = "fanout-benchmark"
+BENCH_PREFIX = "fanout-benchmark:"
+
+
+def serve(port):
+    # Worker mode: run the real app on one port, settings come from the parent's environment
+    from app import app, socketio
+    socketio.run(app, host="127.0.0.1", port=port, debug=False, use_reloader=False, log_output=False)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+
+def make_token(user_name):
+    # Signed like the app's own cookies, without importing (and monkey patching) the app here
+    from flask import Flask
+    from flask_jwt_extended import JWTManager, create_access_token
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "your-jwt-secret")
+    JWTManager(app)
+    with app.app_context():
+        return create_access_token(identity=user_name)
+
+
+def connect_client(port, user_name):
+    import socketio as socketio_client
+    client = socketio_client.Client(reconnection=False)
+    client.connect(
+        f"http://127.0.0.1:{port}",
+        headers={"Cookie": f"access_token_cookie={make_token(user_name)}"},
+        transports=["websocket"],
+    )
+    return client
+
+
+def cleanup():
+    # chat_send persists like any chat message; remove the benchmark's thread
+    from src.db_config import db
+    deleted = db.chats.delete_many({"item_id": BENCH_ITEM_ID}).deleted_count
+    db.conversations.delete_many({"item_id": BENCH_ITEM_ID})
+    print(f"🧹 Deleted {deleted} benchmark message(s)")
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, latencies, expected):
+    ms = [value * 1000 for value in latencies]
+    print(f"{label:<12} delivered {len(ms):>7}/{expected:<7}"
+          f" p50 {percentile(ms, 0.50):7.2f} ms  p95 {percentile(ms, 0.95):7.2f} ms"
+          f"  p99 {percentile(ms, 0.99):7.2f} ms  max {max(ms) if ms else float('nan'):7.2f} ms")
+
+
+def run(args):
+    if args.message_queue == "local" and args.workers > 1:
+        print("⚠️ The local backend cannot deliver across processes, use --workers 1 or a queue URL")
+        sys.exit(2)
+
+    env = {**os.environ, "SOCKETIO_MESSAGE_QUEUE": args.message_queue, "SOCKETIO_CHAT_RATE_LIMIT": str(10 ** 9)}
+    ports = [args.base_port + i for i in range(args.workers)]
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+                         env=env, cwd=parent_dir)
+        for port in ports
+    ]
+    clients = []
+    try:
+        for port in ports:
+            if not wait_for_port(port):
+                raise RuntimeError(f"Worker on port {port} did not start")
+
+        room = f"item:{BENCH_ITEM_ID}"
+        sent_at = {}
+        latencies = {port: [] for port in ports}
+        lock = threading.Lock()
+
+        def on_message_for(port):
+            def on_message(data):
+                received = time.perf_counter()
+                content = data.get("content") or ""
+                if not content.startswith(BENCH_PREFIX):
+                    return
+                started = sent_at.get(int(content[len(BENCH_PREFIX):]))
+                if started is not None:
+                    with lock:
+                        latencies[port].append(received - started)
+            return on_message
+
+        print(f"🔌 Connecting {args.clients} receiver(s) to each of {args.workers} worker(s)...")
+        for port in ports:
+            for i in range(args.clients):
+                client = connect_client(port, f"bench-receiver-{port}-{i}")
+                client.on("chat_message", on_message_for(port))
+                client.call("subscribe", {"rooms": [room]})
+                clients.append(client)
+
+        sender = connect_client(ports[0], args.sender)
+        clients.append(sender)
+
+        print(f"📨 Sending {args.messages} message(s) from the worker on port {ports[0]}...")
+        for seq in range(args.messages):
+            sent_at[seq] = time.perf_counter()
+            sender.emit("chat_send", {"item_id": BENCH_ITEM_ID, "content": f"{BENCH_PREFIX}{seq}"})
+            time.sleep(args.interval)
+
+        expected_per_worker = args.clients * args.messages
+        deadline = time.time() + args.timeout
+        while time.time() < deadline:
+            with lock:
+                if all(len(values) >= expected_per_worker for values in latencies.values()):
+                    break
+            time.sleep(0.1)
+
+        print(f"\n📊 Fan-out latency, backend {args.message_queue}")
+        for port in ports:
+            label = f"worker {port}" + (" *" if port == ports[0] else "")
+            report(label, latencies[port], expected_per_worker)
+        report("all", [value for values in latencies.values() for value in values],
+               expected_per_worker * len(ports))
+        print("(* the sender's worker, no queue hop)")
+    finally:
+        for client in clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Socket.IO fan-out latency across workers")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=20, help="receivers per worker")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--sender", default="bench-sender", help="existing user_name that sends the messages")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between messages")
+    parser.add_argument("--message-queue", default=os.getenv("SOCKETIO_MESSAGE_QUEUE", "redis://localhost:6379/0"))
+    parser.add_argument("--base-port", type=int, default=5100)
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for deliveries")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import argparse
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+# Import our database config
+from src.db_config import db
+from src.db_indexes import ensure_indexes, print_index_report
+
+def main():
+    """
+    Builds every index declared by the models and reports drift.
+    Exits non-zero when an index is drifted or failed to build.
+    """
+    parser = argparse.ArgumentParser(description="Ensure declared MongoDB indexes exist")
+    parser.add_argument("--drop-undeclared", action="store_true",
+                        help="drop indexes that exist in the database but are not declared")
+    args = parser.parse_args()
+
+    print("🔍 Ensuring indexes...")
+    report = ensure_indexes(db, drop_undeclared=args.drop_undeclared)
+    print_index_report(report)
+
+    problems = sum(len(r["drifted"]) + len(r["failed"]) for r in report.values())
+    if problems:
+        print(f"\n⚠️ {problems} index problem(s) found")
+        sys.exit(1)
+    print("\n✅ Indexes are up to date!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.utils.geo import to_geojson_point
+
+def migrate_event_locations():
+    """
+    Rewrites event locations posted as {"coordinate": [lng, lat], "place_name": ...} into a GeoJSON
+    Point plus a top-level place_name. Run before `flask ensure-indexes`: the 2dsphere index cannot
+    be built while any event still has a location in another shape. Locations that cannot be
+    parsed are moved to legacy_location so they stay inspectable.
+    """
+    print("🔍 Migrating event locations...")
+    converted = 0
+    invalid = 0
+    for event in db.event.find({"location": {"$exists": True}, "location.type": {"$ne": "Point"}},
+                               {"location": 1, "place_name": 1}):
+        location = event["location"]
+        place_name = event.get("place_name")
+        if place_name is None and isinstance(location, dict):
+            place_name = location.get("place_name")
+        try:
+            point = to_geojson_point(location)
+        except ValueError:
+            db.event.update_one(
+                {"_id": event["_id"]},
+                {"$set": {"legacy_location": location, "place_name": place_name}, "$unset": {"location": ""}}
+            )
+            invalid += 1
+            print(f"⚠️ {event['_id']}: unparseable location {location!r}")
+            continue
+
+        db.event.update_one({"_id": event["_id"]}, {"$set": {"location": point, "place_name": place_name}})
+        converted += 1
+
+    print(f"\n✅ Converted {converted} event location(s), {invalid} moved to legacy_location")
+
+if __name__ == "__main__":
+    migrate_event_locations()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from pymongo import UpdateOne
+from src.db_config import db
+from src.models.service_model import MATCHED_USER_PROJECTION, matched_user_summary
+
+BATCH_SIZE = 500
+
+def migrate_matched_users():
+    """
+    Replaces full user documents embedded in service.matched_user with the compact
+    {_id, user_name, name, profile_picture} reference. Summaries are taken from the current user
+    document, falling back to the embedded copy for users that no longer exist.
+    """
+    print("🔍 Compacting matched_user on service posts...")
+    embedded = {"matched_user": {"$type": "object"}, "$or": [
+        {"matched_user.password": {"$exists": True}},
+        {"matched_user.contact": {"$exists": True}},
+        {"matched_user.name": {"$exists": False}},
+    ]}
+    operations = []
+    migrated = 0
+    for service in db.service.find(embedded, {"matched_user": 1}):
+        matched = service["matched_user"]
+        user = db.users.find_one({"_id": matched.get("_id")}, MATCHED_USER_PROJECTION) if matched.get("_id") else None
+        summary = matched_user_summary(user or matched)
+        operations.append(UpdateOne({"_id": service["_id"]}, {"$set": {"matched_user": summary}}))
+        if len(operations) >= BATCH_SIZE:
+            migrated += db.service.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += db.service.bulk_write(operations, ordered=False).modified_count
+
+    print(f"\n✅ Compacted matched_user on {migrated} service post(s)")
+
+if __name__ == "__main__":
+    migrate_matched_users()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.models.review import RATING_STARS, star_bucket
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+def migrate_reviews():
+    """
+    Moves embedded users.review arrays into the reviews collection and rebuilds
+    rating_sum / rating_count / rating_histogram / rating from them.
+    Each review is upserted on its position in the embedded array (legacy_index), so a user
+    interrupted between the copy and the $unset is copied again without duplicates, and the
+    script can be re-run after an interruption.
+    """
+    print("🔍 Migrating embedded reviews...")
+    users = db.users.find({"review": {"$exists": True}}, {"user_name": 1, "review": 1})
+
+    migrated_users = 0
+    migrated_reviews = 0
+    for user in users:
+        reviews = [
+            UpdateOne(
+                {"target_user": user["user_name"], "legacy_index": index},
+                {"$setOnInsert": {
+                    "reviewer": r.get("reviewer"),
+                    "rating": float(r["rating"]),
+                    "comment": r.get("comment"),
+                    "date": _parse_date(r.get("date"))
+                }},
+                upsert=True
+            )
+            for index, r in enumerate(user.get("review") or [])
+            if r.get("rating") is not None
+        ]
+        if reviews:
+            db.reviews.bulk_write(reviews, ordered=False)
+
+        # Fold everything already in the collection (including reviews added since) into the aggregates
+        histogram = {str(star): 0 for star in RATING_STARS}
+        rating_sum = 0
+        rating_count = 0
+        for review in db.reviews.find({"target_user": user["user_name"]}, {"rating": 1}):
+            rating_sum += review["rating"]
+            rating_count += 1
+            histogram[str(star_bucket(review["rating"]))] += 1
+
+        db.users.update_one(
+            {"_id": user["_id"]},
+            {
+                "$set": {
+                    "rating_sum": rating_sum,
+                    "rating_count": rating_count,
+                    "rating_histogram": histogram,
+                    "rating": round(rating_sum / rating_count, 2) if rating_count else 0
+                },
+                "$unset": {"review": ""}
+            }
+        )
+        migrated_users += 1
+        migrated_reviews += len(reviews)
+        print(f"✅ {user['user_name']}: {len(reviews)} review(s)")
+
+    print(f"\n✅ Migrated {migrated_reviews} review(s) from {migrated_users} user(s)")
+
+if __name__ == "__main__":
+    migrate_reviews()
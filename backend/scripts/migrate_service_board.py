@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.models.service_model import parse_post_time, split_location
+
+def migrate_service_board():
+    """
+    Rewrites service posts into the shape the paginated board queries on:
+    post_time ISO strings become datetimes (posts without one get their ObjectId creation time),
+    and {"place_name": ..., "coordinates": {"lat": ..., "lng": ...}} locations become a GeoJSON
+    Point plus a top-level place_name. Posts without last_activity_at (the "Latest Reply Time"
+    sort key) get their latest reply time, or their post time. Run before `flask ensure-indexes`:
+    the 2dsphere index cannot be built while any post still has a location in the old shape.
+    """
+    print("🔍 Migrating service board posts...")
+    times = 0
+    activity = 0
+    locations = 0
+    failed = 0
+    query = {"$or": [
+        {"post_time": {"$not": {"$type": "date"}}},
+        {"location": {"$ne": None}, "location.type": {"$ne": "Point"}},
+        {"last_activity_at": {"$exists": False}},
+    ]}
+    for service in db.service.find(query, {"post_time": 1, "location": 1, "last_reply_at": 1, "last_activity_at": 1}):
+        update = {}
+
+        post_time = service.get("post_time")
+        if not hasattr(post_time, "isoformat"):
+            try:
+                update["post_time"] = parse_post_time(post_time) if post_time else None
+            except (ValueError, AttributeError):
+                update["post_time"] = None
+            if update["post_time"] is None:
+                update["post_time"] = service["_id"].generation_time.replace(tzinfo=None)
+            times += 1
+
+        location = service.get("location")
+        if isinstance(location, dict) and location.get("type") != "Point":
+            point, place_name = split_location(location)
+            update["location"] = point
+            update["place_name"] = place_name
+            if point is None and location.get("coordinates"):
+                failed += 1
+                print(f"⚠️ {service['_id']}: unparseable coordinates {location.get('coordinates')!r}")
+            locations += 1
+
+        if "last_activity_at" not in service:
+            post_time = update.get("post_time", service.get("post_time"))
+            last_reply_at = service.get("last_reply_at")
+            update["last_activity_at"] = max(last_reply_at, post_time) if last_reply_at else post_time
+            activity += 1
+
+        if update:
+            db.service.update_one({"_id": service["_id"]}, {"$set": update})
+
+    print(f"\n✅ Converted {times} post time(s) and {locations} location(s), {failed} without usable coordinates,"
+          f" set last_activity_at on {activity} post(s)")
+
+if __name__ == "__main__":
+    migrate_service_board()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.models.reply_model import ReplyModel
+
+def parse_reply_time(value, fallback):
+    # Old replies carry the client's ISO string, or time.time() when the client sent none
+    try:
+        return datetime.utcfromtimestamp(float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    except ValueError:
+        return fallback
+
+def migrate_service_replies():
+    """
+    Moves replies embedded in service.replies ({thread_owner: [{user_name: [content, time]}, ...]})
+    into the service_replies / reply_threads collections, then removes the embedded field.
+    Every reply is upserted on (service_id, thread_owner, legacy_index), its position in the old
+    thread, and the threads and counters are then recomputed from the copied replies, so a post
+    interrupted before its $unset is copied again without duplicates or double counts.
+    """
+    print("🔍 Migrating service replies...")
+    posts = 0
+    replies = 0
+    for service in db.service.find({"replies": {"$type": "object"}}, {"replies": 1, "post_time": 1}):
+        fallback = service["_id"].generation_time.replace(tzinfo=None)
+        operations = []
+        for thread_owner, entries in (service["replies"] or {}).items():
+            index = 0
+            for entry in entries or []:
+                for user_name, value in entry.items():
+                    content, timestamp = (list(value) + [None, None])[:2]
+                    operations.append(UpdateOne(
+                        {"service_id": service["_id"], "thread_owner": thread_owner, "legacy_index": index},
+                        {"$setOnInsert": {
+                            "user_name": user_name,
+                            "content": content,
+                            "timestamp": parse_reply_time(timestamp, fallback),
+                        }},
+                        upsert=True
+                    ))
+                    index += 1
+        if operations:
+            ReplyModel.collection.bulk_write(operations, ordered=False)
+        replies += ReplyModel.rebuild_for_service(service["_id"])
+        db.service.update_one({"_id": service["_id"]}, {"$unset": {"replies": ""}})
+        posts += 1
+
+    print(f"\n✅ Migrated {replies} reply(ies) from {posts} service post(s)")
+
+if __name__ == "__main__":
+    migrate_service_replies()
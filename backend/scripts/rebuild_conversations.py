@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.models.conversation_model import ConversationModel
+
+def rebuild_conversations():
+    """
+    Builds the conversations collection from the existing chats.
+    Replays each thread's senders and then its last message, with nothing counted as unread,
+    so every participant gets one row with the latest message. Safe to run more than once.
+    """
+    print("🔍 Rebuilding conversations from chats...")
+    threads = 0
+    for item_id in db.chats.distinct("item_id"):
+        messages = db.chats.aggregate([
+            {"$match": {"item_id": item_id}},
+            {"$sort": {"timestamp": 1, "_id": 1}},
+            {"$group": {"_id": "$sender_id", "last": {"$last": "$$ROOT"}}},
+            {"$sort": {"last.timestamp": 1, "last._id": 1}},
+        ])
+        # Each sender's latest message registers them; the thread's last message is applied last
+        for row in messages:
+            ConversationModel.record_message(row["last"], unread=False)
+        threads += 1
+
+    print(f"✅ Rebuilt {threads} thread(s)")
+
+if __name__ == "__main__":
+    rebuild_conversations()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.models.user_relationship_model import UserRelationship
+
+def repair_follow_counters():
+    """
+    Removes repeated follower/following pairs, then recomputes every user's followers_count /
+    following_count from user_relationships. Run once after deploying the denormalized counters
+    (before `flask ensure-indexes`, whose unique pair index fails on duplicates), then whenever
+    drift is suspected.
+    """
+    print("🔍 Removing duplicate follow relationships...")
+    deleted = UserRelationship.remove_duplicate_pairs()
+    print(f"🧹 Deleted {deleted} duplicate relationship(s)")
+
+    print("🔍 Recomputing follower / following counters...")
+    modified = UserRelationship.repair_counters()
+    print(f"✅ Updated counters on {modified} user(s)")
+
+if __name__ == "__main__":
+    repair_follow_counters()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import argparse
+
+# Add the parent directory to path so we can import our modules
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.db_config import db
+from src.models.service_model import STATUS_TO_INT
+from src.service_lifecycle import run_service_lifecycle, FINISHED_STATUSES
+
+"""
+One pass of the service post lifecycle job, for cron or when the app runs with
+SERVICE_LIFECYCLE_ENABLED=false. Status changes are published through the Socket.IO message
+queue when one is configured.
+
+    python scripts/run_service_lifecycle.py --backfill
+
+--backfill first gives finished posts from before the job existed a status_changed_at (their
+post_time), so they become eligible for archiving.
+"""
+
+
+def backfill_status_changed_at():
+    query = {
+        "status": {"$in": [STATUS_TO_INT[status] for status in FINISHED_STATUSES]},
+        "status_changed_at": {"$exists": False},
+    }
+    result = db.service.update_many(query, [{"$set": {"status_changed_at": {"$ifNull": ["$post_time", "$$NOW"]}}}])
+    print(f"🕒 Backfilled status_changed_at on {result.modified_count} finished post(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expire, complete and archive service posts")
+    parser.add_argument("--backfill", action="store_true", help="set status_changed_at on older finished posts first")
+    parser.add_argument("--no-emit", action="store_true", help="do not publish service_status events")
+    args = parser.parse_args()
+
+    if args.backfill:
+        backfill_status_changed_at()
+
+    emitter = None
+    if not args.no_emit:
+        from src.socket_config import create_external_emitter, message_queue_url
+        if message_queue_url() is None:
+            print("⚠️ No Socket.IO message queue configured, status changes will not be pushed")
+        else:
+            emitter = create_external_emitter()
+
+    print("🔄 Running service lifecycle...")
+    report = run_service_lifecycle(emitter=emitter)
+    for step, count in report.items():
+        print(f"   {step:<20} {count}")
+    print("\n✅ Done")
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,160 @@
 # db_config.py
 import os
+import threading
+import click
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from gridfs import GridFS
 
+"""
+Lazy database layer.
+Importing this module has no side effects: the MongoClient is only created the first time a
+collection is actually used, once per process. A process forked by a pre-forking server
+(gunicorn, eventlet workers, ...) notices the pid change and builds its own client instead of
+reusing the parent's sockets and monitor threads, which pymongo does not support.
+Diagnostics and index creation are explicit CLI commands registered by init_db().
+"""
+
 # Load environment variables
 dotenv_path = os.path.join(os.path.dirname(__file__), "../../.env.local")
 load_dotenv(dotenv_path)
 
-# Get MongoDB URI (without database)
-MONGO_URI = os.getenv("MONGO_URI")
-
-# Ensure MONGO_URI is loaded
-if not MONGO_URI:
-    raise ValueError("Error: MONGO_URI is missing. Check your .env file!")
-
-
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
-db = client["pawfectly"]
-fs = GridFS(db)
-print("✅ Connected to MongoDB:", db.name)
-print("Collections:", db.list_collection_names())
-
-# 创建地理空间索引
-try:
-    # Get existing indexes
-    existing_indexes = list(db["pets"].list_indexes())
-    index_names = [index["name"] for index in existing_indexes]
-    
-    # Check if geospatial index already exists
-    if "location_2dsphere" not in index_names:
-        db["pets"].create_index([("location", "2dsphere")], name="location_2dsphere")
-        print("✅ GeoSpatial index created for pets collection")
-    else:
-        print("✅ GeoSpatial index already exists for pets collection")
-    
-    # List all indexes to confirm
-    print("📊 Current indexes:", [idx["name"] for idx in db["pets"].list_indexes()])
-except Exception as e:
-    print("❌ Error creating GeoSpatial index:", e)
-    import traceback
-    traceback.print_exc()
-    
-# Check for any existing pet data and verify location format
-try:
-    sample = db["pets"].find_one()
-    if sample:
-        print("📋 Sample pet data:", sample)
-        if "location" in sample:
+# Client settings, overridable from app.config in init_db()
+DB_SETTINGS = {
+    "MONGO_URI": os.getenv("MONGO_URI"),
+    "MONGO_DB_NAME": os.getenv("MONGO_DB_NAME", "pawfectly"),
+    "MONGO_MAX_POOL_SIZE": int(os.getenv("MONGO_MAX_POOL_SIZE", 50)),
+    "MONGO_MIN_POOL_SIZE": int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    "MONGO_CONNECT_TIMEOUT_MS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    "MONGO_SOCKET_TIMEOUT_MS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 20000)),
+    "MONGO_RETRY_WRITES": os.getenv("MONGO_RETRY_WRITES", "true").lower() == "true",
+}
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_fs = None
+
+
+def get_client():
+    """
+    Return this process's MongoClient, creating it on first use or after a fork
+    """
+    global _client, _client_pid, _fs
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                # Ensure MONGO_URI is loaded
+                if not DB_SETTINGS["MONGO_URI"]:
+                    raise ValueError("Error: MONGO_URI is missing. Check your .env file!")
+                _client = MongoClient(
+                    DB_SETTINGS["MONGO_URI"],
+                    maxPoolSize=DB_SETTINGS["MONGO_MAX_POOL_SIZE"],
+                    minPoolSize=DB_SETTINGS["MONGO_MIN_POOL_SIZE"],
+                    serverSelectionTimeoutMS=DB_SETTINGS["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+                    connectTimeoutMS=DB_SETTINGS["MONGO_CONNECT_TIMEOUT_MS"],
+                    socketTimeoutMS=DB_SETTINGS["MONGO_SOCKET_TIMEOUT_MS"],
+                    retryWrites=DB_SETTINGS["MONGO_RETRY_WRITES"],
+                    connect=False,
+                )
+                _client_pid = pid
+                _fs = None
+    return _client
+
+
+def get_db():
+    return get_client()[DB_SETTINGS["MONGO_DB_NAME"]]
+
+
+def get_fs():
+    global _fs
+    database = get_db()
+    if _fs is None:
+        _fs = GridFS(database)
+    return _fs
+
+
+class LazyCollection:
+    """
+    Stand-in for a pymongo Collection that resolves the real one on every use,
+    so module-level `db["pets"]` does not open a connection at import time
+    """
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self._name], attr)
+
+    def __getitem__(self, sub_name):
+        return LazyCollection(f"{self._name}.{sub_name}")
+
+    def __repr__(self):
+        return f"LazyCollection({self._name!r})"
+
+
+class LazyDatabase:
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+    def __getattr__(self, attr):
+        return getattr(get_db(), attr)
+
+    def __repr__(self):
+        return f"LazyDatabase({DB_SETTINGS['MONGO_DB_NAME']!r})"
+
+
+class LazyGridFS:
+    def __getattr__(self, attr):
+        return getattr(get_fs(), attr)
+
+
+db = LazyDatabase()
+fs = LazyGridFS()
+
+
+def check_database():
+    """
+    Print connection details and verify the pets location format
+    """
+    database = get_db()
+    print("✅ Connected to MongoDB:", database.name)
+    print("Collections:", database.list_collection_names())
+
+    # Check for any existing pet data and verify location format
+    try:
+        sample = database["pets"].find_one({"location": {"$exists": True}}, {"location": 1})
+        if sample:
             print("📍 Location format:", sample["location"])
             # Check if location is in the correct format
             if not isinstance(sample["location"], dict) or "type" not in sample["location"] or sample["location"]["type"] != "Point":
                 print("⚠️ Warning: Some pet data may have incorrect location format!")
-except Exception as e:
-    print("❌ Error checking sample data:", e)
+    except Exception as e:
+        print("❌ Error checking sample data:", e)
+
+
+@click.command("db-check")
+def db_check_command():
+    """Check the MongoDB connection and sample data."""
+    check_database()
+
+
+@click.command("ensure-indexes")
+@click.option("--drop-undeclared", is_flag=True, help="Drop indexes that are not declared by any model.")
+def ensure_indexes_command(drop_undeclared):
+    """Build the indexes declared by the models and report drift."""
+    from src.db_indexes import ensure_indexes, print_index_report
+    print_index_report(ensure_indexes(get_db(), drop_undeclared=drop_undeclared))
+
+
+def init_db(app):
+    """
+    Read client settings from app.config and register the database CLI commands
+    """
+    for key in DB_SETTINGS:
+        if key in app.config:
+            DB_SETTINGS[key] = app.config[key]
+    app.cli.add_command(db_check_command)
+    app.cli.add_command(ensure_indexes_command)
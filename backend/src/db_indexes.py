@@ -0,0 +1,149 @@
+import importlib
+from pymongo.errors import PyMongoError
+
+"""
+Declarative index registry.
+Each model declares the indexes its queries rely on with declare_indexes(), right next to the
+collection it owns. ensure_indexes() then builds everything in one idempotent pass and reports
+drift: declared indexes that exist with different options and undeclared indexes left in the db.
+An index that supersedes an older one names it with replaces=, and ensure_indexes() drops the
+old one once the new one is built (two 2dsphere indexes on one field break $geoNear, for one).
+"""
+
+# Modules that declare indexes; imported by ensure_indexes so every declaration is registered
+INDEXED_MODULES = [
+    "src.models.user_model",
+    "src.models.user_relationship_model",
+    "src.models.notification_model",
+    "src.models.review",
+    "src.models.reply_model",
+    "src.models.chat_model",
+    "src.models.conversation_model",
+    "src.models.event_model",
+    "src.models.pets_model",
+    "src.models.service_model",
+    "src.service_lifecycle",
+    "src.models.vet_service_model",
+    "src.media.image_variants",
+]
+
+# Options that make two indexes with the same name incompatible
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+INDEX_REGISTRY = {}
+
+# collection name -> {old index name: name of the declared index replacing it}
+REPLACED_INDEXES = {}
+
+
+def declare_indexes(collection_name, *indexes, replaces=None):
+    """
+    Register indexes for a collection
+
+    Args:
+        collection_name: The MongoDB collection name
+        *indexes: pymongo IndexModel instances, each with an explicit name
+        replaces: {old index name: declared index name}; the old index is dropped by
+            ensure_indexes() once its replacement exists
+    """
+    declared = INDEX_REGISTRY.setdefault(collection_name, {})
+    for index in indexes:
+        name = index.document["name"]
+        declared[name] = index
+    REPLACED_INDEXES.setdefault(collection_name, {}).update(replaces or {})
+    return list(indexes)
+
+
+def _key_of(index_document):
+    # IndexModel keeps the key as a mapping, index_information() returns a list of pairs
+    key = index_document["key"]
+    pairs = key.items() if hasattr(key, "items") else key
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in pairs]
+
+
+def _options_of(index_document):
+    return {option: index_document[option] for option in _COMPARED_OPTIONS if option in index_document}
+
+
+def ensure_indexes(db, drop_undeclared=False):
+    """
+    Create every declared index that is missing and report drift
+
+    Args:
+        db: The pymongo Database
+        drop_undeclared: Also drop indexes that exist in the database but are not declared
+
+    Returns:
+        dict: Per collection, the lists of created, unchanged, drifted, replaced, undeclared and
+            failed indexes
+    """
+    for module in INDEXED_MODULES:
+        importlib.import_module(module)
+
+    report = {}
+    for collection_name, declared in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        result = {"created": [], "unchanged": [], "drifted": [], "replaced": [], "undeclared": [], "failed": []}
+
+        missing = []
+        for name, index in declared.items():
+            if name not in existing:
+                missing.append(index)
+                continue
+            current = existing[name]
+            if (_key_of(current) != _key_of(index.document)
+                    or _options_of(current) != _options_of(index.document)):
+                result["drifted"].append({
+                    "name": name,
+                    "declared": {"key": _key_of(index.document), **_options_of(index.document)},
+                    "actual": {"key": _key_of(current), **_options_of(current)},
+                })
+            else:
+                result["unchanged"].append(name)
+
+        # Build all missing indexes for the collection in a single createIndexes command
+        if missing:
+            try:
+                result["created"].extend(collection.create_indexes(missing))
+            except PyMongoError:
+                for index in missing:
+                    try:
+                        result["created"].extend(collection.create_indexes([index]))
+                    except PyMongoError as e:
+                        result["failed"].append({"name": index.document["name"], "error": str(e)})
+
+        # Drop superseded indexes only once their replacement is built
+        failed = {failure["name"] for failure in result["failed"]}
+        for old_name, new_name in REPLACED_INDEXES.get(collection_name, {}).items():
+            if old_name in existing and old_name not in declared and new_name not in failed:
+                collection.drop_index(old_name)
+                result["replaced"].append(old_name)
+
+        for name in existing:
+            if name == "_id_" or name in declared or name in result["replaced"]:
+                continue
+            result["undeclared"].append(name)
+            if drop_undeclared:
+                collection.drop_index(name)
+
+        report[collection_name] = result
+    return report
+
+
+def print_index_report(report):
+    for collection_name, result in report.items():
+        print(f"📊 {collection_name}")
+        for name in result["created"]:
+            print(f"  ✅ created {name}")
+        for name in result["unchanged"]:
+            print(f"  ✔️ ok {name}")
+        for name in result["replaced"]:
+            print(f"  🔁 replaced {name}")
+        for drift in result["drifted"]:
+            print(f"  ⚠️ drift {drift['name']}: declared {drift['declared']}, actual {drift['actual']}")
+        for name in result["undeclared"]:
+            print(f"  ⚠️ undeclared {name}")
+        for failure in result["failed"]:
+            print(f"  ❌ failed {failure['name']}: {failure['error']}")
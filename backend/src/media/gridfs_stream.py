@@ -0,0 +1,104 @@
+import mimetypes
+from flask import Response, request
+from src.db_config import fs
+from bson import ObjectId
+from src.media.image_variants import resolve_variant, VARIANT_SIZES
+
+"""
+Shared GridFS media server used by every image endpoint.
+Files are streamed chunk by chunk instead of being read into memory, with support for
+HTTP Range requests (206), ETag / If-None-Match revalidation (304) and long cache lifetimes.
+GridFS files are never rewritten in place, so they are safe to cache as immutable. The one
+exception is an original served in place of a variant that could not be rendered: that URL
+should get the variant once it exists, so it is only cached with revalidation.
+"""
+
+CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}, immutable"
+# For an original standing in for a variant; the ETag changes once the variant is rendered
+FALLBACK_CACHE_CONTROL = "public, no-cache"
+
+
+def _etag_for(grid_out):
+    # pymongo 4 no longer computes md5 on upload, so fall back to the file id
+    return getattr(grid_out, "md5", None) or str(grid_out._id)
+
+
+def _mimetype_for(grid_out):
+    if grid_out.content_type:
+        return grid_out.content_type
+    mime_type, _ = mimetypes.guess_type(grid_out.filename or "")
+    return mime_type or "application/octet-stream"
+
+
+def _iter_chunks(grid_out, start, end):
+    try:
+        grid_out.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = grid_out.read(min(grid_out.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        grid_out.close()
+
+
+def stream_gridfs_file(file_id, download_name=None, size=None):
+    """
+    Build a streaming response for a GridFS file.
+
+    Args:
+        file_id: The GridFS file id (ObjectId or its string form)
+        download_name: Filename for the Content-Disposition header, the stored filename by default
+        size: Optional variant name (thumb, card, full), see image_variants.VARIANT_SIZES
+
+    Raises:
+        bson.errors.InvalidId: If file_id is not a valid ObjectId
+        gridfs.errors.NoFile: If no file exists with that id
+    """
+    served_id = resolve_variant(file_id, size)
+    grid_out = fs.get(served_id)
+    etag = _etag_for(grid_out)
+    is_fallback = size in VARIANT_SIZES and served_id == ObjectId(file_id)
+    cache_control = FALLBACK_CACHE_CONTROL if is_fallback else IMMUTABLE_CACHE_CONTROL
+    length = grid_out.length
+
+    if request.if_none_match.contains_weak(etag):
+        grid_out.close()
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        return response
+
+    start, end, status = 0, length, 200
+    # A stale If-Range validator means the client must get the whole file
+    if_range_etag = request.if_range.etag
+    if request.range is not None and if_range_etag in (None, etag):
+        byte_range = request.range.range_for_length(length)
+        if byte_range is None:
+            grid_out.close()
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{length}"
+            return response
+        start, end = byte_range
+        status = 206
+
+    response = Response(
+        _iter_chunks(grid_out, start, end),
+        status=status,
+        mimetype=_mimetype_for(grid_out),
+        direct_passthrough=True,
+    )
+    response.content_length = end - start
+    response.set_etag(etag)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Cache-Control"] = cache_control
+    if status == 206:
+        response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{length}"
+    download_name = download_name or grid_out.filename
+    if download_name:
+        response.headers.set("Content-Disposition", "inline", filename=download_name)
+    return response
@@ -0,0 +1,136 @@
+import io
+from bson import ObjectId
+from gridfs.errors import FileExists
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from src.db_config import fs
+from src.db_indexes import declare_indexes
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is optional, originals are served as-is without it
+    Image = None
+
+"""
+Resized image variants for GridFS uploads.
+Uploads are stored once as the original. The first request for a given ?size= renders a
+downscaled copy, stores it as a GridFS file linked to the original through
+metadata.variant_of / metadata.variant, and every later request reuses that copy. A unique index
+on that pair keeps a single copy when several requests render the same variant at once.
+"""
+
+VARIANT_SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1280,
+}
+
+VARIANT_QUALITY = 80
+
+declare_indexes(
+    "fs.files",
+    # Created by GridFS itself, declared so it is not reported as drift
+    IndexModel([("filename", ASCENDING), ("uploadDate", ASCENDING)], name="filename_1_uploadDate_1"),
+    # One stored copy per (original, size); originals have no variant_of and are left out
+    IndexModel([("metadata.variant_of", ASCENDING), ("metadata.variant", ASCENDING)],
+               name="variant_of_1_variant_1_unique", unique=True,
+               partialFilterExpression={"metadata.variant_of": {"$exists": True}}),
+    replaces={"variant_of_1_variant_1": "variant_of_1_variant_1_unique"},
+)
+declare_indexes(
+    "fs.chunks",
+    IndexModel([("files_id", ASCENDING), ("n", ASCENDING)], name="files_id_1_n_1", unique=True),
+)
+
+
+def save_image_upload(image_file, **metadata):
+    """
+    Store an uploaded image as an original in GridFS
+
+    Args:
+        image_file: The werkzeug FileStorage from request.files
+        **metadata: Extra metadata to keep on the GridFS file
+
+    Returns:
+        ObjectId: The id of the stored original
+    """
+    return fs.put(
+        image_file.stream,
+        filename=image_file.filename,
+        content_type=image_file.content_type,
+        metadata={"variant": "original", **metadata},
+    )
+
+
+def _variant_format():
+    if features.check("webp"):
+        return "WEBP", "image/webp", "webp"
+    return "JPEG", "image/jpeg", "jpg"
+
+
+def _find_variant(original_id, size):
+    return fs.find_one({"metadata.variant_of": original_id, "metadata.variant": size})
+
+
+def _render_variant(original_id, size):
+    original = fs.get(original_id)
+    try:
+        image = Image.open(original)
+        image.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        print(f"Cannot render {size} variant of {original_id}: {e}")
+        return None
+    finally:
+        original.close()
+
+    max_side = VARIANT_SIZES[size]
+    image.thumbnail((max_side, max_side))
+
+    pil_format, content_type, extension = _variant_format()
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, quality=VARIANT_QUALITY)
+    buffer.seek(0)
+
+    variant_id = ObjectId()
+    try:
+        return fs.put(
+            buffer,
+            _id=variant_id,
+            filename=f"{original_id}_{size}.{extension}",
+            content_type=content_type,
+            metadata={"variant_of": original_id, "variant": size},
+        )
+    except (FileExists, DuplicateKeyError):
+        # Another request stored this variant first; drop the chunks written for this copy
+        fs.delete(variant_id)
+        existing = _find_variant(original_id, size)
+        return existing._id if existing else None
+
+
+def resolve_variant(file_id, size=None):
+    """
+    Return the id of the GridFS file that should be served for the requested size.
+    Unknown sizes, a missing Pillow install or undecodable files all fall back to the original.
+    """
+    original_id = ObjectId(file_id)
+    if size not in VARIANT_SIZES or Image is None:
+        return original_id
+
+    existing = _find_variant(original_id, size)
+    if existing:
+        return existing._id
+
+    return _render_variant(original_id, size) or original_id
+
+
+def delete_image(file_id):
+    """
+    Delete an original and every variant rendered from it
+    """
+    original_id = ObjectId(file_id)
+    for variant in fs.find({"metadata.variant_of": original_id}):
+        fs.delete(variant._id)
+    fs.delete(original_id)
@@ -1,6 +1,16 @@
 from datetime import datetime
 from bson import ObjectId
 from src.db_config import db
+from src.db_indexes import declare_indexes
+from src.models.conversation_model import ConversationModel
+from pymongo import IndexModel, ASCENDING
+
+declare_indexes(
+    "chats",
+    # Thread paging in both directions: equality on item_id, then the (timestamp, _id) keyset
+    IndexModel([("item_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)], name="item_id_1_timestamp_1__id_1"),
+    IndexModel([("sender_id", ASCENDING), ("timestamp", ASCENDING)], name="sender_id_1_timestamp_1"),
+)
 
 class ChatMessage:
     def __init__(self, item_id, sender_id, sender_name, content, timestamp=None, _id=None):
@@ -8,7 +18,9 @@ class ChatMessage:
         self.sender_id = sender_id
         self.sender_name = sender_name
         self.content = content
-        self.timestamp = timestamp or datetime.utcnow()
+        # BSON dates keep milliseconds; truncating here makes the pushed cursor match the stored one
+        timestamp = timestamp or datetime.utcnow()
+        self.timestamp = timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
         self._id = _id or str(ObjectId())
 
     def to_dict(self):
@@ -21,40 +33,87 @@ class ChatMessage:
             "timestamp": self.timestamp,
         }
 
+# Timestamps are formatted by the server as the documents are read, so pages need no Python pass.
+# BSON dates have millisecond precision, which %L preserves exactly.
+MESSAGE_PROJECTION = {
+    "item_id": 1,
+    "sender_id": 1,
+    "sender_name": 1,
+    "content": 1,
+    "timestamp": {"$dateToString": {"date": "$timestamp", "format": "%Y-%m-%dT%H:%M:%S.%L"}},
+}
+
+
+def serialize_message(message):
+    data = dict(message)
+    if isinstance(data.get("timestamp"), datetime):
+        data["timestamp"] = data["timestamp"].isoformat()
+    return data
+
+
+def message_position(message):
+    # Resume point after this message: (timestamp, _id) orders messages that share a timestamp
+    timestamp = message["timestamp"]
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    return {"t": timestamp, "id": message["_id"]}
+
+
 class ChatModel:
     collection = db["chats"]
 
     @staticmethod
     def add_message(msg: ChatMessage):
-        return ChatModel.collection.insert_one(msg.to_dict()).inserted_id
+        message = msg.to_dict()
+        inserted_id = ChatModel.collection.insert_one(message).inserted_id
+        ConversationModel.record_message(message)
+        return inserted_id
 
     @staticmethod
-    def get_messages_by_item(item_id):
-        cur = ChatModel.collection.find({"item_id": item_id}).sort("timestamp", 1)
-        return list(cur)
+    def get_messages_page(item_id, limit, before=None, after=None):
+        """
+        One page of an item's thread, oldest first
+
+        Without a position this is the latest `limit` messages. With `before` it is the
+        `limit` messages preceding that position, with `after` the ones following it.
+
+        Args:
+            before / after: Positions from message_position()
+
+        Returns:
+            tuple: (messages with ISO timestamps, whether more messages exist in the paging direction)
+
+        Raises:
+            ValueError: If a position is malformed
+        """
+        query = {"item_id": item_id}
+        position = after or before
+        op = "$gt" if after else "$lt"
+        if position:
+            try:
+                timestamp = datetime.fromisoformat(position["t"])
+                last_id = str(position["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"timestamp": {op: timestamp}},
+                {"timestamp": timestamp, "_id": {op: last_id}},
+            ]
+
+        # Newer pages read forward; the latest page and older pages read backward and are reversed
+        direction = 1 if after else -1
+        messages = list(
+            ChatModel.collection.find(query, MESSAGE_PROJECTION)
+            .sort([("timestamp", direction), ("_id", direction)])
+            .limit(limit + 1)
+        )
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if not after:
+            messages.reverse()
+        return messages, has_more
 
     @staticmethod
-    def get_conversations_by_user(user_id):
-        pipeline = [
-        {"$match": {"sender_id": user_id}},
-        {"$sort": {"timestamp": -1}},
-        {"$group": {"_id": "$item_id", "doc": {"$first": "$$ROOT"}}},
-        {"$replaceRoot": {"newRoot": "$doc"}},
-        {"$lookup": {
-            "from": "pets",
-            "localField": "item_id",
-            "foreignField": "_id",
-            "as": "pet"
-        }},
-        {"$unwind": {"path": "$pet", "preserveNullAndEmptyArrays": True}},
-        {"$addFields": {
-            "item": {
-                "name":  {"$ifNull": ["$pet.name",  "Unknown"]},
-                "image": {"$ifNull": ["$pet.image", ""]},
-                "sellerId": {"$ifNull": ["$pet.userId", "unknown-seller"]},
-            }
-        }},
-        {"$project": {"pet": 0}},  # 去掉中间字段
-        {"$sort": {"timestamp": -1}}
-        ]
-        return list(ChatModel.collection.aggregate(pipeline))
+    def get_conversations_by_user(user_id, limit=20, cursor=None):
+        # Served from the materialized conversations collection, see conversation_model
+        return ConversationModel.get_inbox_page(user_id, limit, cursor)
@@ -0,0 +1,155 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import IndexModel, ASCENDING, DESCENDING, UpdateOne
+from src.db_config import db
+from src.db_indexes import declare_indexes
+
+"""
+Materialized inbox: one document per (item thread, participant).
+Every chat message upserts the rows of everyone in the thread (the sender and the item's seller,
+plus anyone who wrote in it before), carrying the last message, the participant's unread count
+and the item's name and image, so an inbox is a single indexed query instead of an aggregation
+over the chats collection.
+"""
+
+conversations_collection = db["conversations"]
+pets_collection = db["pets"]
+
+ITEM_PROJECTION = {"name": 1, "image": 1, "seller_id": 1}
+
+declare_indexes(
+    "conversations",
+    IndexModel([("participant_id", ASCENDING), ("item_id", ASCENDING)], name="participant_id_1_item_id_1", unique=True),
+    # Inbox order, newest activity first, with _id as keyset tiebreaker
+    IndexModel([("participant_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)],
+               name="participant_id_1_updated_at_-1__id_-1"),
+    # Fan-out of a new message to everyone already in the thread
+    IndexModel([("item_id", ASCENDING)], name="item_id_1"),
+)
+
+
+def _find_item(item_id):
+    try:
+        return pets_collection.find_one({"_id": ObjectId(item_id)}, ITEM_PROJECTION) or {}
+    except (InvalidId, TypeError):
+        return {}
+
+
+def serialize_conversation(conversation):
+    data = dict(conversation)
+    data["_id"] = str(data["_id"])
+    for field in ("updated_at", "created_at"):
+        if isinstance(data.get(field), datetime):
+            data[field] = data[field].isoformat()
+    last = data.get("last_message") or {}
+    if isinstance(last.get("timestamp"), datetime):
+        data["last_message"] = {**last, "timestamp": last["timestamp"].isoformat()}
+    return data
+
+
+class ConversationModel:
+    collection = conversations_collection
+
+    @staticmethod
+    def record_message(message, unread=True):
+        """
+        Upsert every participant's conversation row for a new chat message
+
+        Args:
+            message: The chat message document (item_id, sender_id, sender_name, content, timestamp, _id)
+            unread: Count the message as unread for the participants other than the sender
+        """
+        item_id = message["item_id"]
+        item = _find_item(item_id)
+        seller_id = item.get("seller_id")
+
+        participants = set(ConversationModel.collection.distinct("participant_id", {"item_id": item_id}))
+        participants.add(message["sender_id"])
+        if seller_id:
+            participants.add(seller_id)
+
+        last_message = {
+            "_id": message["_id"],
+            "sender_id": message["sender_id"],
+            "sender_name": message["sender_name"],
+            "content": message["content"],
+            "timestamp": message["timestamp"],
+        }
+        shared = {
+            "last_message": last_message,
+            "updated_at": message["timestamp"],
+            "item_name": item.get("name", "Unknown"),
+            "item_image": str(item["image"]) if item.get("image") else "",
+            "seller_id": seller_id,
+        }
+
+        operations = []
+        for participant_id in participants:
+            update = {
+                "$set": dict(shared),
+                "$setOnInsert": {"created_at": message["timestamp"]},
+            }
+            if participant_id == message["sender_id"]:
+                # Writing in a thread means having read it
+                update["$set"]["unread_count"] = 0
+            else:
+                update["$inc"] = {"unread_count": 1 if unread else 0}
+            operations.append(UpdateOne(
+                {"item_id": item_id, "participant_id": participant_id},
+                update,
+                upsert=True
+            ))
+        if operations:
+            ConversationModel.collection.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def get_inbox_page(participant_id, limit, cursor=None):
+        """
+        One page of a user's conversations, most recently active first
+
+        Returns:
+            tuple: (conversation documents, position of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {"participant_id": participant_id}
+        if cursor:
+            try:
+                updated_at = datetime.fromisoformat(cursor["t"])
+                last_id = ObjectId(cursor["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"updated_at": {"$lt": updated_at}},
+                {"updated_at": updated_at, "_id": {"$lt": last_id}},
+            ]
+
+        conversations = list(
+            ConversationModel.collection.find(query)
+            .sort([("updated_at", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        next_position = None
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            last = conversations[-1]
+            next_position = {"t": last["updated_at"].isoformat(), "id": str(last["_id"])}
+        return conversations, next_position
+
+    @staticmethod
+    def unread_total(participant_id):
+        result = list(ConversationModel.collection.aggregate([
+            {"$match": {"participant_id": participant_id, "unread_count": {"$gt": 0}}},
+            {"$group": {"_id": None, "total": {"$sum": "$unread_count"}}},
+        ]))
+        return result[0]["total"] if result else 0
+
+    @staticmethod
+    def mark_read(participant_id, item_id):
+        result = ConversationModel.collection.update_one(
+            {"participant_id": participant_id, "item_id": item_id},
+            {"$set": {"unread_count": 0}}
+        )
+        return result.matched_count > 0
@@ -1,19 +1,52 @@
 from src.db_config import db, fs
+from src.db_indexes import declare_indexes
+from src.specifications.event_specifications import (
+    EVENTS_DATE_INDEX, EVENTS_LOCATION_INDEX, DateWindowSpec, AfterEventSpec, DistanceSpec,
+    compile_event_feed_query
+)
 from bson.objectid import ObjectId
+from pymongo import IndexModel, ASCENDING, GEOSPHERE, ReturnDocument
+from datetime import date
 
 event_collection = db["event"]
 
+declare_indexes(
+    "event",
+    IndexModel([("event_date", ASCENDING), ("event_time", ASCENDING), ("_id", ASCENDING)], name=EVENTS_DATE_INDEX),
+    IndexModel([("location", GEOSPHERE)], name=EVENTS_LOCATION_INDEX),
+)
+
+FEED_MODES = ("upcoming", "past")
+
+def feed_projection(viewer_id):
+    # Everything but the attendee list, which only contributes its size and the viewer's membership
+    return {
+        "event_name": 1,
+        "description": 1,
+        "event_date": 1,
+        "event_time": 1,
+        "location": 1,
+        "place_name": 1,
+        "image": 1,
+        "organizer": 1,
+        "attendee_count": 1,
+        "attending": {"$in": [viewer_id, {"$ifNull": ["$attendees", []]}]},
+    }
+
 class Event:
 
-    def __init__(self, event_name, event_date, event_time, location, description, image, organizer):
+    def __init__(self, event_name, event_date, event_time, location, description, image, organizer, place_name=None):
         self.event_name = event_name
         self.description = description
         self.event_date = event_date
         self.event_time = event_time
+        # GeoJSON Point, see utils.geo.to_geojson_point
         self.location = location
+        self.place_name = place_name
         self.image = image
         self.organizer = organizer
         self.attendees = [organizer]
+        self.attendee_count = 1
         
 
     def to_dict(self):
@@ -23,9 +56,11 @@ class Event:
             "event_date": self.event_date,
             "event_time": self.event_time,
             "location": self.location,
+            "place_name": self.place_name,
             "image": self.image,
             "organizer": self.organizer,
-            "attendees": self.attendees
+            "attendees": self.attendees,
+            "attendee_count": self.attendee_count
         }
     
     def jsonify(self):
@@ -35,9 +70,10 @@ class Event:
             "event_date": self.event_date,
             "event_time": self.event_time,
             "location": self.location,
+            "place_name": self.place_name,
             "image": str(self.image),
             "organizer": str(self.organizer),
-            "attendees": [str(attendee) for attendee in self.attendees],
+            "attendee_count": self.attendee_count,
             "_id": str(self._id),
         }
     
@@ -60,6 +96,86 @@ class Event:
         return event_dict
 
     
+    @staticmethod
+    def feed_item_to_json(event_dict):
+        event_dict["_id"] = str(event_dict["_id"])
+        event_dict["image"] = str(event_dict.get("image"))
+        if "organizer" in event_dict:
+            event_dict["organizer"] = str(event_dict["organizer"])
+        event_dict["attendee_count"] = event_dict.get("attendee_count", 0)
+        event_dict["attending"] = bool(event_dict.get("attending", False))
+        return event_dict
+
+    @staticmethod
+    def get_feed_page(mode, viewer_id, limit, cursor=None, date_from=None, date_to=None):
+        """
+        One page of the event feed
+
+        Args:
+            mode: "upcoming" (today onwards, soonest first) or "past" (before today, latest first)
+            viewer_id: The current user's _id, used for the per-event "attending" flag
+            cursor: The position returned for the previous page, or None for the first page
+            date_from / date_to: Optional inclusive "YYYY-MM-DD" bounds on event_date
+
+        Returns:
+            tuple: (feed items, position of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        today = date.today().isoformat()
+        descending = mode == "past"
+        if descending:
+            specs = [DateWindowSpec(on_or_after=date_from, on_or_before=date_to, before=today)]
+        else:
+            specs = [DateWindowSpec(on_or_after=max(date_from or today, today), on_or_before=date_to)]
+
+        if cursor:
+            try:
+                specs.append(AfterEventSpec(cursor["d"], cursor["t"], ObjectId(cursor["id"]), descending))
+            except Exception:
+                raise ValueError("Invalid cursor")
+
+        direction = -1 if descending else 1
+        events = list(
+            compile_event_feed_query(specs)
+            .find(event_collection, feed_projection(viewer_id))
+            .sort([("event_date", direction), ("event_time", direction), ("_id", direction)])
+            .limit(limit + 1)
+        )
+        next_position = None
+        if len(events) > limit:
+            events = events[:limit]
+            last = events[-1]
+            next_position = {"d": last.get("event_date"), "t": last.get("event_time"), "id": str(last["_id"])}
+        return [Event.feed_item_to_json(e) for e in events], next_position
+
+    @staticmethod
+    def find_nearby(viewer_id, lng, lat, radius_meters, limit, date_from=None, date_to=None):
+        """
+        Upcoming events within radius_meters of (lng, lat), nearest first
+
+        Distances come from $geoNear on the 2dsphere index and are returned in km as "distance".
+
+        Returns:
+            list: Feed items, each with a "distance" field
+        """
+        today = date.today().isoformat()
+        specs = [
+            DistanceSpec(lng, lat, radius_meters),
+            DateWindowSpec(on_or_after=max(date_from or today, today), on_or_before=date_to),
+        ]
+        compiled = compile_event_feed_query(specs)
+
+        projection = feed_projection(viewer_id)
+        projection["distance"] = {"$divide": ["$distance", 1000]}
+        pipeline = [
+            compiled.geo.to_geo_near_stage(compiled.query),
+            {"$limit": limit},
+            {"$project": projection},
+        ]
+        return [Event.feed_item_to_json(e) for e in event_collection.aggregate(pipeline)]
+
     @staticmethod
     def update_event_by_str_id(event_id, update_data):
         try:
@@ -68,6 +184,49 @@ class Event:
             print(f"An error occurred while updating the event: {e}")
             return None
     
+    @staticmethod
+    def set_attendance(event_id, user_id, attending):
+        """
+        Add or remove one attendee with a single conditional update
+
+        The filter only matches when the update would change something, so $inc keeps
+        attendee_count in step with attendees even under concurrent requests, and the
+        attendee list is never read or rewritten.
+
+        Returns:
+            dict or None: {"attendee_count": n} after the update, or None if nothing changed
+        """
+        if attending:
+            query = {"_id": ObjectId(event_id), "attendees": {"$ne": user_id}}
+            update = {"$addToSet": {"attendees": user_id}, "$inc": {"attendee_count": 1}}
+        else:
+            query = {"_id": ObjectId(event_id), "attendees": user_id}
+            update = {"$pull": {"attendees": user_id}, "$inc": {"attendee_count": -1}}
+        return event_collection.find_one_and_update(
+            query,
+            update,
+            projection={"_id": 0, "attendee_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def toggle_attendance(event_id, user_id):
+        """
+        Flip a user's attendance without loading the event
+
+        Returns:
+            tuple or None: (attending, attendee_count) after the toggle, or None if the event does not exist
+        """
+        # Try joining first, then leaving; a concurrent toggle of the same user can make both miss once
+        for _ in range(2):
+            for attending in (True, False):
+                result = Event.set_attendance(event_id, user_id, attending)
+                if result is not None:
+                    return attending, result.get("attendee_count", 0)
+            if not event_collection.find_one({"_id": ObjectId(event_id)}, {"_id": 1}):
+                return None
+        return None
+
     @staticmethod
     def delete_event_by_str_id(event_id):
         try:
@@ -0,0 +1,201 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from src.db_config import db
+from src.db_indexes import declare_indexes
+from src.models.user_model import find_users_by_usernames
+from src.utils.pagination import encode_cursor
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+"""
+Per-user notification feed.
+Notifications are created through publish_notification(), which stores the document and pushes
+it to the recipient's user:<name> Socket.IO room, so clients only fetch the feed once and then
+listen. Reading sets read/read_at in bulk, and a TTL index removes read notifications
+READ_TTL_DAYS after they were read; unread ones have no read_at and are kept.
+"""
+
+notifications_collection = db["notifications"]
+
+NOTIFICATION_TYPES = ("follow", "review")
+
+# How long a read notification is kept before the TTL monitor deletes it
+READ_TTL_DAYS = 30
+
+declare_indexes(
+    "notifications",
+    # The unread feed, newest first, with _id as keyset tiebreaker; also serves the unread count
+    IndexModel([("user_name", ASCENDING), ("read", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="user_name_1_read_1_created_at_-1__id_-1"),
+    # The full feed (read and unread)
+    IndexModel([("user_name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="user_name_1_created_at_-1__id_-1"),
+    IndexModel([("read_at", ASCENDING)], name="read_at_1_ttl",
+               expireAfterSeconds=READ_TTL_DAYS * 24 * 3600,
+               partialFilterExpression={"read": True}),
+)
+
+
+def notification_position(notification):
+    return {"t": notification["created_at"].isoformat(), "id": str(notification["_id"])}
+
+
+def serialize_notifications(notifications):
+    """
+    Format notifications for the client, hydrating every sender with one batched $in query
+
+    Notifications whose sender no longer exists are left out.
+    """
+    senders = find_users_by_usernames(notif.get("from_user") for notif in notifications)
+    formatted = []
+    for notif in notifications:
+        from_user = senders.get(notif.get("from_user"))
+        if not from_user:
+            continue
+        formatted.append({
+            "id": str(notif["_id"]),
+            "type": notif["type"],
+            "from_user": {
+                "user_name": from_user.get("user_name"),
+                "name": from_user.get("name"),
+                "profile_picture": from_user.get("profile_picture")
+            },
+            "read": notif.get("read", False),
+            "created_at": notif["created_at"].isoformat(),
+            "data": notif.get("data", {}),
+            # Pass back to POST /notifications/read as up_to to mark everything up to here
+            "cursor": encode_cursor(notification_position(notif)),
+            "request_id": notif.get("request_id")  # Only for follow requests
+        })
+    return formatted
+
+
+class NotificationModel:
+    collection = notifications_collection
+
+    @staticmethod
+    def create(user_name, type, from_user, data=None):
+        notification = {
+            "user_name": user_name,
+            "type": type,
+            "from_user": from_user,
+            "data": data or {},
+            "read": False,
+            "created_at": datetime.utcnow(),
+        }
+        notification["_id"] = NotificationModel.collection.insert_one(notification).inserted_id
+        return notification
+
+    @staticmethod
+    def get_page(user_name, limit, cursor=None, include_read=False):
+        """
+        One page of a user's notifications, newest first
+
+        Args:
+            include_read: Also list notifications that were already read
+
+        Returns:
+            tuple: (notification documents, position of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {"user_name": user_name}
+        if not include_read:
+            query["read"] = False
+        if cursor:
+            try:
+                created_at = datetime.fromisoformat(cursor["t"])
+                last_id = ObjectId(cursor["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+
+        notifications = list(
+            NotificationModel.collection.find(query)
+            .sort([("created_at", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        next_position = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            next_position = notification_position(notifications[-1])
+        return notifications, next_position
+
+    @staticmethod
+    def unread_count(user_name):
+        return NotificationModel.collection.count_documents({"user_name": user_name, "read": False})
+
+    @staticmethod
+    def mark_read(user_name, ids=None, up_to=None):
+        """
+        Mark notifications read in a single update_many
+
+        Args:
+            ids: Notification ids to mark; with neither argument every unread notification is marked
+            up_to: A notification_position(); everything created at or before it is marked
+
+        Returns:
+            int: Number of notifications marked read
+
+        Raises:
+            ValueError: If an id or the position is malformed
+        """
+        query = {"user_name": user_name, "read": False}
+        if ids is not None:
+            try:
+                query["_id"] = {"$in": [ObjectId(i) for i in ids]}
+            except (InvalidId, TypeError):
+                raise ValueError("Invalid notification id")
+        if up_to:
+            try:
+                created_at = datetime.fromisoformat(up_to["t"])
+                last_id = ObjectId(up_to["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lte": last_id}},
+            ]
+
+        result = NotificationModel.collection.update_many(
+            query,
+            {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+
+def publish_notification(user_name, type, from_user, data=None):
+    """
+    Store a notification and push it to the recipient's connections
+
+    Args:
+        user_name: The recipient
+        type: One of NOTIFICATION_TYPES
+        from_user: The user_name of the user who caused it
+        data: Type specific payload (review rating, item id, ...)
+
+    Returns:
+        dict: The serialized notification, or None when nothing was sent
+
+    Raises:
+        ValueError: If type is not one of NOTIFICATION_TYPES
+    """
+    from src.socket_config import socketio, user_room
+
+    if type not in NOTIFICATION_TYPES:
+        raise ValueError(f"Unknown notification type: {type}")
+    if not user_name or user_name == from_user:
+        return None
+    notification = NotificationModel.create(user_name, type, from_user, data)
+    formatted = serialize_notifications([notification])
+    if not formatted:
+        return None
+    socketio.emit("notification", {
+        "notification": formatted[0],
+        "unread_count": NotificationModel.unread_count(user_name),
+    }, room=user_room(user_name))
+    return formatted[0]
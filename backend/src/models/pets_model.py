@@ -1,11 +1,21 @@
-from src.db_config import db
+from src.db_config import db, fs
+from src.db_indexes import declare_indexes
+from pymongo import IndexModel, ASCENDING, GEOSPHERE
 from bson.objectid import ObjectId
 from werkzeug.datastructures import FileStorage
-import gridfs
+from src.media.image_variants import save_image_upload
 import json
 
 pets_collection = db["pets"]
-fs = gridfs.GridFS(db)
+
+# The pets collection holds both profile pets and marketplace listings
+declare_indexes(
+    "pets",
+    IndexModel([("owner_username", ASCENDING)], name="owner_username_1"),
+    IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+    # Marketplace filters in equality / sort / range order, hinted by pet_specifications
+    IndexModel([("type", ASCENDING), ("_id", ASCENDING), ("price", ASCENDING)], name="type_1__id_1_price_1"),
+)
 
 class Pet:
     def __init__(self, builder):
@@ -86,7 +96,7 @@ class Pet:
         builder.set_review(data.get("review"))
 
         if picture_file:
-            file_id = fs.put(picture_file.stream, filename=picture_file.filename, content_type=picture_file.content_type)
+            file_id = save_image_upload(picture_file)
             builder.set_profile_picture(str(file_id))
 
         pet = builder.build()
@@ -0,0 +1,256 @@
+from datetime import datetime
+from itertools import islice
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, ReturnDocument
+from src.db_config import db
+from src.db_indexes import declare_indexes
+from src.utils.pagination import encode_cursor
+
+"""
+Service board replies, append-only.
+Each reply is its own document in service_replies. A reply_threads document per
+(service post, thread owner) keeps the thread's count, participants and its latest replies,
+maintained with $inc / $addToSet / $push-$slice, so posting a reply costs the same on a quiet
+post and a busy one, and listing a post's threads never reads the full reply history.
+"""
+
+replies_collection = db["service_replies"]
+threads_collection = db["reply_threads"]
+# Replies and threads of archived posts, see service_lifecycle
+replies_archive_name = "service_replies_archive"
+threads_archive_name = "reply_threads_archive"
+services_collection = db["service"]
+
+# Latest replies kept inline on each thread document for the thread list
+THREAD_PREVIEW_SIZE = 5
+
+# Documents copied and deleted per round when archiving
+ARCHIVE_BATCH_SIZE = 1000
+
+declare_indexes(
+    "service_replies",
+    # Thread paging: equality on (service_id, thread_owner), then the (timestamp, _id) keyset
+    IndexModel([("service_id", ASCENDING), ("thread_owner", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+               name="service_id_1_thread_owner_1_timestamp_1__id_1"),
+)
+
+declare_indexes(
+    "reply_threads",
+    IndexModel([("service_id", ASCENDING), ("thread_owner", ASCENDING)], name="service_id_1_thread_owner_1", unique=True),
+    # Threads of a post in the order they were started
+    IndexModel([("service_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+               name="service_id_1_created_at_1__id_1"),
+)
+
+
+def reply_position(reply):
+    timestamp = reply["timestamp"]
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    return {"t": timestamp, "id": str(reply["_id"])}
+
+
+def serialize_reply(reply):
+    return {
+        "_id": str(reply["_id"]),
+        "user_name": reply["user_name"],
+        "content": reply["content"],
+        "timestamp": reply["timestamp"].isoformat() + "Z",
+    }
+
+
+def serialize_thread(thread):
+    recent = thread.get("recent_replies", [])
+    return {
+        "thread_owner": thread["thread_owner"],
+        "participants": thread.get("participants", []),
+        "reply_count": thread.get("reply_count", 0),
+        "created_at": thread["created_at"].isoformat() + "Z",
+        "last_reply_at": thread["last_reply_at"].isoformat() + "Z",
+        "replies": [serialize_reply(r) for r in recent],
+        # Older replies than the preview are fetched per thread with ?before=
+        "before": encode_cursor(reply_position(recent[0])) if recent else None,
+        "has_more": thread.get("reply_count", 0) > len(recent),
+    }
+
+
+class ReplyModel:
+    collection = replies_collection
+    threads = threads_collection
+
+    @staticmethod
+    def add_reply(service_id, thread_owner, user_name, content, timestamp=None):
+        """
+        Append a reply to a thread of a service post
+
+        Args:
+            service_id: The post's ObjectId
+            thread_owner: The user whose thread this reply belongs to (the replier for a new thread)
+
+        Returns:
+            tuple: (the stored reply, the thread document after the update)
+        """
+        reply = {
+            "service_id": service_id,
+            "thread_owner": thread_owner,
+            "user_name": user_name,
+            "content": content,
+            "timestamp": timestamp or datetime.utcnow(),
+        }
+        reply["_id"] = ReplyModel.collection.insert_one(reply).inserted_id
+
+        preview = {key: reply[key] for key in ("_id", "user_name", "content", "timestamp")}
+        thread = ReplyModel.threads.find_one_and_update(
+            {"service_id": service_id, "thread_owner": thread_owner},
+            {
+                "$inc": {"reply_count": 1},
+                "$max": {"last_reply_at": reply["timestamp"]},
+                "$addToSet": {"participants": user_name},
+                "$push": {"recent_replies": {"$each": [preview], "$slice": -THREAD_PREVIEW_SIZE}},
+                "$setOnInsert": {"created_at": reply["timestamp"]},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        services_collection.update_one(
+            {"_id": service_id},
+            {"$inc": {"reply_count": 1},
+             "$max": {"last_reply_at": reply["timestamp"], "last_activity_at": reply["timestamp"]}}
+        )
+        return reply, thread
+
+    @staticmethod
+    def thread_exists(service_id, thread_owner):
+        return ReplyModel.threads.count_documents(
+            {"service_id": service_id, "thread_owner": thread_owner}, limit=1
+        ) > 0
+
+    @staticmethod
+    def get_threads_page(service_id, limit, cursor=None):
+        """
+        One page of a post's threads, oldest thread first, each with its latest replies
+
+        Returns:
+            tuple: (thread documents, position of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {"service_id": service_id}
+        if cursor:
+            try:
+                created_at = datetime.fromisoformat(cursor["t"])
+                last_id = ObjectId(cursor["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": last_id}},
+            ]
+
+        threads = list(
+            ReplyModel.threads.find(query)
+            .sort([("created_at", 1), ("_id", 1)])
+            .limit(limit + 1)
+        )
+        next_position = None
+        if len(threads) > limit:
+            threads = threads[:limit]
+            last = threads[-1]
+            next_position = {"t": last["created_at"].isoformat(), "id": str(last["_id"])}
+        return threads, next_position
+
+    @staticmethod
+    def get_thread_replies(service_id, thread_owner, limit, before=None):
+        """
+        One page of a thread, oldest first: the latest `limit` replies, or the ones preceding `before`
+
+        Returns:
+            tuple: (reply documents, whether older replies exist)
+
+        Raises:
+            ValueError: If the position is malformed
+        """
+        query = {"service_id": service_id, "thread_owner": thread_owner}
+        if before:
+            try:
+                timestamp = datetime.fromisoformat(before["t"])
+                last_id = ObjectId(before["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}},
+            ]
+
+        replies = list(
+            ReplyModel.collection.find(query)
+            .sort([("timestamp", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        has_more = len(replies) > limit
+        replies = replies[:limit]
+        replies.reverse()
+        return replies, has_more
+
+    @staticmethod
+    def rebuild_for_service(service_id):
+        """
+        Recompute a post's thread documents and its reply_count / last_reply_at from its replies.
+        Sets instead of incrementing, so it can be repeated (migrations, repairs).
+
+        Returns:
+            int: The post's reply count
+        """
+        total = 0
+        last_reply_at = None
+        owners = ReplyModel.collection.distinct("thread_owner", {"service_id": service_id})
+        for thread_owner in owners:
+            query = {"service_id": service_id, "thread_owner": thread_owner}
+            replies = list(ReplyModel.collection.find(query).sort([("timestamp", 1), ("_id", 1)]))
+            preview = [{key: r[key] for key in ("_id", "user_name", "content", "timestamp")}
+                       for r in replies[-THREAD_PREVIEW_SIZE:]]
+            ReplyModel.threads.update_one(
+                query,
+                {"$set": {
+                    "reply_count": len(replies),
+                    "created_at": replies[0]["timestamp"],
+                    "last_reply_at": replies[-1]["timestamp"],
+                    "participants": list(dict.fromkeys(r["user_name"] for r in replies)),
+                    "recent_replies": preview,
+                }},
+                upsert=True,
+            )
+            total += len(replies)
+            last_reply_at = max(filter(None, (last_reply_at, replies[-1]["timestamp"])))
+
+        update = {"$set": {"reply_count": total, "last_reply_at": last_reply_at}}
+        if last_reply_at:
+            update["$max"] = {"last_activity_at": last_reply_at}
+        services_collection.update_one({"_id": service_id}, update)
+        return total
+
+    @staticmethod
+    def delete_for_service(service_id):
+        ReplyModel.collection.delete_many({"service_id": service_id})
+        ReplyModel.threads.delete_many({"service_id": service_id})
+
+    @staticmethod
+    def archive_for_services(service_ids):
+        """
+        Move the replies and threads of the given posts into the archive collections. The copy
+        is an idempotent $merge on _id, so a run interrupted before the delete can be repeated.
+        Only the _ids that were merged are deleted, so a reply posted in between is never lost.
+        """
+        for collection, archive_name in ((ReplyModel.collection, replies_archive_name),
+                                         (ReplyModel.threads, threads_archive_name)):
+            cursor = collection.find({"service_id": {"$in": service_ids}}, {"_id": 1})
+            while True:
+                ids = [document["_id"] for document in islice(cursor, ARCHIVE_BATCH_SIZE)]
+                if not ids:
+                    break
+                collection.aggregate([
+                    {"$match": {"_id": {"$in": ids}}},
+                    {"$merge": {"into": archive_name, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+                ])
+                collection.delete_many({"_id": {"$in": ids}})
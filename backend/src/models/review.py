@@ -1,6 +1,79 @@
 from datetime import datetime
 from ..db_config import db
+from ..db_indexes import declare_indexes
 from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING, ReturnDocument
+
+"""
+Reviews live in their own collection instead of an array embedded in the user document.
+The reviewed user keeps running aggregates (rating_sum, rating_count, a per-star
+rating_histogram and the derived average `rating`), updated with a single atomic pipeline
+update per review, so rating someone is O(1) and concurrent ratings never lose a vote.
+"""
+
+reviews_collection = db["reviews"]
+users_collection = db["users"]
+
+RATING_STARS = (1, 2, 3, 4, 5)
+
+declare_indexes(
+    "reviews",
+    # Review listing for a profile, newest first, with _id as keyset tiebreaker
+    IndexModel([("target_user", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)],
+               name="target_user_1_date_-1__id_-1"),
+    IndexModel([("reviewer", ASCENDING), ("date", DESCENDING)], name="reviewer_1_date_-1"),
+)
+
+
+def star_bucket(rating):
+    # Histogram bucket for a (possibly fractional) 1-5 rating
+    return min(max(int(round(rating)), RATING_STARS[0]), RATING_STARS[-1])
+
+
+def _aggregate_delta_pipeline(rating, delta):
+    """
+    Update pipeline that adds delta * rating to the sum, delta to the count and the star bucket,
+    then recomputes the average from the updated fields in the same atomic write
+    """
+    bucket = f"rating_histogram.{star_bucket(rating)}"
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, delta * rating]},
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, delta]},
+            bucket: {"$add": [{"$ifNull": [f"${bucket}", 0]}, delta]},
+        }},
+        {"$set": {
+            "rating": {"$cond": [
+                {"$gt": ["$rating_count", 0]},
+                {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+                0
+            ]}
+        }},
+    ]
+
+
+def rating_summary(user):
+    """
+    The aggregate rating fields of a user document, with defaults for unrated users
+    """
+    histogram = user.get("rating_histogram") or {}
+    return {
+        "rating": user.get("rating", 0),
+        "total_reviews": user.get("rating_count", 0),
+        "histogram": {str(star): histogram.get(str(star), 0) for star in RATING_STARS}
+    }
+
+
+def serialize_review(review):
+    return {
+        "id": str(review["_id"]),
+        "reviewer": review["reviewer"],
+        "target_user": review["target_user"],
+        "rating": review["rating"],
+        "comment": review.get("comment"),
+        "date": review["date"].isoformat() if isinstance(review["date"], datetime) else review["date"]
+    }
+
 
 class Review:
     def __init__(self, reviewer, target_user, rating, comment=None):
@@ -21,78 +94,83 @@ class Review:
 
     @staticmethod
     def create_review(reviewer, target_user, rating, comment=None):
-        """Create a new review"""
-        review = Review(reviewer, target_user, rating, comment)
-        review_data = review.to_dict()
-        
-        # Add review to user's reviews array and update average rating
-        current_user = db.users.find_one({"user_name": target_user})
-        if not current_user:
-            return None
+        """
+        Store a review and fold it into the target user's aggregates
 
-        # Get current reviews
-        reviews = current_user.get("review", [])
-        reviews.append(review_data)
+        Returns:
+            tuple or None: (review document, updated rating summary), or None if the user does not exist
+        """
+        if not users_collection.find_one({"user_name": target_user}, {"_id": 1}):
+            return None
 
-        # Calculate new average rating
-        total_ratings = sum(r["rating"] for r in reviews)
-        new_rating = total_ratings / len(reviews)
+        review_data = Review(reviewer, target_user, rating, comment).to_dict()
+        review_data["_id"] = reviews_collection.insert_one(review_data).inserted_id
 
-        # Update user document
-        db.users.update_one(
+        user = users_collection.find_one_and_update(
             {"user_name": target_user},
-            {
-                "$set": {
-                    "review": reviews,
-                    "rating": round(new_rating, 2)
-                }
-            }
+            _aggregate_delta_pipeline(rating, 1),
+            projection={"rating": 1, "rating_count": 1, "rating_histogram": 1},
+            return_document=ReturnDocument.AFTER
         )
-
-        return review_data
+        return review_data, rating_summary(user or {})
 
     @staticmethod
-    def get_user_reviews(username):
-        """Get all reviews for a user"""
-        user = db.users.find_one({"user_name": username})
-        if not user:
-            return None
-        
-        reviews = user.get("review", [])
-        rating = user.get("rating", 0)
-        
-        return {
-            "reviews": reviews,
-            "rating": rating,
-            "total_reviews": len(reviews)
-        }
+    def get_reviews_page(target_user, limit, cursor=None):
+        """
+        One page of reviews for a user, newest first
 
-    @staticmethod
-    def delete_review(reviewer, target_user, review_date):
-        """Delete a review"""
-        user = db.users.find_one({"user_name": target_user})
-        if not user:
-            return False
+        Args:
+            cursor: The position returned for the previous page, or None for the first page
 
-        reviews = user.get("review", [])
-        reviews = [r for r in r if r["reviewer"] != reviewer or r["date"] != review_date]
+        Returns:
+            tuple: (review documents, position of the next page or None)
 
-        # Recalculate average rating
-        if reviews:
-            total_ratings = sum(r["rating"] for r in reviews)
-            new_rating = total_ratings / len(reviews)
-        else:
-            new_rating = 0
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {"target_user": target_user}
+        if cursor:
+            try:
+                date = datetime.fromisoformat(cursor["t"])
+                last_id = ObjectId(cursor["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"date": {"$lt": date}},
+                {"date": date, "_id": {"$lt": last_id}},
+            ]
 
-        # Update user document
-        db.users.update_one(
-            {"user_name": target_user},
-            {
-                "$set": {
-                    "review": reviews,
-                    "rating": round(new_rating, 2)
-                }
-            }
+        reviews = list(
+            reviews_collection.find(query)
+            .sort([("date", -1), ("_id", -1)])
+            .limit(limit + 1)
         )
+        next_position = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            last = reviews[-1]
+            next_position = {"t": last["date"].isoformat(), "id": str(last["_id"])}
+        return reviews, next_position
 
-        return True 
\ No newline at end of file
+    @staticmethod
+    def delete_review(reviewer, review_id):
+        """
+        Delete one of the reviewer's reviews and take it back out of the target user's aggregates
+
+        Returns:
+            bool: True if the review existed and was deleted
+        """
+        try:
+            review_id = ObjectId(review_id)
+        except Exception:
+            return False
+
+        review = reviews_collection.find_one_and_delete({"_id": review_id, "reviewer": reviewer})
+        if not review:
+            return False
+
+        users_collection.update_one(
+            {"user_name": review["target_user"]},
+            _aggregate_delta_pipeline(review["rating"], -1)
+        )
+        return True
@@ -0,0 +1,176 @@
+from datetime import date
+from src.models.service_model import (
+    services_collection, serialize_service, STATUS_TO_INT, REQUEST_SERVICE_TYPE, OFFER_SERVICE_TYPE,
+)
+from src.specifications.service_specifications import (
+    FieldEqualsSpec, PetTypeSpec, AvailabilityWindowSpec, DistanceSpec, compile_matchmaking_query,
+)
+
+"""
+Matchmaking between service requests and offers.
+For a post, the open posts of the other side in the same category whose pet type fits and whose
+availability overlaps are read from one index (the compound 2dsphere index when the post has a
+location, via $geoNear inside the radius, otherwise the availability interval index). The database
+ranks them on the same score as score_candidate() and keeps the best MATCH_POOL_SIZE, so the pool
+is the best matches rather than the first ones in index order, and only that pool comes back to
+be scored and serialized. The cost grows with the posts that can match, not with the board.
+"""
+
+DEFAULT_MATCH_RADIUS_KM = 25
+MATCH_POOL_SIZE = 200
+
+# Score weights, summing to 1
+OVERLAP_WEIGHT = 0.6
+DISTANCE_WEIGHT = 0.3
+PET_TYPE_WEIGHT = 0.1
+
+# Score given for distance when the post has no location to measure from
+UNKNOWN_DISTANCE_SCORE = 0.5
+
+MATCH_PROJECTION = {"replies": 0}
+
+
+def _parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def availability_overlap(availability, other):
+    """
+    Days two availability windows share, and that as a fraction of the first window
+
+    Returns:
+        tuple: (overlapping days, fraction of `availability` covered, between 0 and 1)
+    """
+    start, end = _parse_day((availability or {}).get("start")), _parse_day((availability or {}).get("end"))
+    other_start, other_end = _parse_day((other or {}).get("start")), _parse_day((other or {}).get("end"))
+    if not all((start, end, other_start, other_end)) or end < start:
+        return 0, 0.0
+    days = (min(end, other_end) - max(start, other_start)).days + 1
+    if days <= 0:
+        return 0, 0.0
+    return days, days / ((end - start).days + 1)
+
+
+def _to_date(value):
+    return {"$dateFromString": {"dateString": value, "format": "%Y-%m-%d", "onError": None}}
+
+
+def _day_count(start, end):
+    # Days from start to end inclusive, for "YYYY-MM-DD" expressions; null when either is malformed
+    return {"$add": [{"$divide": [{"$subtract": [_to_date(end), _to_date(start)]}, 24 * 3600 * 1000]}, 1]}
+
+
+def rank_stages(service, radius_km=None):
+    """
+    Aggregation stages that rank candidates on score_candidate()'s score and keep the best
+    MATCH_POOL_SIZE. Pass radius_km when the stages follow $geoNear, to rank on distance too.
+    Candidates already overlap `service` (the query guarantees it), so only the
+    overlap length is computed; availability strings compare chronologically, so $min / $max
+    pick the overlap bounds before they are parsed.
+    """
+    availability = service.get("availability") or {}
+    start, end = _parse_day(availability.get("start")), _parse_day(availability.get("end"))
+    terms = [{"$cond": [{"$eq": ["$pet_type", service.get("pet_type")]}, PET_TYPE_WEIGHT, 0]}]
+    if start and end and end >= start:
+        overlap_days = _day_count(
+            {"$max": ["$availability.start", start.isoformat()]},
+            {"$min": ["$availability.end", end.isoformat()]},
+        )
+        window_days = (end - start).days + 1
+        terms.append({"$multiply": [
+            OVERLAP_WEIGHT / window_days, {"$max": [{"$ifNull": [overlap_days, 0]}, 0]},
+        ]})
+    if radius_km:
+        # distance is in km here; proximity falls linearly to 0 at the radius
+        terms.append({"$multiply": [
+            DISTANCE_WEIGHT, {"$max": [0, {"$subtract": [1, {"$divide": ["$distance", radius_km]}]}]},
+        ]})
+    return [
+        {"$set": {"_rank": {"$add": terms}}},
+        {"$sort": {"_rank": -1, "_id": 1}},
+        {"$limit": MATCH_POOL_SIZE},
+        {"$project": {**MATCH_PROJECTION, "_rank": 0}},
+    ]
+
+
+def candidate_specs(service, radius_km=DEFAULT_MATCH_RADIUS_KM):
+    """
+    Filter specifications for the posts that can match `service`
+    """
+    other_side = OFFER_SERVICE_TYPE if service.get("service_type") == REQUEST_SERVICE_TYPE else REQUEST_SERVICE_TYPE
+    specs = [
+        FieldEqualsSpec("service_category", service.get("service_category")),
+        FieldEqualsSpec("service_type", other_side),
+        FieldEqualsSpec("status", STATUS_TO_INT["pending"]),
+        ~FieldEqualsSpec("user_name", service.get("user_name")),
+    ]
+
+    pet_type = service.get("pet_type")
+    if pet_type and pet_type != "either":
+        specs.append(PetTypeSpec(pet_type))
+
+    availability = service.get("availability") or {}
+    if availability.get("start") or availability.get("end"):
+        specs.append(AvailabilityWindowSpec(availability.get("start"), availability.get("end")))
+
+    location = service.get("location")
+    if radius_km and isinstance(location, dict) and location.get("type") == "Point":
+        lng, lat = location["coordinates"]
+        specs.append(DistanceSpec(lng, lat, radius_km * 1000))
+    return specs
+
+
+def score_candidate(service, candidate, radius_km):
+    overlap_days, overlap_ratio = availability_overlap(service.get("availability"), candidate.get("availability"))
+
+    distance_km = candidate.get("distance")
+    if distance_km is None or not radius_km:
+        proximity = UNKNOWN_DISTANCE_SCORE
+    else:
+        proximity = max(0.0, 1 - distance_km / radius_km)
+
+    exact_pet_type = candidate.get("pet_type") == service.get("pet_type")
+    score = OVERLAP_WEIGHT * overlap_ratio + DISTANCE_WEIGHT * proximity + PET_TYPE_WEIGHT * exact_pet_type
+    return {
+        "score": round(score, 4),
+        "overlap_days": overlap_days,
+        "distance_km": round(distance_km, 2) if distance_km is not None else None,
+    }
+
+
+def find_candidates(service, limit, radius_km=DEFAULT_MATCH_RADIUS_KM):
+    """
+    Rank the open posts of the other side that could match `service`, best first
+
+    Args:
+        service: The service document to match (a request or an offer)
+        limit: Number of candidates to return
+        radius_km: Search radius around the post's location; ignored when it has none
+
+    Returns:
+        list: Serialized services, each with a "match" entry holding score, overlap_days and distance_km
+    """
+    compiled = compile_matchmaking_query(candidate_specs(service, radius_km))
+    if compiled.geo:
+        # $geoNear keeps the posts inside the radius, with the distance in meters
+        pipeline = [
+            compiled.geo.to_geo_near_stage(compiled.query),
+            {"$set": {"distance": {"$divide": ["$distance", 1000]}}},
+        ] + rank_stages(service, radius_km)
+        pool = list(services_collection.aggregate(pipeline))
+    else:
+        pipeline = [{"$match": compiled.query}] + rank_stages(service)
+        pool = list(services_collection.aggregate(pipeline))
+
+    for candidate in pool:
+        candidate["match"] = score_candidate(service, candidate, radius_km if compiled.geo else None)
+    pool.sort(key=lambda candidate: candidate["match"]["score"], reverse=True)
+
+    results = []
+    for candidate in pool[:limit]:
+        candidate.pop("distance", None)
+        results.append(serialize_service(candidate))
+    return results
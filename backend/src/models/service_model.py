@@ -1,8 +1,16 @@
 from abc import ABC, abstractmethod
 from bson.objectid import ObjectId
 from src.db_config import db
-from datetime import datetime
-
+from src.db_indexes import declare_indexes
+from src.utils.geo import to_geojson_point
+from src.specifications.service_specifications import (
+    SERVICES_CATEGORY_INDEX, SERVICES_TYPE_INDEX, SERVICES_STATUS_INDEX, SERVICES_USER_INDEX,
+    SERVICES_POST_TIME_INDEX, SERVICES_LOCATION_INDEX, SERVICES_MATCH_INDEX, SERVICES_START_INDEX,
+    SERVICES_END_INDEX, SERVICES_ACTIVITY_INDEX, BOARD_SORT_FIELDS, AfterSortKeySpec,
+    compile_service_board_query,
+)
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE
+from datetime import datetime, timezone
 
 
 """
@@ -17,7 +25,8 @@ STATUS_TO_INT = {
     "pending": 0,
     "matched": 1,
     "completed": 2,
-    "canceled": 3
+    "canceled": 3,
+    "expired": 4
 }
 
 INT_TO_STATUS = {v: k for k, v in STATUS_TO_INT.items()}
@@ -32,6 +41,201 @@ CATEGORY_TO_INT = {
     "pet_house_sitting": 3,
 }
 
+INT_TO_CATEGORY = {v: k for k, v in CATEGORY_TO_INT.items()}
+
+SERVICE_TYPE_TO_INT = {
+    "request": REQUEST_SERVICE_TYPE,
+    "offer": OFFER_SERVICE_TYPE,
+}
+
+
+def _board_index(name, *fields):
+    # Equality fields first, then the board order (post_time, _id) newest first
+    keys = [(field, ASCENDING) for field in fields] + [("post_time", DESCENDING), ("_id", DESCENDING)]
+    return IndexModel(keys, name=name)
+
+
+declare_indexes(
+    "service",
+    _board_index(SERVICES_POST_TIME_INDEX),
+    _board_index(SERVICES_CATEGORY_INDEX, "service_category"),
+    _board_index(SERVICES_TYPE_INDEX, "service_type"),
+    _board_index(SERVICES_STATUS_INDEX, "status"),
+    _board_index(SERVICES_USER_INDEX, "user_name"),
+    IndexModel([("availability.start", DESCENDING), ("_id", DESCENDING)], name=SERVICES_START_INDEX),
+    IndexModel([("availability.end", DESCENDING), ("_id", DESCENDING)], name=SERVICES_END_INDEX),
+    IndexModel([("last_activity_at", DESCENDING), ("_id", DESCENDING)], name=SERVICES_ACTIVITY_INDEX),
+    IndexModel([("location", GEOSPHERE), ("service_category", ASCENDING), ("service_type", ASCENDING),
+                ("status", ASCENDING), ("availability.start", ASCENDING)], name=SERVICES_LOCATION_INDEX),
+    IndexModel([("service_category", ASCENDING), ("service_type", ASCENDING), ("status", ASCENDING),
+                ("availability.start", ASCENDING), ("availability.end", ASCENDING)], name=SERVICES_MATCH_INDEX),
+    # Summary refresh when a matched user edits their profile
+    IndexModel([("matched_user._id", ASCENDING)], name="matched_user._id_1", sparse=True),
+    # $geoNear refuses to pick between two 2dsphere indexes on location
+    replaces={"location_2dsphere": SERVICES_LOCATION_INDEX},
+)
+
+# matched_user is a reference plus the few fields the board shows, never the whole user document
+MATCHED_USER_PROJECTION = {"user_name": 1, "name": 1, "profile_picture": 1}
+
+
+def matched_user_summary(user):
+    if not user:
+        return None
+    return {
+        "_id": user["_id"],
+        "user_name": user.get("user_name"),
+        "name": user.get("name", ""),
+        "profile_picture": user.get("profile_picture", ""),
+    }
+
+
+def find_matched_user(user_name):
+    return matched_user_summary(users_collection.find_one({"user_name": user_name}, MATCHED_USER_PROJECTION))
+
+
+def refresh_matched_user_summaries(user_name):
+    """
+    Copy a user's current name and avatar into every service they are matched on
+
+    Returns:
+        int: Number of service posts updated
+    """
+    user = users_collection.find_one({"user_name": user_name}, MATCHED_USER_PROJECTION)
+    if not user:
+        return 0
+    summary = matched_user_summary(user)
+    result = services_collection.update_many(
+        {"matched_user._id": user["_id"]},
+        {"$set": {
+            "matched_user.user_name": summary["user_name"],
+            "matched_user.name": summary["name"],
+            "matched_user.profile_picture": summary["profile_picture"],
+        }}
+    )
+    return result.modified_count
+
+
+def parse_post_time(value=None):
+    """
+    Post times are stored as UTC datetimes so the board can sort and page on them in the database
+
+    Accepts a datetime or an ISO 8601 string as sent by the client ("2024-05-01T10:00:00.000Z");
+    defaults to now.
+
+    Raises:
+        ValueError: If the string is not a valid ISO timestamp
+    """
+    if value is None or value == "":
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def split_location(location):
+    """
+    Split a posted location ({"place_name": ..., "coordinates": {"lat": ..., "lng": ...}}) into
+    the stored GeoJSON Point and place name
+
+    Returns:
+        tuple: (GeoJSON Point or None, place name or None)
+    """
+    if not isinstance(location, dict):
+        return None, None
+    place_name = location.get("place_name")
+    try:
+        point = to_geojson_point(location.get("coordinates"))
+    except ValueError:
+        point = None
+    return point, place_name
+
+
+def serialize_service(service):
+    service["_id"] = str(service["_id"])
+    if "service_category" in service:
+        service["service_category"] = INT_TO_CATEGORY.get(service["service_category"], service["service_category"])
+    if service.get("pet_image"):
+        service["pet_image"] = str(service["pet_image"])
+    if "user_id" in service:
+        service["user_id"] = str(service["user_id"])
+    for field in ("post_time", "last_reply_at", "last_activity_at"):
+        if isinstance(service.get(field), datetime):
+            service[field] = service[field].isoformat() + "Z"
+    if service.get("matched_user"):
+        matched = service["matched_user"]
+        service["matched_user"] = {
+            "user_id": str(matched["_id"]),
+            "user_name": matched.get("user_name"),
+            "name": matched.get("name", ""),
+            "profile_picture": matched.get("profile_picture", "")
+        }
+    return service
+
+
+# Sort keys stored as datetimes; the others are "YYYY-MM-DD" strings
+DATETIME_SORT_KEYS = {"post_time", "last_activity"}
+
+
+def _sort_value(service, sort):
+    value = service
+    for part in BOARD_SORT_FIELDS[sort].split("."):
+        value = (value or {}).get(part)
+    return value
+
+
+def get_services_page(specs, limit, cursor=None, descending=True, sort="post_time"):
+    """
+    One page of the service board, ordered by `sort` then _id, largest first (smallest first
+    with descending=False)
+
+    Args:
+        specs: Filter specifications, see service_specifications
+        cursor: The position returned for the previous page, or None for the first page
+        sort: A key of BOARD_SORT_FIELDS
+
+    Returns:
+        tuple: (serialized services, position of the next page or None)
+
+    Raises:
+        ValueError: If the sort key is unknown or the cursor is malformed or from another sort
+    """
+    if sort not in BOARD_SORT_FIELDS:
+        raise ValueError(f"Unknown sort: {sort}")
+    field = BOARD_SORT_FIELDS[sort]
+
+    specs = list(specs)
+    if cursor:
+        try:
+            if cursor["s"] != sort:
+                raise ValueError
+            value = cursor["v"]
+            if value is not None and sort in DATETIME_SORT_KEYS:
+                value = datetime.fromisoformat(value)
+            specs.append(AfterSortKeySpec(field, value, ObjectId(cursor["id"]), descending))
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    direction = -1 if descending else 1
+    services = list(
+        compile_service_board_query(specs, sort)
+        .find(services_collection, {"replies": 0})
+        .sort([(field, direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    next_position = None
+    if len(services) > limit:
+        services = services[:limit]
+        last = services[-1]
+        value = _sort_value(last, sort)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        next_position = {"s": sort, "v": value, "id": str(last["_id"])}
+    return [serialize_service(s) for s in services], next_position
+
 '''
 === Builder interface
 Declares construction steps with separate setters. 
@@ -99,10 +303,13 @@ class Service:
             "pet_image": None,
             "breed": None,
             "location": None,
+            "place_name": None,
             "availability": None,
             "matched_user": None,
             "status": STATUS_TO_INT["pending"],
-            "replies": None,
+            "reply_count": 0,
+            "last_reply_at": None,
+            "last_activity_at": None,
             "notes": None,
             "post_time": None
         }
@@ -152,8 +359,8 @@ class ServiceRequestBuilder(ServiceBuilder):
         self.request.data["service_category"] = CATEGORY_TO_INT[service_category]
         return self
 
-    def set_location(self, location = ""):
-        self.request.data["location"] = location
+    def set_location(self, location = None):
+        self.request.data["location"], self.request.data["place_name"] = split_location(location)
         return self
 
     def set_availability(self, availability):
@@ -164,8 +371,7 @@ class ServiceRequestBuilder(ServiceBuilder):
         if user_name == "":
             self.request.data["matched_user"] = None
             return self
-        matched_user = users_collection.find_one({"user_name": user_name})
-        self.request.data["matched_user"] = matched_user
+        self.request.data["matched_user"] = find_matched_user(user_name)
         return self
     
     def set_replies(self, replies = {}):
@@ -175,8 +381,9 @@ class ServiceRequestBuilder(ServiceBuilder):
         self.request.data["notes"] = notes
         return self
     
-    def set_post_time(self, time = datetime.now().isoformat() + 'Z'):
-        self.request.data["post_time"] = time
+    def set_post_time(self, time = None):
+        self.request.data["post_time"] = parse_post_time(time)
+        self.request.data["last_activity_at"] = self.request.data["post_time"]
         return self
 
     def get_product(self):
@@ -223,7 +430,7 @@ class ServiceOfferBuilder(ServiceBuilder):
         return self
     
     def set_location(self, location):
-        self.offer.data["location"] = location
+        self.offer.data["location"], self.offer.data["place_name"] = split_location(location)
         return self
 
     def set_availability(self, availability):
@@ -234,8 +441,7 @@ class ServiceOfferBuilder(ServiceBuilder):
         if user_name == "":
             self.offer.data["matched_user"] = None
             return self
-        matched_user = users_collection.find_one({"user_name": user_name})
-        self.offer.data["matched_user"] = matched_user
+        self.offer.data["matched_user"] = find_matched_user(user_name)
         return self
     
     def set_replies(self, replies = {}):
@@ -245,8 +451,9 @@ class ServiceOfferBuilder(ServiceBuilder):
         self.offer.data["notes"] = notes
         return self
     
-    def set_post_time(self, time = datetime.now().isoformat() + 'Z'):
-        self.offer.data["post_time"] = time
+    def set_post_time(self, time = None):
+        self.offer.data["post_time"] = parse_post_time(time)
+        self.offer.data["last_activity_at"] = self.offer.data["post_time"]
         return self
 
     def get_product(self):
@@ -1,10 +1,17 @@
-from src.db_config import db
-import gridfs
+from src.db_config import db, fs
+from src.db_indexes import declare_indexes
+from pymongo import IndexModel, ASCENDING
 from bson.objectid import ObjectId
 from werkzeug.datastructures import FileStorage
+from src.media.image_variants import save_image_upload
 
 users_collection = db["users"]
-fs = gridfs.GridFS(db)
+
+declare_indexes(
+    "users",
+    # Every authenticated request resolves its user by user_name
+    IndexModel([("user_name", ASCENDING)], name="user_name_unique", unique=True),
+)
 
 # Fields to evaluate for profile completion
 PROFILE_COMPLETION_FIELDS = [
@@ -38,8 +45,12 @@ class User:
         self.profile_picture = builder.profile_picture
         self.has_completed_profile = builder.has_completed_profile
         self.rating = builder.rating
-        self.review = builder.review
+        self.rating_sum = builder.rating_sum
+        self.rating_count = builder.rating_count
+        self.rating_histogram = builder.rating_histogram
         self.pets = builder.pets
+        self.followers_count = builder.followers_count
+        self.following_count = builder.following_count
 
     def to_dict(self):
         data = {
@@ -56,8 +67,12 @@ class User:
             "profile_picture": self.profile_picture,
             "has_completed_profile": self.has_completed_profile,
             "rating": self.rating,
-            "review": self.review,
-            "pets": self.pets
+            "rating_sum": self.rating_sum,
+            "rating_count": self.rating_count,
+            "rating_histogram": self.rating_histogram,
+            "pets": self.pets,
+            "followers_count": self.followers_count,
+            "following_count": self.following_count
         }
         data["profile_completion"] = self.calculate_profile_completion(data)
         return data
@@ -104,10 +119,6 @@ class User:
             update_fields["is_public"] = update_data["is_public"]
         if "preference" in update_data and isinstance(update_data["preference"], dict):
             update_fields["preference"] = update_data["preference"]
-        if "rating" in update_data:
-            update_fields["rating"] = update_data["rating"]
-        if "review" in update_data and isinstance(update_data["review"], list):
-            update_fields["review"] = update_data["review"]
 
         if "profile_picture" in update_data and isinstance(update_data["profile_picture"], bytes):
             file_id = fs.put(
@@ -145,7 +156,7 @@ class User:
     @staticmethod
     def save_profile_picture(user_name, image_file: FileStorage):
         if image_file:
-            file_id = fs.put(image_file.stream, filename=image_file.filename, content_type=image_file.content_type)
+            file_id = save_image_upload(image_file)
             result = users_collection.update_one(
                 {"user_name": user_name},
                 {"$set": {"profile_picture": str(file_id)}}
@@ -188,8 +199,13 @@ class UserBuilder:
         self.profile_picture = ""
         self.has_completed_profile = False
         self.rating = 0
-        self.review = []
+        # Review aggregates, maintained by Review.create_review / delete_review
+        self.rating_sum = 0
+        self.rating_count = 0
+        self.rating_histogram = {}
         self.pets = []
+        self.followers_count = 0
+        self.following_count = 0
 
     def set_name(self, name):
         self.name = name
@@ -238,16 +254,44 @@ class UserBuilder:
         self.rating = rating
         return self
 
-    def set_review(self, review):
-        self.review = review if isinstance(review, list) else []
-        return self
-
     def build(self):
         return User(self)
 
+# Public fields returned wherever users are listed (followers, notifications, ...)
+USER_SUMMARY_PROJECTION = {
+    "name": 1,
+    "user_name": 1,
+    "profile_picture": 1,
+    "identity": 1,
+    "location": 1,
+}
+
 def find_user_by_username(user_name):
     return users_collection.find_one({"user_name": user_name})
 
+def find_users_by_usernames(user_names, projection=USER_SUMMARY_PROJECTION):
+    """
+    Load many users with a single $in query instead of one find_one per user
+
+    Returns:
+        dict: user_name -> user document (only the projected fields); unknown names are absent
+    """
+    names = list(dict.fromkeys(name for name in user_names if name))
+    if not names:
+        return {}
+    cursor = users_collection.find({"user_name": {"$in": names}}, {**projection, "user_name": 1})
+    return {user["user_name"]: user for user in cursor}
+
+def user_summary(user):
+    return {
+        "_id": str(user["_id"]),
+        "name": user.get("name", ""),
+        "user_name": user.get("user_name", ""),
+        "profile_picture": user.get("profile_picture"),
+        "identity": user.get("identity", []),
+        "location": user.get("location", {})
+    }
+
 def insert_user(user_obj):
     return users_collection.insert_one(user_obj.to_dict())
 
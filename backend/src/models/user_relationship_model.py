@@ -1,31 +1,145 @@
 from src.db_config import db
+from src.db_indexes import declare_indexes
+from pymongo import IndexModel, ASCENDING, DESCENDING, UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from bson.objectid import ObjectId
 from datetime import datetime
 
-users_relationship_collection = db["users_relationship"]
+users_relationship_collection = db["user_relationships"]
+users_collection = db["users"]
+
+COUNTS_PROJECTION = {"_id": 0, "followers_count": 1, "following_count": 1}
+
+declare_indexes(
+    "user_relationships",
+    IndexModel([("follower", ASCENDING), ("following", ASCENDING)], name="follower_following_unique", unique=True),
+    IndexModel([("following", ASCENDING), ("created_at", DESCENDING)], name="following_1_created_at_-1"),
+    IndexModel([("follower", ASCENDING), ("created_at", DESCENDING)], name="follower_1_created_at_-1"),
+)
 
 class UserRelationship:
     @staticmethod
     def follow_user(follower_username, following_username):
-        # Check if already following
-        if UserRelationship.is_following(follower_username, following_username):
-            return False
+        """
+        Create the relationship and bump both users' counters
 
-        relationship = {
-            "follower": follower_username,
-            "following": following_username,
-            "created_at": datetime.utcnow()
-        }
-        
-        result = users_relationship_collection.insert_one(relationship)
-        return bool(result.inserted_id)
+        Returns:
+            dict or None: The followed user's updated counters, or None if already following
+        """
+        # Only the request that creates the relationship increments the counters: an existing pair
+        # matches the upsert filter and inserts nothing. The unique follower/following index (or a
+        # server-side upsert retry on it) settles two concurrent first follows.
+        try:
+            result = users_relationship_collection.update_one(
+                {"follower": follower_username, "following": following_username},
+                {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return None
+        if result.upserted_id is None:
+            return None
+
+        return UserRelationship._apply_counter_delta(follower_username, following_username, 1)
 
     @staticmethod
     def unfollow_user(follower_username, following_username):
+        """
+        Delete the relationship and decrement both users' counters
+
+        Returns:
+            dict or None: The unfollowed user's updated counters, or None if not following
+        """
         result = users_relationship_collection.delete_one({
             "follower": follower_username,
             "following": following_username
         })
-        return result.deleted_count > 0
+        if result.deleted_count == 0:
+            return None
+
+        return UserRelationship._apply_counter_delta(follower_username, following_username, -1)
+
+    @staticmethod
+    def _apply_counter_delta(follower_username, following_username, delta):
+        users_collection.update_one(
+            {"user_name": follower_username},
+            {"$inc": {"following_count": delta}}
+        )
+        counts = users_collection.find_one_and_update(
+            {"user_name": following_username},
+            {"$inc": {"followers_count": delta}},
+            projection=COUNTS_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        return {
+            "followers_count": (counts or {}).get("followers_count", 0),
+            "following_count": (counts or {}).get("following_count", 0)
+        }
+
+    @staticmethod
+    def remove_duplicate_pairs():
+        """
+        Delete repeated follower/following pairs, keeping the oldest of each, so the unique
+        index can be built
+
+        Returns:
+            int: The number of relationship documents deleted
+        """
+        duplicates = users_relationship_collection.aggregate([
+            {"$sort": {"created_at": 1, "_id": 1}},
+            {"$group": {"_id": {"follower": "$follower", "following": "$following"},
+                        "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ], allowDiskUse=True)
+
+        deleted = 0
+        batch = []
+        for group in duplicates:
+            batch.extend(group["ids"][1:])
+            if len(batch) >= 1000:
+                deleted += users_relationship_collection.delete_many({"_id": {"$in": batch}}).deleted_count
+                batch = []
+        if batch:
+            deleted += users_relationship_collection.delete_many({"_id": {"$in": batch}}).deleted_count
+        return deleted
+
+    @staticmethod
+    def repair_counters():
+        """
+        Recompute followers_count / following_count for every user from user_relationships
+
+        Returns:
+            int: The number of user documents whose counters changed
+        """
+        followers = {
+            row["_id"]: row["count"]
+            for row in users_relationship_collection.aggregate([
+                {"$group": {"_id": "$following", "count": {"$sum": 1}}}
+            ])
+        }
+        following = {
+            row["_id"]: row["count"]
+            for row in users_relationship_collection.aggregate([
+                {"$group": {"_id": "$follower", "count": {"$sum": 1}}}
+            ])
+        }
+
+        modified = 0
+        batch = []
+        for user in users_collection.find({}, {"user_name": 1, "followers_count": 1, "following_count": 1}):
+            name = user.get("user_name")
+            expected = {
+                "followers_count": followers.get(name, 0),
+                "following_count": following.get(name, 0)
+            }
+            if any(user.get(field) != value for field, value in expected.items()):
+                batch.append(UpdateOne({"_id": user["_id"]}, {"$set": expected}))
+            if len(batch) >= 1000:
+                modified += users_collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            modified += users_collection.bulk_write(batch, ordered=False).modified_count
+        return modified
 
     @staticmethod
     def is_following(follower_username, following_username):
@@ -45,13 +159,69 @@ class UserRelationship:
         following = users_relationship_collection.find({"follower": username})
         return [rel["following"] for rel in following]
 
+    @staticmethod
+    def get_relationships_page(field, username, limit, cursor=None):
+        """
+        One page of relationship documents where `field` ("follower" or "following") is username,
+        newest first
+
+        Args:
+            cursor: The position returned for the previous page, or None for the first page
+
+        Returns:
+            tuple: (relationship documents, position of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {field: username}
+        if cursor:
+            try:
+                created_at = datetime.fromisoformat(cursor["t"])
+                last_id = ObjectId(cursor["id"])
+            except Exception:
+                raise ValueError("Invalid cursor")
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}},
+            ]
+
+        relationships = list(
+            users_relationship_collection.find(query)
+            .sort([("created_at", -1), ("_id", -1)])
+            .limit(limit + 1)
+        )
+        next_position = None
+        if len(relationships) > limit:
+            relationships = relationships[:limit]
+            last = relationships[-1]
+            next_position = {"t": last["created_at"].isoformat(), "id": str(last["_id"])}
+        return relationships, next_position
+
+    @staticmethod
+    def get_followers_page(username, limit, cursor=None):
+        return UserRelationship.get_relationships_page("following", username, limit, cursor)
+
+    @staticmethod
+    def get_following_page(username, limit, cursor=None):
+        return UserRelationship.get_relationships_page("follower", username, limit, cursor)
+
+    @staticmethod
+    def get_counts(username):
+        # Denormalized on the user document, kept in sync by follow_user / unfollow_user
+        counts = users_collection.find_one({"user_name": username}, COUNTS_PROJECTION) or {}
+        return {
+            "followers_count": counts.get("followers_count", 0),
+            "following_count": counts.get("following_count", 0)
+        }
+
     @staticmethod
     def get_followers_count(username):
-        return users_relationship_collection.count_documents({"following": username})
+        return UserRelationship.get_counts(username)["followers_count"]
 
     @staticmethod
     def get_following_count(username):
-        return users_relationship_collection.count_documents({"follower": username})
+        return UserRelationship.get_counts(username)["following_count"]
 
     @staticmethod
     def get_mutual_followers(username1, username2):
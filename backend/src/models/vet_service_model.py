@@ -4,6 +4,16 @@ import json
 from bson import json_util
 
 from ..db_config import db
+from ..db_indexes import declare_indexes
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+# Booking lists filter by owner, vet or status and are always sorted newest first
+declare_indexes(
+    "vet_services",
+    IndexModel([("ownerId", ASCENDING), ("createdAt", DESCENDING)], name="ownerId_1_createdAt_-1"),
+    IndexModel([("vetId", ASCENDING), ("createdAt", DESCENDING)], name="vetId_1_createdAt_-1"),
+    IndexModel([("status", ASCENDING), ("createdAt", DESCENDING)], name="status_1_createdAt_-1"),
+)
 
 class VetService:
     """
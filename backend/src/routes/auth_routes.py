@@ -3,6 +3,7 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from flask_jwt_extended import set_access_cookies
 from flask_jwt_extended import unset_jwt_cookies
 from src.models.user_model import User, find_user_by_username, insert_user, UserBuilder
+from src.utils.user_loader import get_user_loader
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api")
 
@@ -57,7 +58,8 @@ def logout():
 @jwt_required()
 def get_current_user_info():
     user_name = get_jwt_identity()
-    user = find_user_by_username(user_name)
+    # The loader never returns the password hash
+    user = get_user_loader().load_by_name(user_name)
 
     if not user:
         return jsonify({"msg": "User not found"}), 404
@@ -1,34 +1,101 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from src.models.chat_model import ChatModel, ChatMessage
+from src.models.chat_model import ChatModel, ChatMessage, serialize_message, message_position
+from src.models.conversation_model import ConversationModel, serialize_conversation
 from src.models.pets_model import find_pet_by_id  
 from src.models.user_model import find_user_by_username 
+from src.socket_config import socketio, item_room
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
 
 chat_bp = Blueprint("chat", __name__)
 
-@chat_bp.route("/<item_id>", methods=["GET"])
-def get_messages(item_id):
-    messages = ChatModel.get_messages_by_item(item_id)
-    for m in messages:
-        if isinstance(m["timestamp"], datetime):
-            m["timestamp"] = m["timestamp"].isoformat()
-    return jsonify({"messages": messages})
+# Longest chat message accepted, in characters
+MAX_MESSAGE_LENGTH = 2000
 
-@chat_bp.route("/send", methods=["POST"])
-def send_message():
-    data = request.json
-    item_id = data["itemId"]
-    m      = data["message"]
+def publish_message(item_id, sender_id, sender_name, content):
+    """
+    Persist a chat message and push it to everyone in the item's room.
+    Both the REST endpoint and the chat_send socket event go through here.
+
+    Returns:
+        dict: The stored message, serialized
+    """
     msg = ChatMessage(
         item_id=item_id,
-        sender_id=m["senderId"],
-        sender_name=m["senderName"],
-        content=m["content"],
+        sender_id=sender_id,
+        sender_name=sender_name,
+        content=content,
     )
     ChatModel.add_message(msg)
-    return jsonify({"success": True, "id": str(msg._id)})
+    payload = serialize_message(msg.to_dict())
+    payload["cursor"] = encode_cursor(message_position(payload))
+    socketio.emit("chat_message", payload, room=item_room(item_id))
+    return payload
+
+@chat_bp.route("/<item_id>", methods=["GET"])
+def get_messages(item_id):
+    # Latest page by default; ?before=<cursor> pages back through older messages and
+    # ?after=<cursor> (alias ?since=) fetches what was sent later, e.g. the gap after a reconnect
+    raw_before = request.args.get("before")
+    raw_after = request.args.get("after") or request.args.get("since")
+    if raw_before and raw_after:
+        return jsonify({"error": "Use either before or after"}), 400
+    try:
+        before = decode_cursor(raw_before)
+        after = decode_cursor(raw_after)
+        limit = parse_limit(request.args.get("limit"))
+        messages, has_more = ChatModel.get_messages_page(item_id, limit, before=before, after=after)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    # Cursors for both ends of the page, kept as given when the page is empty
+    before_cursor = encode_cursor(message_position(messages[0])) if messages else raw_before
+    after_cursor = encode_cursor(message_position(messages[-1])) if messages else raw_after
+    return jsonify({
+        "messages": messages,
+        "before": before_cursor,
+        "after": after_cursor,
+        "has_more": has_more,
+    })
+
+@chat_bp.route("/send", methods=["POST"])
+@jwt_required()
+def send_message():
+    # Like chat_send, the sender is the authenticated user, not whatever the body claims
+    user = find_user_by_username(get_jwt_identity())
+    if not user:
+        return jsonify({"success": False, "error": "Unknown user"}), 404
+    data = request.json or {}
+    item_id = data.get("itemId")
+    content = ((data.get("message") or {}).get("content") or "").strip()
+    if not item_id or not content or len(content) > MAX_MESSAGE_LENGTH:
+        return jsonify({"success": False, "error": "Invalid message"}), 400
+    payload = publish_message(item_id, str(user["_id"]), user["user_name"], content)
+    return jsonify({"success": True, "id": payload["_id"], "message": payload})
 
 @chat_bp.route("/conversations/<user_id>", methods=["GET"])
 def conversations(user_id):
-    convs = ChatModel.get_conversations_by_user(user_id)
-    return jsonify({"conversations": convs})
+    # Inbox: threads the user wrote in or sells in, most recently active first
+    try:
+        cursor = decode_cursor(request.args.get("cursor"))
+        limit = parse_limit(request.args.get("limit"))
+        convs, next_position = ChatModel.get_conversations_by_user(user_id, limit, cursor)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({
+        "conversations": [serialize_conversation(c) for c in convs],
+        "next_cursor": encode_cursor(next_position),
+        "unread_total": ConversationModel.unread_total(user_id),
+    })
+
+@chat_bp.route("/conversations/<user_id>/<item_id>/read", methods=["POST"])
+@jwt_required()
+def mark_conversation_read(user_id, item_id):
+    # Only the conversation's own user can clear its unread count
+    user = find_user_by_username(get_jwt_identity())
+    if not user or str(user["_id"]) != user_id:
+        return jsonify({"success": False, "error": "Forbidden"}), 403
+    if not ConversationModel.mark_read(user_id, item_id):
+        return jsonify({"success": False, "error": "Conversation not found"}), 404
+    return jsonify({"success": True})
@@ -1,27 +1,39 @@
 # event_routes.py
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request
 from bson import ObjectId
 import json
-import mimetypes
 import base64
 # import event_model
-from src.models.event_model import Event
-import io
+from src.models.event_model import Event, FEED_MODES
 from src.db_config import db, fs
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user_model import find_user_by_username
-from src.socket_config import socketio
+from src.utils.user_loader import get_user_loader
+from src.socket_config import socketio, event_room, EVENTS_FEED_ROOM
+from src.media.gridfs_stream import stream_gridfs_file
+from src.media.image_variants import save_image_upload
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from src.utils.geo import to_geojson_point
+from datetime import datetime
 
 event_bp = Blueprint("event", __name__, url_prefix="/api/event")
 event_collection = db["event"]
 
+# Search radius for /nearby when the client does not send one, in km
+DEFAULT_NEARBY_RADIUS_KM = 10
+
+def parse_event_date(raw_date):
+    # Event dates are "YYYY-MM-DD" strings, as posted by the event form
+    if not raw_date:
+        return None
+    return datetime.strptime(raw_date, "%Y-%m-%d").date().isoformat()
+
 @event_bp.route("/", methods=["POST"], strict_slashes=False)
 @jwt_required()
 def create_event():
 
     #get user data from request
     user_name = get_jwt_identity()
-    user = find_user_by_username(user_name)
+    user = get_user_loader().load_by_name(user_name)
     print("User data:", user)
     if not user:
         return jsonify({"msg": "Cannot identify the uploader."}), 404
@@ -34,24 +46,35 @@ def create_event():
     image = request.files.get("image")
     organizer = user["_id"]
 
-    # Parse the location JSON string
+    # Parse the location JSON string and normalize it to a GeoJSON Point for the 2dsphere index
     try:
         location = json.loads(location)
-    except json.JSONDecodeError:
+    except (TypeError, json.JSONDecodeError):
         return jsonify({"msg": "Invalid JSON format for location"}), 400
+    place_name = location.get("place_name") if isinstance(location, dict) else None
+    try:
+        location = to_geojson_point(location)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     
     # Check if all required fields are present
     if not name or not description or not date or not time or not location or not image:
         return jsonify({"msg": "Missing fields"}), 400
 
+    # The feed range-queries and sorts event_date as a string, so it must be YYYY-MM-DD
+    try:
+        date = parse_event_date(date)
+    except ValueError:
+        return jsonify({"msg": "Date must be formatted as YYYY-MM-DD"}), 400
+
     print("Received data:", name, date, time, location, description, image, user_name)
 
     try:
         # Save the image to GridFS
-        image_id = fs.put(image.stream, filename=image.filename)
+        image_id = save_image_upload(image)
 
         # Create a new event object
-        new_event = Event(event_name=name, event_date=date, event_time=time, location=location, description=description, image=image_id, organizer=organizer)
+        new_event = Event(event_name=name, event_date=date, event_time=time, location=location, description=description, image=image_id, organizer=organizer, place_name=place_name)
        
         # Save the event to the database
         result = new_event.insert_event()
@@ -61,7 +84,7 @@ def create_event():
             return jsonify({"msg": "Error saving event"}), 500
         
         # send socketio event
-        socketio.emit("new_event", new_event.jsonify())
+        socketio.emit("new_event", new_event.jsonify(), room=EVENTS_FEED_ROOM)
         
         return jsonify({"msg": "Event created successfully", "event_id": str(result.inserted_id)}), 201
     
@@ -69,39 +92,77 @@ def create_event():
         print("Error creating event:", e)
         return jsonify({"msg": "Error creating event"}), 500
 
-# fetch all events
+# fetch one page of the event feed
 @event_bp.route("", methods=["GET"])
 @jwt_required()
 def get_all_events():
     try:
-        events = list(event_collection.find())
-        for event in events:
-            event["_id"] = str(event["_id"])
-            event["image"] = str(event["image"])
-            if "organizer" in event:
-                event["organizer"] = str(event["organizer"])
-            if "attendees" in event:
-                event["attendees"] = [str(attendee) for attendee in event["attendees"]]
-        return jsonify(events), 200
+        user = get_user_loader().load_by_name(get_jwt_identity())
+        if not user:
+            return jsonify({"msg": "Cannot identify the user."}), 404
+
+        mode = request.args.get("mode", "upcoming")
+        if mode not in FEED_MODES:
+            return jsonify({"msg": f"mode must be one of {', '.join(FEED_MODES)}"}), 400
+        try:
+            date_from = parse_event_date(request.args.get("from"))
+            date_to = parse_event_date(request.args.get("to"))
+        except ValueError:
+            return jsonify({"msg": "Dates must be formatted as YYYY-MM-DD"}), 400
+        try:
+            cursor = decode_cursor(request.args.get("cursor"))
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        limit = parse_limit(request.args.get("limit"))
+
+        events, next_position = Event.get_feed_page(mode, user["_id"], limit, cursor, date_from, date_to)
+        return jsonify({
+            "events": events,
+            "next_cursor": encode_cursor(next_position),
+            "mode": mode,
+            "limit": limit
+        }), 200
+    except ValueError:
+        return jsonify({"msg": "Invalid cursor"}), 400
     except Exception as e:
         print("Error fetching events:", e)
         return jsonify({"msg": "Error fetching events"}), 500
 
+# upcoming events near a point, nearest first
+@event_bp.route("/nearby", methods=["GET"])
+@jwt_required()
+def get_nearby_events():
+    try:
+        user = get_user_loader().load_by_name(get_jwt_identity())
+        if not user:
+            return jsonify({"msg": "Cannot identify the user."}), 404
+
+        lat = request.args.get("lat", type=float)
+        lng = request.args.get("lng", type=float)
+        radius = request.args.get("radius", DEFAULT_NEARBY_RADIUS_KM, type=float)
+        if lat is None or lng is None:
+            return jsonify({"msg": "lat and lng are required"}), 400
+        if not (-180 <= lng <= 180 and -90 <= lat <= 90) or radius <= 0:
+            return jsonify({"msg": "Invalid location or radius"}), 400
+        try:
+            date_from = parse_event_date(request.args.get("from"))
+            date_to = parse_event_date(request.args.get("to"))
+        except ValueError:
+            return jsonify({"msg": "Dates must be formatted as YYYY-MM-DD"}), 400
+        limit = parse_limit(request.args.get("limit"))
+
+        events = Event.find_nearby(user["_id"], lng, lat, radius * 1000, limit, date_from, date_to)
+        for event in events:
+            event["distance"] = round(event["distance"], 1)
+        return jsonify({"events": events, "limit": limit}), 200
+    except Exception as e:
+        print("Error fetching nearby events:", e)
+        return jsonify({"msg": "Error fetching nearby events"}), 500
+
 @event_bp.route("/image/<image_id>", methods=["GET"])
 def get_image(image_id):
     try:
-        image_file = fs.get(ObjectId(image_id))
-        image_data = image_file.read()
-        
-        mime_type, _ = mimetypes.guess_type(image_file.filename)
-        if not mime_type:
-            mime_type = "application/octet-stream"
-        
-        return send_file(
-            io.BytesIO(image_data),
-            mimetype=mime_type,
-            download_name=image_file.filename,
-        )
+        return stream_gridfs_file(image_id, size=request.args.get("size"))
     except Exception as e:
         print("Error fetching image:", e)
         return jsonify({"msg": "Error fetching image"}), 500
@@ -130,29 +191,29 @@ def attend_event(event_id):
     
     #get user data from request
     user_name = get_jwt_identity()
-    user = find_user_by_username(user_name)
+    user = get_user_loader().load_by_name(user_name)
     print("User data:", user)
     if not user:
         return jsonify({"msg": "Cannot identify the user."}), 404
     
-    # get the event data
-    event = Event.find_event_by_str_id(event_id)
-    if not event:
+    if not ObjectId.is_valid(event_id):
         return jsonify({"msg": "Event not found"}), 404
-    
-    # check if the user is already in the event, note that the attendees field is a list of user ids in objct id format
-    if user["_id"] in event["attendees"]:
-        # remove the user from the event
-        event["attendees"].remove(user["_id"])
-        Event.update_event_by_str_id(event_id, {"attendees": event["attendees"]})
-    else:
-        # add the user to the event
-        event["attendees"].append(user["_id"])
-        Event.update_event_by_str_id(event_id, {"attendees": event["attendees"]})
-    
 
-    socketio.emit("event_updated", Event.event_dict_to_json(event))
-    return jsonify({"msg": "Event attendance toggled."}), 200
+    # $addToSet / $pull on the attendees array, note that attendees are user ids in object id format
+    result = Event.toggle_attendance(event_id, user["_id"])
+    if result is None:
+        return jsonify({"msg": "Event not found"}), 404
+    attending, attendee_count = result
+
+    # broadcast only what changed, clients patch their copy of the event
+    delta = {
+        "_id": event_id,
+        "user_id": str(user["_id"]),
+        "attending": attending,
+        "attendee_count": attendee_count
+    }
+    socketio.emit("event_attendance", delta, room=event_room(event_id))
+    return jsonify({"msg": "Event attendance toggled.", **delta}), 200
 
 # delete an event by id
 @event_bp.route("/<event_id>/", methods=["DELETE"], strict_slashes=False)
@@ -162,7 +223,8 @@ def delete_event(event_id):
         if event.deleted_count == 0:
             return jsonify({"msg": "Event not found"}), 404
         # send socketio event
-        socketio.emit("event_deleted", event_id)
+        # everyone on the feed may list it, not only those subscribed to the event
+        socketio.emit("event_deleted", event_id, room=[event_room(event_id), EVENTS_FEED_ROOM])
         return jsonify({"msg": "Event deleted successfully"}), 200
     except Exception as e:
         print("Error deleting event:", e)
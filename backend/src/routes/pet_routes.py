@@ -1,16 +1,24 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from bson.errors import InvalidId
 import json
-import io
-import mimetypes
 from src.db_config import db, fs
-from src.specifications.pet_specifications import PriceRangeSpec, TypeSpec, DistanceSpec, combine_specifications
-import math
+from src.media.gridfs_stream import stream_gridfs_file
+from src.media.image_variants import save_image_upload
+from src.specifications.pet_specifications import PriceRangeSpec, TypeSpec, DistanceSpec, AfterIdSpec, ExcludeIdsSpec, compile_marketplace_query
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from src.utils.geo import annotate_distances, extract_coordinates, haversine_km
+from pymongo.errors import OperationFailure
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from src.utils.user_loader import get_user_loader
+import numpy as np
 
 pet_bp = Blueprint("pet", __name__, url_prefix="/pets")
 pets_collection = db["pets"]
 
+# Geo cursors resume this far before the last distance returned (see get_all_pets)
+GEO_CURSOR_SLACK_METERS = 1.0
+
 # ADD Pet Item
 @pet_bp.route("/upload", methods=["POST"])
 def upload_pet():
@@ -42,7 +50,7 @@ def upload_pet():
             print(f"❌ Error parsing location: {e}, raw data: {location_data}")
             return jsonify({"msg": "Invalid location format"}), 400
 
-        image_id = fs.put(image.stream, filename=image.filename)
+        image_id = save_image_upload(image)
 
         pet_data = {
             "name": name,
@@ -53,6 +61,17 @@ def upload_pet():
             "image": image_id
         }
 
+        # Record the seller when logged in, so chat threads about the listing reach their inbox
+        try:
+            verify_jwt_in_request(optional=True)
+            seller = get_user_loader().load_by_name(get_jwt_identity())
+        except Exception as e:
+            print(f"⚠️ Uploading without a seller: {e}")
+            seller = None
+        if seller:
+            pet_data["seller_id"] = str(seller["_id"])
+            pet_data["seller_username"] = seller["user_name"]
+
         result = pets_collection.insert_one(pet_data)
         
         # Verify the document was created correctly
@@ -73,7 +92,12 @@ def upload_pet():
 def get_all_pets():
     try:
         specs = []
-        original_query = {}
+
+        limit = parse_limit(request.args.get("limit"))
+        try:
+            cursor = decode_cursor(request.args.get("cursor"))
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
 
         min_price = request.args.get("min_price", type=float)
         max_price = request.args.get("max_price", type=float)
@@ -88,116 +112,105 @@ def get_all_pets():
         lat = request.args.get("lat", type=float)
         lng = request.args.get("lng", type=float)
         distance = request.args.get("distance", type=float)
-        using_geo_filter = False
 
         print(f"📍 Received filters  min_price={min_price}  max_price={max_price}"
-              f"  type={pet_type!r}  lat={lat}  lng={lng}  distance={distance}")
+              f"  type={pet_type!r}  lat={lat}  lng={lng}  distance={distance}"
+              f"  limit={limit}  cursor={cursor}")
 
-        
-        if lat is not None and lng is not None and distance is not None:
-            # Convert distance to meters
-            distance_meters = distance * 1000  
-            using_geo_filter = True
-            print(f"📍 Filtering by location: {lat}, {lng} within {distance}km ({distance_meters}m)")
-            
-            # Store original query before adding geo filter
-            original_query = combine_specifications(specs)
-            
-            # Add geospatial filter
-            specs.append(DistanceSpec(lng, lat, distance_meters))
-            print("🔍 Adding geospatial spec:", specs[-1].to_query())
-
-
-        query = combine_specifications(specs)
-        print("📦 Filter query:", query)
-        print("🔎 Final MongoDB query object:", query)
-
-        
-        # Get a sample for debugging
-        sample = pets_collection.find_one()
-        if sample:
-            print("📦 Sample data format:", sample.get("location"))
-            print("📦 Sample data fields:", list(sample.keys()))
-        
-        # Helper function to calculate distance in kilometers
-        def calculate_distance(pet_location, user_lat, user_lng):
-            import math
-            
-            # Approximate radius of earth in km
-            R = 6371.0
-            
-            if not pet_location or 'type' not in pet_location or pet_location['type'] != 'Point':
-                return None
-                
-            try:
-                # Extract coordinates
-                pet_lng, pet_lat = pet_location['coordinates']
-                
-                # Convert coordinates to radians
-                lat1 = math.radians(pet_lat)
-                lon1 = math.radians(pet_lng)
-                lat2 = math.radians(user_lat)
-                lon2 = math.radians(user_lng)
-                
-                # Haversine formula
-                dlon = lon2 - lon1
-                dlat = lat2 - lat1
-                a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-                distance = R * c
-                
-                return round(distance, 1)  # Round to 1 decimal place
-            except Exception as e:
-                print(f"Error calculating distance: {e}")
-                return None
-        
-        # First try with geospatial filter if applicable
-        pets = list(pets_collection.find(query))
+        try:
+            if lat is not None and lng is not None and distance is not None:
+                # Geo pages resume from the last distance seen, skipping the items already returned there
+                min_distance = float(cursor["d"]) if cursor else None
+                specs.append(DistanceSpec(lng, lat, distance * 1000, min_distance))
+                print(f"📍 Filtering by location: {lat}, {lng} within {distance}km")
+                if cursor:
+                    seen = {pet_id: float(meters) for pet_id, meters in cursor["seen"].items()}
+                    specs.append(ExcludeIdsSpec([ObjectId(i) for i in seen]))
+            elif cursor:
+                specs.append(AfterIdSpec(ObjectId(cursor["id"])))
+        except (KeyError, TypeError, ValueError, AttributeError, InvalidId):
+            return jsonify({"msg": "Invalid cursor"}), 400
+
+        compiled = compile_marketplace_query(specs)
+        print("🔎 Final MongoDB query object:", compiled.query, "expected index:", compiled.hint)
+
+        distance_spec = compiled.geo
+        if distance_spec:
+            pets = find_pets_near(distance_spec, compiled.query, limit + 1)
+        else:
+            pets = list(compiled.find(pets_collection).sort("_id", 1).limit(limit + 1))
+            # Distances are informational here, computed once for the whole page
+            if lat is not None and lng is not None:
+                annotate_distances(pets, lat, lng)
         print(f"🐾 MongoDB returned {len(pets)} documents")
 
-        
-        # If no results and using geo filter, try again without geo filter but calculate distances manually
-        if len(pets) == 0 and using_geo_filter:
-            print("⚠️ No results with geospatial filter, falling back to manual distance calculation")
-            pets = list(pets_collection.find(original_query))
-            
-            # Filter manually by distance
-            filtered_pets = []
-            for pet in pets:
-                if "location" in pet:
-                    calculated_distance = calculate_distance(pet.get("location"), lat, lng)
-                    if calculated_distance is not None and calculated_distance <= distance:
-                        pet["distance"] = calculated_distance
-                        filtered_pets.append(pet)
-                    else:
-                        print(f"Pet {pet.get('name')} excluded: distance={calculated_distance}, max={distance}")
-                else:
-                    print(f"Pet {pet.get('name')} has no location data")
-            
-            pets = filtered_pets
-        
+        has_more = len(pets) > limit
+        pets = pets[:limit]
+
+        next_cursor = None
+        if has_more and distance_spec:
+            # Resume slightly before the last distance so float rounding cannot skip items; every
+            # item already sent inside that band, from this page or earlier ones, is excluded instead
+            resume_from = max(pets[-1]["distance"] * 1000 - GEO_CURSOR_SLACK_METERS, 0)
+            sent = dict(seen) if cursor else {}
+            sent.update({str(p["_id"]): p["distance"] * 1000 for p in pets})
+            band = {pet_id: meters for pet_id, meters in sent.items() if meters >= resume_from}
+            next_cursor = encode_cursor({"d": resume_from, "seen": band})
+        elif has_more:
+            next_cursor = encode_cursor({"id": str(pets[-1]["_id"])})
+
         # Format pet data for response
         for pet in pets:
             pet["_id"] = str(pet["_id"])
             if "image" in pet:
                 pet["image"] = str(pet["image"])
-            
-            # Calculate and add distance information if user location is provided
-            if lat is not None and lng is not None and "location" in pet and "distance" not in pet:
-                calculated_distance = calculate_distance(pet.get("location"), lat, lng)
-                if calculated_distance is not None:
-                    pet["distance"] = calculated_distance
+            if "distance" in pet:
+                pet["distance"] = round(pet["distance"], 1)  # Round to 1 decimal place
         
-        print(f"📦 Found {len(pets)} matching pets")
-        for pet in pets:
-            print(f"  - {pet.get('name')} (type: {pet.get('type')}, distance: {pet.get('distance')}km)")
+        print(f"📦 Found {len(pets)} matching pets, next_cursor={next_cursor}")
         
-        return jsonify(pets), 200
+        return jsonify({"pets": pets, "next_cursor": next_cursor, "limit": limit}), 200
     except Exception as e:
         print("❌ Error fetching pets:", e)
         import traceback
         traceback.print_exc()
-        return jsonify([]), 200
+        return jsonify({"msg": "Internal server error"}), 500
+
+
+def find_pets_near(distance_spec, query, limit):
+    """
+    Return up to `limit` pets within the spec's radius, nearest first, with "distance" in km.
+    Uses $geoNear so MongoDB computes the distances; without a usable 2dsphere index it falls back to
+    a single vectorized pass over the candidates' coordinates, then loads only the page it needs.
+    """
+    try:
+        pipeline = [distance_spec.to_geo_near_stage(query), {"$limit": limit}]
+        pets = list(pets_collection.aggregate(pipeline))
+        for pet in pets:
+            pet["distance"] = pet["distance"] / 1000
+        return pets
+    except OperationFailure as e:
+        print(f"⚠️ $geoNear unavailable ({e}), falling back to batch distance calculation")
+
+    candidates = list(pets_collection.find(query, {"location": 1}))
+    if not candidates:
+        return []
+    distances_m = haversine_km(extract_coordinates(candidates), distance_spec.lat, distance_spec.lng) * 1000
+    in_range = distances_m <= distance_spec.radius
+    if distance_spec.min_distance is not None:
+        in_range &= distances_m >= distance_spec.min_distance
+    indices = np.flatnonzero(in_range)
+    indices = indices[np.argsort(distances_m[indices], kind="stable")][:limit]
+
+    page_ids = [candidates[i]["_id"] for i in indices]
+    docs_by_id = {doc["_id"]: doc for doc in pets_collection.find({"_id": {"$in": page_ids}})}
+    pets = []
+    for i in indices:
+        pet = docs_by_id.get(candidates[i]["_id"])
+        if pet:
+            pet["distance"] = float(distances_m[i]) / 1000
+            pets.append(pet)
+    return pets
 
 
 # GET SINGLE PET ITEM
@@ -219,18 +232,7 @@ def get_pet(pet_id):
 @pet_bp.route("/image/<image_id>", methods=["GET"])
 def get_pet_image(image_id):
     try:
-        image_file = fs.get(ObjectId(image_id))
-        image_data = image_file.read()
-
-        mime_type, _ = mimetypes.guess_type(image_file.filename)
-        if not mime_type:
-            mime_type = "application/octet-stream"
-
-        return send_file(
-            io.BytesIO(image_data),
-            mimetype=mime_type,
-            download_name=image_file.filename
-        )
+        return stream_gridfs_file(image_id, size=request.args.get("size"))
 
     except (InvalidId, Exception) as e:
         print("❌ Error fetching image:", e)
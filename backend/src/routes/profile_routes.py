@@ -1,24 +1,26 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from flask_jwt_extended import set_access_cookies
 from flask_jwt_extended import unset_jwt_cookies
-from src.models.user_model import User, UserBuilder, find_user_by_username, insert_user, get_pet_ids_by_username
+from src.models.user_model import User, UserBuilder, find_user_by_username, find_users_by_usernames, user_summary, insert_user, get_pet_ids_by_username
 from src.models.pets_model import Pet, PetBuilder, find_pet_by_id, delete_pet_by_id, update_pet_by_id
 from src.models.user_relationship_model import UserRelationship
-from src.models.review import Review
+from src.models.review import Review, rating_summary, serialize_review
+from src.models.notification_model import NotificationModel, serialize_notifications, publish_notification
+from src.models.service_model import refresh_matched_user_summaries
+from src.media.gridfs_stream import stream_gridfs_file
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from src.utils.user_loader import get_user_loader
+from src.socket_config import emit_follow_update
 
 from bson import ObjectId
-from src.db_config import db
-import gridfs
-from io import BytesIO
+from src.db_config import db, fs
 import json
 import re
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import os
 
-fs = gridfs.GridFS(db)
-
 profile_bp = Blueprint("profile", __name__, url_prefix="/api")
 
 @profile_bp.route("/search_users", methods=["GET"])
@@ -91,6 +93,9 @@ def complete_profile():
     if not success:
         return jsonify({"msg": "No changes made."}), 200
 
+    # Service posts this user is matched on carry a copy of their name and avatar
+    refresh_matched_user_summaries(user_name)
+
     return jsonify({"msg": "Profile updated successfully."}), 200
 
 
@@ -106,6 +111,7 @@ def upload_profile_picture():
     file_id = User.save_profile_picture(user_name, image)
 
     if file_id:
+        refresh_matched_user_summaries(user_name)
         return jsonify({"msg": "Image uploaded", "file_id": file_id}), 200
     return jsonify({"msg": "Failed to upload image"}), 500
 
@@ -113,8 +119,7 @@ def upload_profile_picture():
 def get_profile_picture(file_id):
     try:
         print("Trying to load image with file_id:", file_id)
-        file = fs.get(ObjectId(file_id))
-        return send_file(BytesIO(file.read()), mimetype=file.content_type)
+        return stream_gridfs_file(file_id, size=request.args.get("size"))
     except Exception as e:
         print("Error retrieving image:", e)
         return jsonify({"msg": "Image not found"}), 404
@@ -136,8 +141,7 @@ def create_pet():
 @profile_bp.route("/pet_picture/<file_id>", methods=["GET"])
 def get_pet_picture(file_id):
     try:
-        file = fs.get(ObjectId(file_id))
-        return send_file(BytesIO(file.read()), mimetype=file.content_type)
+        return stream_gridfs_file(file_id, size=request.args.get("size"))
     except Exception:
         return jsonify({"msg": "Image not found"}), 404
 
@@ -224,37 +228,18 @@ def get_user_profile(username):
     print(f"Checking profile for user {username}, requested by {current_user}")
     
     # Find target user
-    target_user = db.users.find_one({"user_name": username})
+    target_user = get_user_loader().load_by_name(username)
     if not target_user:
         return jsonify({"error": "User not found"}), 404
 
     # Check if following - no status check needed
-    follow_relationship = db.user_relationships.find_one({
-        "follower": current_user,
-        "following": username
-    })
-    is_following = follow_relationship is not None
+    is_following = UserRelationship.is_following(current_user, username)
     
     print(f"Follow status check: {current_user} following {username}: {is_following}")
-    if follow_relationship:
-        print(f"Follow relationship found: {follow_relationship}")
 
-    # Get follower and following counts using direct count for better performance
-    followers_count = db.user_relationships.count_documents({"following": username})
-    following_count = db.user_relationships.count_documents({"follower": username})
-    
-    print(f"Counts - Followers: {followers_count}, Following: {following_count}")
-    
-    # Debug: List all relationships for this user
-    print("All follower relationships:")
-    all_followers = list(db.user_relationships.find({"following": username}))
-    for rel in all_followers:
-        print(f"Follower: {rel}")
-        
-    print("All following relationships:")
-    all_following = list(db.user_relationships.find({"follower": username}))
-    for rel in all_following:
-        print(f"Following: {rel}")
+    # Counters are denormalized on the user document by follow / unfollow
+    followers_count = target_user.get("followers_count", 0)
+    following_count = target_user.get("following_count", 0)
 
     is_public = target_user.get('is_public', True)  # Default to public if not set
     is_own_profile = current_user == username
@@ -302,43 +287,35 @@ def follow_user(username):
         current_user = get_jwt_identity()
         
         # Check if target user exists
-        target_user = db.users.find_one({"user_name": username})
+        target_user = get_user_loader().load_by_name(username)
         if not target_user:
             return jsonify({"error": "User not found"}), 404
 
-        # Check if already following
-        existing_relationship = db.user_relationships.find_one({
-            "follower": current_user,
-            "following": username
-        })
-        
-        if existing_relationship:
+        # Create the relationship and update both users' counters
+        counts = UserRelationship.follow_user(current_user, username)
+        if counts is None:
             return jsonify({"error": "Already following this user"}), 400
 
-        # Create new relationship directly
-        relationship = {
+        # Both users' cached documents now carry stale counters
+        loader = get_user_loader()
+        loader.invalidate(user_name=current_user)
+        loader.invalidate(user_name=username)
+
+        update = {
             "follower": current_user,
             "following": username,
-            "created_at": datetime.utcnow()
+            "followers_count": counts["followers_count"],
+            "following_count": counts["following_count"],
+            "is_following": True
         }
-        
-        # Insert the relationship
-        db.user_relationships.insert_one(relationship)
-        
-        # Get updated counts
-        follower_count = db.user_relationships.count_documents({
-            "following": username
-        })
-        following_count = db.user_relationships.count_documents({
-            "follower": username
-        })
+        emit_follow_update(update, [current_user, username])
+        # The follow is already stored; a failed notification must not fail the request
+        try:
+            publish_notification(username, "follow", current_user)
+        except Exception as e:
+            print(f"❌ Could not notify {username} of the follow: {e}")
 
-        return jsonify({
-            "message": "Successfully followed user",
-            "followers_count": follower_count,
-            "following_count": following_count,
-            "is_following": True
-        }), 200
+        return jsonify({"message": "Successfully followed user", **update}), 200
 
     except Exception as e:
         print(f"Error in follow_user: {str(e)}")
@@ -350,35 +327,26 @@ def unfollow_user(username):
     try:
         current_user = get_jwt_identity()
         
-        # First check if the relationship exists
-        existing_relationship = db.user_relationships.find_one({
-            "follower": current_user,
-            "following": username
-        })
-        
-        if not existing_relationship:
+        # Delete the relationship and update both users' counters
+        counts = UserRelationship.unfollow_user(current_user, username)
+        if counts is None:
             return jsonify({"error": "Not following this user"}), 400
-        
-        # Delete the relationship
-        db.user_relationships.delete_one({
-            "follower": current_user,
-            "following": username
-        })
 
-        # Update follower counts
-        follower_count = db.user_relationships.count_documents({
-            "following": username
-        })
-        following_count = db.user_relationships.count_documents({
-            "follower": username
-        })
+        # Both users' cached documents now carry stale counters
+        loader = get_user_loader()
+        loader.invalidate(user_name=current_user)
+        loader.invalidate(user_name=username)
 
-        return jsonify({
-            "message": "Successfully unfollowed user",
-            "followers_count": follower_count,
-            "following_count": following_count,
+        update = {
+            "follower": current_user,
+            "following": username,
+            "followers_count": counts["followers_count"],
+            "following_count": counts["following_count"],
             "is_following": False
-        }), 200
+        }
+        emit_follow_update(update, [current_user, username])
+
+        return jsonify({"message": "Successfully unfollowed user", **update}), 200
 
     except Exception as e:
         print(f"Error in unfollow_user: {str(e)}")
@@ -388,7 +356,7 @@ def unfollow_user(username):
 @jwt_required()
 def get_user_pets(username):
     # Find the user
-    user = find_user_by_username(username)
+    user = get_user_loader().load_by_name(username)
     if not user:
         return jsonify({"error": "User not found"}), 404
         
@@ -404,59 +372,44 @@ def get_user_pets(username):
     
     return jsonify(pets), 200
 
+def relationship_page_response(username, field, other_field):
+    """
+    Paginated list of the users on the other side of username's relationships, newest first.
+    The users are loaded with one batched query for the whole page.
+    """
+    target_user = get_user_loader().load_by_name(username)
+    if not target_user:
+        return jsonify({"error": "User not found"}), 404
+
+    limit = parse_limit(request.args.get("limit"))
+    try:
+        cursor = decode_cursor(request.args.get("cursor"))
+        relationships, next_position = UserRelationship.get_relationships_page(field, username, limit, cursor)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    users_by_name = find_users_by_usernames(rel[other_field] for rel in relationships)
+    users = [
+        user_summary(users_by_name[rel[other_field]])
+        for rel in relationships
+        if rel[other_field] in users_by_name
+    ]
+
+    return jsonify({
+        "users": users,
+        "next_cursor": encode_cursor(next_position),
+        "total": target_user.get("followers_count" if field == "following" else "following_count", 0)
+    }), 200
+
 @profile_bp.route("/followers/<username>", methods=["GET"])
 @jwt_required()
 def get_followers(username):
-    target_user = find_user_by_username(username)
-    if not target_user:
-        return jsonify({"error": "User not found"}), 404
-        
-    # Get all followers from relationships - removed status filter
-    followers = db.user_relationships.find({
-        "following": username
-    })
-    
-    users = []
-    for follower in followers:
-        user = db.users.find_one({"user_name": follower["follower"]})
-        if user:
-            users.append({
-                "_id": str(user["_id"]),
-                "name": user.get("name", ""),
-                "user_name": user.get("user_name", ""),
-                "profile_picture": user.get("profile_picture"),
-                "identity": user.get("identity", []),
-                "location": user.get("location", {})
-            })
-    
-    return jsonify(users), 200
+    return relationship_page_response(username, "following", "follower")
 
 @profile_bp.route("/following/<username>", methods=["GET"])
 @jwt_required()
 def get_following(username):
-    target_user = find_user_by_username(username)
-    if not target_user:
-        return jsonify({"error": "User not found"}), 404
-        
-    # Get all users being followed - removed status filter
-    following = db.user_relationships.find({
-        "follower": username
-    })
-    
-    users = []
-    for follow in following:
-        user = db.users.find_one({"user_name": follow["following"]})
-        if user:
-            users.append({
-                "_id": str(user["_id"]),
-                "name": user.get("name", ""),
-                "user_name": user.get("user_name", ""),
-                "profile_picture": user.get("profile_picture"),
-                "identity": user.get("identity", []),
-                "location": user.get("location", {})
-            })
-    
-    return jsonify(users), 200
+    return relationship_page_response(username, "follower", "following")
 
 @profile_bp.route("/rate/<username>", methods=["POST"])
 @jwt_required()
@@ -468,7 +421,7 @@ def rate_user(username):
         return jsonify({"error": "Cannot rate yourself"}), 400
         
     # Check if target user exists
-    target_user = find_user_by_username(username)
+    target_user = get_user_loader().load_by_name(username)
     if not target_user:
         return jsonify({"error": "User not found"}), 404
         
@@ -486,64 +439,72 @@ def rate_user(username):
         
     comment = data.get("comment", "")
     
-    # Update user's rating and reviews
-    current_rating = target_user.get("rating", 0)
-    current_review_count = len(target_user.get("review", []))
-    
-    # Calculate new average rating
-    new_rating = ((current_rating * current_review_count) + rating) / (current_review_count + 1)
-    
-    # Create review object
-    review = {
-        "rating": rating,
-        "comment": comment,
-        "reviewer": current_user,
-        "date": datetime.now().isoformat()
-    }
-    
-    # Update in database
-    db.users.update_one(
-        {"user_name": username},
-        {
-            "$push": {"review": review},
-            "$set": {"rating": round(new_rating, 2)}
-        }
-    )
+    # Store the review and $inc the target's aggregates in one atomic update
+    result = Review.create_review(current_user, username, rating, comment)
+    if result is None:
+        return jsonify({"error": "User not found"}), 404
+    review, summary = result
+    get_user_loader().invalidate(user_name=username)
+    # The review is already stored; a failed notification must not fail the request
+    try:
+        publish_notification(username, "review", current_user, {
+            "review_id": str(review["_id"]),
+            "rating": review["rating"]
+        })
+    except Exception as e:
+        print(f"❌ Could not notify {username} of the review: {e}")
     
     return jsonify({
         "message": "Rating submitted successfully",
-        "new_rating": round(new_rating, 2)
+        "new_rating": summary["rating"],
+        "review": serialize_review(review),
+        **summary
     }), 200
 
 @profile_bp.route("/reviews/<username>", methods=["GET"])
 @jwt_required()
 def get_user_reviews(username):
     # Check if target user exists
-    target_user = find_user_by_username(username)
+    target_user = get_user_loader().load_by_name(username)
     if not target_user:
         return jsonify({"error": "User not found"}), 404
         
-    reviews = target_user.get("review", [])
-    rating = target_user.get("rating", 0)
+    try:
+        cursor = decode_cursor(request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    limit = parse_limit(request.args.get("limit"))
+
+    reviews, next_position = Review.get_reviews_page(username, limit, cursor)
     
     return jsonify({
-        "reviews": reviews,
-        "rating": rating,
-        "total_reviews": len(reviews)
+        "reviews": [serialize_review(r) for r in reviews],
+        "next_cursor": encode_cursor(next_position),
+        **rating_summary(target_user)
     }), 200
 
+@profile_bp.route("/reviews/<review_id>", methods=["DELETE"])
+@jwt_required()
+def delete_review(review_id):
+    current_user = get_jwt_identity()
+
+    # Only the reviewer can delete their review
+    if not Review.delete_review(current_user, review_id):
+        return jsonify({"error": "Review not found"}), 404
+
+    return jsonify({"message": "Review deleted successfully"}), 200
+
 @profile_bp.route("/user/<user_id>", methods=["GET"])
 @jwt_required()
 def get_user_by_id(user_id):
     current_user = get_jwt_identity()
     
-    try:
-        # Attempt to convert to ObjectId
-        user_object_id = ObjectId(user_id)
-        user = db.users.find_one({"_id": user_object_id})
-    except Exception:
+    loader = get_user_loader()
+    if ObjectId.is_valid(user_id):
+        user = loader.load_by_id(user_id)
+    else:
         # Fallback to find by username if not a valid ObjectId
-        user = db.users.find_one({"user_name": user_id})
+        user = loader.load_by_name(user_id)
     
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -560,14 +521,8 @@ def get_user_by_id(user_id):
         "identity": user.get("identity", []),
         "location": user.get("location", {}),
         "rating": user.get("rating", 0),
-        "followers_count": db.user_relationships.count_documents({
-            "following": username,
-            "status": "accepted"
-        }),
-        "following_count": db.user_relationships.count_documents({
-            "follower": username,
-            "status": "accepted"
-        })
+        "followers_count": user.get("followers_count", 0),
+        "following_count": user.get("following_count", 0)
     }
 
     return jsonify(user_data), 200
@@ -577,31 +532,50 @@ def get_user_by_id(user_id):
 def get_notifications():
     try:
         current_user = get_jwt_identity()
-        
-        # Get unread notifications
-        notifications = list(db.notifications.find({
-            "user_name": current_user,
-            "read": False
-        }).sort("created_at", -1))
-        
-        # Format notifications
-        formatted_notifications = []
-        for notif in notifications:
-            from_user = db.users.find_one({"user_name": notif["from_user"]})
-            formatted_notifications.append({
-                "id": str(notif["_id"]),
-                "type": notif["type"],
-                "from_user": {
-                    "user_name": from_user.get("user_name"),
-                    "name": from_user.get("name"),
-                    "profile_picture": from_user.get("profile_picture")
-                },
-                "created_at": notif["created_at"].isoformat(),
-                "request_id": notif.get("request_id")  # Only for follow requests
-            })
-        
-        return jsonify(formatted_notifications), 200
-        
+
+        try:
+            cursor = decode_cursor(request.args.get("cursor"))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        limit = parse_limit(request.args.get("limit"))
+        include_read = request.args.get("include_read", "false").lower() == "true"
+
+        # Unread notifications (or all of them), newest first, one keyset page
+        notifications, next_position = NotificationModel.get_page(
+            current_user, limit, cursor, include_read=include_read
+        )
+
+        return jsonify({
+            # Senders are hydrated with one batched $in query
+            "notifications": serialize_notifications(notifications),
+            "next_cursor": encode_cursor(next_position),
+            "unread_count": NotificationModel.unread_count(current_user)
+        }), 200
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@profile_bp.route("/notifications/read", methods=["POST"])
+@jwt_required()
+def mark_notifications_read():
+    """
+    Mark notifications read: {"ids": [...]} marks those, {"up_to": "<cursor>"} marks everything
+    up to and including that notification, an empty body marks all of them
+    """
+    current_user = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+
+    ids = data.get("ids")
+    if ids is not None and not isinstance(ids, list):
+        return jsonify({"error": "ids must be a list"}), 400
+    try:
+        up_to = decode_cursor(data.get("up_to"))
+        marked = NotificationModel.mark_read(current_user, ids=ids, up_to=up_to)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "marked": marked,
+        "unread_count": NotificationModel.unread_count(current_user)
+    }), 200
+
@@ -1,9 +1,20 @@
 from flask import Blueprint, request, jsonify, Response, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
 from src.db_config import fs
 from src.models.service_model import *
 from src.models.user_model import users_collection
+from src.media.gridfs_stream import stream_gridfs_file
+from src.specifications.service_specifications import (
+    FieldEqualsSpec, PetTypeSpec, FieldPresentSpec, AvailabilityWindowSpec, WithinRadiusSpec,
+)
+from src.models.service_matching import find_candidates, DEFAULT_MATCH_RADIUS_KM, MATCH_PROJECTION
+from src.models.reply_model import ReplyModel, serialize_reply, serialize_thread, reply_position
+from src.socket_config import socketio, user_room
+from src.utils.pagination import encode_cursor, decode_cursor, parse_limit
+import re
 import time
 
 
@@ -20,38 +31,111 @@ STATUS_TO_INT = {
     "pending": 0,
     "matched": 1,
     "completed": 2,
-    "canceled": 3
+    "canceled": 3,
+    "expired": 4
 }
 
-INT_TO_CATEGORY = {v: k for k, v in CATEGORY_TO_INT.items()}
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+DEFAULT_RADIUS_KM = 10
+
+
+def _parse_flag(value):
+    if value is None or value == "":
+        return None
+    return value.lower() == "true"
+
+
+def build_service_filters(args):
+    """
+    Turn the board's query parameters into filter specifications
+
+    Supported: category, type (request / offer), status, pet_type, user_name, has_image,
+    has_location, available_from / available_to (YYYY-MM-DD) and lat / lng / radius_km
+
+    Raises:
+        ValueError: If a parameter has an unknown or malformed value
+    """
+    specs = []
+
+    category = args.get("category")
+    if category:
+        if category not in CATEGORY_TO_INT:
+            raise ValueError(f"Unknown category: {category}")
+        specs.append(FieldEqualsSpec("service_category", CATEGORY_TO_INT[category]))
+
+    service_type = args.get("type")
+    if service_type:
+        if service_type not in SERVICE_TYPE_TO_INT:
+            raise ValueError("type must be 'request' or 'offer'")
+        specs.append(FieldEqualsSpec("service_type", SERVICE_TYPE_TO_INT[service_type]))
+
+    status = args.get("status")
+    if status:
+        if status not in STATUS_TO_INT:
+            raise ValueError(f"Unknown status: {status}")
+        specs.append(FieldEqualsSpec("status", STATUS_TO_INT[status]))
+
+    pet_type = args.get("pet_type")
+    if pet_type and pet_type != "either":
+        specs.append(PetTypeSpec(pet_type))
+
+    user_name = args.get("user_name")
+    if user_name:
+        specs.append(FieldEqualsSpec("user_name", user_name))
+
+    has_image = _parse_flag(args.get("has_image"))
+    if has_image is not None:
+        specs.append(FieldPresentSpec("pet_image", has_image))
+    has_location = _parse_flag(args.get("has_location"))
+    if has_location is not None:
+        specs.append(FieldPresentSpec("place_name", has_location))
+
+    available_from = args.get("available_from")
+    available_to = args.get("available_to")
+    for value in (available_from, available_to):
+        if value and not DATE_PATTERN.match(value):
+            raise ValueError("Dates must be formatted as YYYY-MM-DD")
+    if available_from or available_to:
+        specs.append(AvailabilityWindowSpec(available_from, available_to))
+
+    if args.get("lat") is not None or args.get("lng") is not None:
+        try:
+            lat = float(args.get("lat"))
+            lng = float(args.get("lng"))
+            radius_km = float(args.get("radius_km", DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            raise ValueError("lat, lng and radius_km must be numbers")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+            raise ValueError("Coordinates or radius out of range")
+        specs.append(WithinRadiusSpec(lng, lat, radius_km * 1000))
+
+    return specs
 
-def parse_iso(post_time_str):
-    # Remove trailing Z and parse
-    return datetime.fromisoformat(post_time_str.replace('Z', ''))
 
 @service_board_bp.route("/", methods=["GET"])
 def get_services():
     try:
-        # Get all services
-        services = list(services_collection.find({}))
-        # Convert ObjectId to string
-        for service in services:
-            service["_id"] = str(service["_id"])
-            if "service_category" in service:
-                service["service_category"] = INT_TO_CATEGORY.get(service["service_category"], service["service_category"])
-            if "pet_image" in service:
-                service["pet_image"] = str(service["pet_image"])
-            if "user_id" in service:
-                service["user_id"] = str(service["user_id"])
-            # Normalize matched_user
-            if "matched_user" in service and service["matched_user"]:
-                matched = service["matched_user"]
-                service["matched_user"] = {
-                    "user_id": str(matched["_id"]),
-                    "user_name": matched.get("user_name")
-                }
-        services.sort(key=lambda s:parse_iso(s.get("post_time", "9999-12-31T23:59:59.999Z")), reverse=True)
-        return jsonify(services), 200
+        try:
+            specs = build_service_filters(request.args)
+            cursor = decode_cursor(request.args.get("cursor"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        limit = parse_limit(request.args.get("limit"))
+        descending = request.args.get("order", "desc") != "asc"
+        sort = request.args.get("sort", "post_time")
+
+        # Filtered, sorted (post_time, start, end or last_activity) and paged in the database
+        try:
+            services, next_position = get_services_page(specs, limit, cursor, descending, sort)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({
+            "services": services,
+            "next_cursor": encode_cursor(next_position),
+            "limit": limit
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -60,8 +144,7 @@ def get_pet_image(image_id):
     try:
         if image_id.lower() == "none" or not image_id.strip():
             return Response(status=204)
-        image_file = fs.get(ObjectId(image_id))
-        return Response(image_file.read(), content_type=image_file.content_type)
+        return stream_gridfs_file(image_id, size=request.args.get("size"))
     except Exception as e:
         return jsonify({"error": str(e)}), 404
     
@@ -76,7 +159,10 @@ def post_request():
         pet_name = request.form.get("petName")
         service_category = request.form.get("serviceCategory")
         notes = request.form.get("notes", "")
-        post_time = request.form.get("postTime")
+        try:
+            post_time = parse_post_time(request.form.get("postTime"))
+        except ValueError:
+            return jsonify({"error": "postTime must be an ISO 8601 timestamp"}), 400
         if "location" in request.form:
             location = {
                 "place_name": request.form.get("location")
@@ -128,6 +214,8 @@ def post_request():
         services_collection.insert_one(service_dict)
         service_dict.pop("_id", None)
         service_dict["user_id"] = str(service_dict["user_id"])
+        service_dict["post_time"] = service_dict["post_time"].isoformat() + "Z"
+        service_dict["last_activity_at"] = service_dict["post_time"]
 
         # If returning the image_id, convert to str
         if "pet_image" in service_dict:
@@ -148,7 +236,10 @@ def post_offer():
         pet_type = request.form.get("petType")
         service_category = request.form.get("serviceCategory")
         notes = request.form.get("notes", "")
-        post_time = request.form.get("postTime")
+        try:
+            post_time = parse_post_time(request.form.get("postTime"))
+        except ValueError:
+            return jsonify({"error": "postTime must be an ISO 8601 timestamp"}), 400
         if "location" in request.form:
             location = {
                 "place_name": request.form.get("location")
@@ -191,6 +282,8 @@ def post_offer():
         services_collection.insert_one(service_dict)
         service_dict.pop("_id", None)
         service_dict["user_id"] = str(service_dict["user_id"])
+        service_dict["post_time"] = service_dict["post_time"].isoformat() + "Z"
+        service_dict["last_activity_at"] = service_dict["post_time"]
 
 
         return jsonify({"msg": "Request created successfully", "data": service_dict}), 201
@@ -203,6 +296,7 @@ def delete_offer(service_id):
         delete_res = services_collection.delete_one({"_id": ObjectId(service_id)})
         if delete_res.deleted_count == 0:
             return jsonify({"error": "Service not exist"}), 404
+        ReplyModel.delete_for_service(ObjectId(service_id))
         return jsonify({"msg": "Service deleted successfully"}), 200
     
     except Exception as e:
@@ -211,16 +305,47 @@ def delete_offer(service_id):
 @service_board_bp.route("/reply/<service_id>", methods=["GET"])
 def get_replies(service_id):
     try:
-        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        service = services_collection.find_one({"_id": ObjectId(service_id)}, {"reply_count": 1})
         if not service:
             return jsonify({"error": "Service not found"}), 404
 
-        replies = service.get("replies", {})  # Safe default to empty dict if not present
-        return jsonify(replies), 200
+        try:
+            cursor = decode_cursor(request.args.get("cursor"))
+            limit = parse_limit(request.args.get("limit"))
+            threads, next_position = ReplyModel.get_threads_page(service["_id"], limit, cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        # Each thread carries its count and latest replies; older ones come from the thread endpoint
+        return jsonify({
+            "threads": [serialize_thread(t) for t in threads],
+            "reply_count": service.get("reply_count", 0),
+            "next_cursor": encode_cursor(next_position)
+        }), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
+
+@service_board_bp.route("/reply/<service_id>/<thread_owner>", methods=["GET"])
+def get_thread_replies(service_id, thread_owner):
+    try:
+        try:
+            before = decode_cursor(request.args.get("before"))
+            limit = parse_limit(request.args.get("limit"))
+            replies, has_more = ReplyModel.get_thread_replies(ObjectId(service_id), thread_owner, limit, before)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        return jsonify({
+            "replies": [serialize_reply(r) for r in replies],
+            "before": encode_cursor(reply_position(replies[0])) if replies else request.args.get("before"),
+            "has_more": has_more
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 
 @service_board_bp.route("/reply", methods=["POST"])
 # @jwt_required()
@@ -229,35 +354,70 @@ def post_reply():
         service_id = request.form.get("serviceId")
         reply_user_name = request.form.get("userName")
         reply_content = request.form.get("replyContent", "").strip()
-        reply_time = request.form.get("timestamp", time.time())
         thread_owner = request.form.get("threadOwner", reply_user_name)  # default: new thread
-        if not service_id or not reply_content:
-            return jsonify({"error": "Missing service ID or reply content"}), 400
-        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        if not service_id or not reply_user_name or not reply_content:
+            return jsonify({"error": "Missing service ID, user name or reply content"}), 400
+        try:
+            service = services_collection.find_one({"_id": ObjectId(service_id)}, {"user_name": 1, "archive_run": 1})
+        except InvalidId:
+            return jsonify({"error": "Invalid service id"}), 400
         if not service:
             return jsonify({"error": "Service not found"}), 404
-        new_reply_entry = {
-            reply_user_name: [
-                reply_content,
-                reply_time
-            ]
+        # Claimed by the lifecycle job, its replies are being moved to the archive
+        if service.get("archive_run"):
+            return jsonify({"error": "Service is archived"}), 409
+        # A reply goes into the replier's own thread, or the post's author answers an existing one
+        if thread_owner != reply_user_name and not (
+            reply_user_name == service.get("user_name") and ReplyModel.thread_exists(service["_id"], thread_owner)
+        ):
+            return jsonify({"error": "Cannot reply in this thread"}), 400
+
+        # One insert plus constant-size updates of the thread and post counters, however busy the post is
+        reply, thread = ReplyModel.add_reply(service["_id"], thread_owner, reply_user_name, reply_content)
+
+        payload = {
+            "service_id": service_id,
+            "thread_owner": thread_owner,
+            "reply": serialize_reply(reply),
+            "reply_count": thread["reply_count"]
         }
-        # Initialize replies if not present
-        if "replies" not in service or not service["replies"]:
-            service["replies"] = {}
+        # Push to everyone in the thread and to the post's author
+        for user_name in set(thread.get("participants", [])) | {service.get("user_name"), thread_owner}:
+            if user_name:
+                socketio.emit("service_reply", payload, room=user_room(user_name))
 
-        # Append to the user's reply thread
-        if thread_owner not in service["replies"]:
-            service["replies"][thread_owner] = [new_reply_entry]
-        else:
-            service["replies"][thread_owner].append(new_reply_entry)
-        
-        # Update the service document in DB
-        services_collection.update_one(
-            {"_id": ObjectId(service_id)},
-            {"$set": {"replies": service["replies"]}}
-        )
-        return jsonify({"message": "Reply added successfully"}), 201
+        return jsonify({"message": "Reply added successfully", **payload}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@service_board_bp.route("/<service_id>/candidates", methods=["GET"])
+def get_match_candidates(service_id):
+    try:
+        try:
+            service = services_collection.find_one({"_id": ObjectId(service_id)}, MATCH_PROJECTION)
+        except InvalidId:
+            return jsonify({"error": "Invalid service id"}), 400
+        if not service:
+            return jsonify({"error": "Service not found"}), 404
+        if service.get("status") != STATUS_TO_INT["pending"]:
+            return jsonify({"error": "Service is no longer open for matching"}), 400
+
+        limit = parse_limit(request.args.get("limit"), default=10)
+        try:
+            radius_km = float(request.args.get("radius_km", DEFAULT_MATCH_RADIUS_KM))
+        except ValueError:
+            return jsonify({"error": "radius_km must be a number"}), 400
+        if radius_km <= 0:
+            return jsonify({"error": "radius_km must be positive"}), 400
+
+        # Open posts of the other side, ranked by availability overlap, distance and pet type
+        candidates = find_candidates(service, limit, radius_km)
+        return jsonify({
+            "service_id": service_id,
+            "candidates": candidates,
+            "radius_km": radius_km
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -267,18 +427,19 @@ def confirm_match():
     try:
         data = request.get_json()
         service_id = data.get("service_id",  "")
-        service = services_collection.find_one({"_id": ObjectId(service_id)})
+        service = services_collection.find_one({"_id": ObjectId(service_id)}, {"_id": 1})
         if not service:
             return jsonify({"error": "Service does not exist"}), 404
         matched_user_name = data.get("matched_user", "")
-        matched_user = users_collection.find_one({"user_name": matched_user_name})
+        matched_user = find_matched_user(matched_user_name)
         if not matched_user:
             return jsonify({"error": "Matched user not found"}), 404
         services_collection.update_one(
             {"_id": ObjectId(service_id)},
             {"$set": {
                 "matched_user": matched_user,
-                "status": STATUS_TO_INT["matched"]
+                "status": STATUS_TO_INT["matched"],
+                "status_changed_at": datetime.utcnow()
             }}
         )
         return jsonify({"message": "updated status successfully"}), 201
@@ -1,13 +1,14 @@
-from flask import Blueprint, request, jsonify, send_file, current_app as app
+from flask import Blueprint, request, jsonify, current_app as app
 from bson.objectid import ObjectId, InvalidId
 from datetime import datetime
 import json
 from bson import json_util
-import io
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from ..db_config import db, fs
 from ..models.vet_service_model import VetService
+from ..media.gridfs_stream import stream_gridfs_file
+from ..utils.user_loader import get_user_loader
 
 vet_service_bp = Blueprint('vet_service_routes', __name__)
 
@@ -120,15 +121,8 @@ def upload_service_image():
 @vet_service_bp.route('/api/images/<image_id>', methods=['GET'])
 def get_service_image(image_id):
     try:
-        # Get the image from GridFS
-        image_file = fs.get(ObjectId(image_id))
-        
-        # Return the image
-        return send_file(
-            io.BytesIO(image_file.read()),
-            mimetype=image_file.content_type,
-            download_name=image_file.filename
-        )
+        # Stream the image from GridFS
+        return stream_gridfs_file(image_id, size=request.args.get("size"))
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
@@ -150,7 +144,7 @@ def create_vet_service():
         vet_id = data.get('vetId')
         service_category = data.get('serviceCategory')
         time_slot = data.get('timeSlot')
-        owner_data = data.get('ownerData', {})
+        owner_data = data.get('ownerData') or {}
         
         # Find pet by ID
         try:
@@ -162,44 +156,36 @@ def create_vet_service():
         if not pet:
             return jsonify({'error': f'Pet not found with id: {pet_id}'}), 404
 
+        # Load the vet and every owner candidate with a single users query
+        users = get_user_loader()
+        jwt_identity = get_jwt_identity()
+        owner_id = owner_data.get('_id')
+        owner_username = owner_data.get('user_name') or owner_data.get('username')
+        identity_id = jwt_identity.get('_id') if isinstance(jwt_identity, dict) else None
+        identity_name = jwt_identity if isinstance(jwt_identity, str) else None
+        users.prime(
+            user_names=[identity_name, owner_username],
+            user_ids=[vet_id, identity_id, owner_id, pet.get('owner_id')]
+        )
+
         # Find vet by ID
-        try:
-            vet_obj_id = ObjectId(vet_id)
-            vet = db.users.find_one({'_id': vet_obj_id})
-        except (InvalidId, TypeError):
-            vet = db.users.find_one({'_id': vet_id})
+        vet = users.load_by_id(vet_id)
             
         if not vet:
             return jsonify({'error': f'Veterinarian not found with id: {vet_id}'}), 404
 
-        # Get owner information
-        owner = None
-        jwt_identity = get_jwt_identity()
-
         # Try to get the owner from the JWT identity
-        if jwt_identity:
-            if isinstance(jwt_identity, dict) and '_id' in jwt_identity:
-                try:
-                    owner = db.users.find_one({'_id': ObjectId(jwt_identity['_id'])})
-                except:
-                    owner = db.users.find_one({'_id': jwt_identity['_id']})
-            else:
-                owner = db.users.find_one({'user_name': jwt_identity})
+        owner = users.load_by_id(identity_id) if identity_id else users.load_by_name(identity_name)
         
         # If not found, try to get from request data
         if not owner and owner_data:
             # First try to get by ID if available
-            owner_id = owner_data.get('_id')
             if owner_id:
-                try:
-                    owner = db.users.find_one({'_id': ObjectId(owner_id)})
-                except:
-                    owner = db.users.find_one({'_id': owner_id})
+                owner = users.load_by_id(owner_id)
             
             # If still not found, try by username
-            if not owner and (owner_data.get('user_name') or owner_data.get('username')):
-                username = owner_data.get('user_name') or owner_data.get('username')
-                owner = db.users.find_one({'user_name': username})
+            if not owner and owner_username:
+                owner = users.load_by_name(owner_username)
             
             # If still not found, create a minimal owner data from the request
             if not owner:
@@ -207,7 +193,7 @@ def create_vet_service():
                 owner = {
                     '_id': owner_id or 'temp_id',
                     'name': owner_data.get('name') or 'Unknown Owner',
-                    'user_name': owner_data.get('user_name') or owner_data.get('username') or 'Unknown',
+                    'user_name': owner_username or 'Unknown',
                     'contact': {
                         'email': owner_data.get('email') or owner_data.get('contact', {}).get('email', ''),
                         'phone_number': owner_data.get('phone') or owner_data.get('contact', {}).get('phone_number', '')
@@ -216,13 +202,7 @@ def create_vet_service():
         
         # If still not found, see if pet has an owner reference
         if not owner and 'owner_id' in pet:
-            owner_id = pet['owner_id']
-            try:
-                if isinstance(owner_id, str):
-                    owner_id = ObjectId(owner_id)
-                owner = db.users.find_one({'_id': owner_id})
-            except:
-                pass
+            owner = users.load_by_id(pet['owner_id'])
             
         if not owner:
             return jsonify({'error': 'Owner information not found'}), 400
@@ -509,8 +489,7 @@ def get_vets():
 @vet_service_bp.route('/api/vets/<vet_id>', methods=['GET'])
 def get_vet_by_id(vet_id):
     try:
-        # Convert string ID to ObjectId
-        vet = db.users.find_one({'_id': ObjectId(vet_id)})
+        vet = get_user_loader().load_by_id(vet_id)
         
         if not vet:
             return jsonify({'error': 'Veterinarian not found'}), 404
@@ -0,0 +1,207 @@
+import os
+from datetime import date, datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne, IndexModel, ASCENDING
+from src.db_config import db
+from src.db_indexes import declare_indexes
+from src.models.service_model import services_collection, STATUS_TO_INT
+from src.models.reply_model import ReplyModel
+from src.media.image_variants import delete_image
+
+"""
+Service post lifecycle.
+A periodic job moves posts whose availability has ended out of the open states: pending posts
+become expired, matched posts become completed. Finished posts (completed / expired / canceled)
+are moved to the service_archive collection SERVICE_ARCHIVE_AFTER_DAYS after their last status change,
+so the board's hot collection only holds live posts; their replies and threads move to the reply
+archive collections and their images are deleted. Every step works in batches of BATCH_SIZE with
+one bulk_write per batch. Each update is guarded by the status it expects and stamps the batch's
+own lifecycle_run id, so when several workers run the job at once each post is changed, and
+emitted as service_status to its author and matched user, by exactly one of them.
+"""
+
+archive_collection = db["service_archive"]
+
+# Job settings, overridable from app.config in init_service_lifecycle()
+LIFECYCLE_SETTINGS = {
+    "SERVICE_LIFECYCLE_ENABLED": os.getenv("SERVICE_LIFECYCLE_ENABLED", "true").lower() == "true",
+    "SERVICE_LIFECYCLE_INTERVAL_SECONDS": int(os.getenv("SERVICE_LIFECYCLE_INTERVAL_SECONDS", 3600)),
+    "SERVICE_ARCHIVE_AFTER_DAYS": int(os.getenv("SERVICE_ARCHIVE_AFTER_DAYS", 30)),
+}
+
+BATCH_SIZE = 500
+
+# Posts that are past their availability move to the paired status
+END_OF_AVAILABILITY_TRANSITIONS = [
+    ("pending", "expired"),
+    ("matched", "completed"),
+]
+
+FINISHED_STATUSES = ["completed", "expired", "canceled"]
+
+LIFECYCLE_PROJECTION = {"_id": 1, "user_name": 1, "matched_user.user_name": 1, "status": 1}
+
+# Finished posts claimed for archiving by a run, re-read so only that run archives and emits them
+ARCHIVE_CLAIM_PROJECTION = {"replies": 0, "archive_claimed_at": 0}
+
+# A claim older than this belongs to a run that died mid-batch and can be taken over
+ARCHIVE_CLAIM_TIMEOUT = timedelta(hours=1)
+
+declare_indexes(
+    "service",
+    # Posts of one status whose availability ended before a day
+    IndexModel([("status", ASCENDING), ("availability.end", ASCENDING)], name="status_1_availability.end_1"),
+    # Finished posts by the time they were finished, for archiving
+    IndexModel([("status", ASCENDING), ("status_changed_at", ASCENDING)], name="status_1_status_changed_at_1"),
+)
+
+declare_indexes(
+    "service_archive",
+    IndexModel([("user_name", ASCENDING), ("archived_at", ASCENDING)], name="user_name_1_archived_at_1"),
+)
+
+
+def _emit_status_changes(emitter, services, status):
+    if emitter is None:
+        return
+    from src.socket_config import user_room
+    for service in services:
+        payload = {"service_id": str(service["_id"]), "status": status}
+        recipients = {service.get("user_name"), (service.get("matched_user") or {}).get("user_name")}
+        for user_name in recipients:
+            if user_name:
+                emitter.emit("service_status", payload, room=user_room(user_name))
+
+
+def transition_ended_posts(from_status, to_status, today=None, emitter=None):
+    """
+    Move posts in from_status whose availability.end is before today to to_status
+
+    Returns:
+        int: Number of posts moved
+    """
+    today = (today or date.today()).isoformat()
+    query = {"status": STATUS_TO_INT[from_status], "availability.end": {"$lt": today}}
+    moved = 0
+    while True:
+        batch = list(services_collection.find(query, {"_id": 1}).limit(BATCH_SIZE))
+        if not batch:
+            return moved
+        run_id = ObjectId()
+        operations = [
+            UpdateOne(
+                {"_id": service["_id"], "status": STATUS_TO_INT[from_status]},
+                {"$set": {"status": STATUS_TO_INT[to_status], "status_changed_at": datetime.utcnow(),
+                          "lifecycle_run": run_id}}
+            )
+            for service in batch
+        ]
+        result = services_collection.bulk_write(operations, ordered=False)
+        moved += result.modified_count
+        if result.modified_count:
+            # Posts another worker moved first carry its run id, not this one
+            changed = services_collection.find(
+                {"_id": {"$in": [service["_id"] for service in batch]}, "lifecycle_run": run_id},
+                LIFECYCLE_PROJECTION
+            )
+            _emit_status_changes(emitter, changed, to_status)
+        if len(batch) < BATCH_SIZE:
+            return moved
+
+
+def archive_finished_posts(archive_after_days=None, emitter=None):
+    """
+    Move finished posts whose last status change is older than archive_after_days into
+    service_archive, with their replies, and delete their images. A batch is first claimed with
+    this run's id, then upserted into the archive before it is deleted from the service
+    collection, so an interrupted run never loses a post and two runs never archive the same one.
+
+    Returns:
+        int: Number of posts archived
+    """
+    if archive_after_days is None:
+        archive_after_days = LIFECYCLE_SETTINGS["SERVICE_ARCHIVE_AFTER_DAYS"]
+    cutoff = datetime.utcnow() - timedelta(days=archive_after_days)
+    archived = 0
+    while True:
+        claimable = {"$or": [
+            {"archive_claimed_at": {"$exists": False}},
+            {"archive_claimed_at": {"$lt": datetime.utcnow() - ARCHIVE_CLAIM_TIMEOUT}},
+        ]}
+        query = {
+            "status": {"$in": [STATUS_TO_INT[status] for status in FINISHED_STATUSES]},
+            "status_changed_at": {"$lt": cutoff},
+            **claimable,
+        }
+        candidates = [service["_id"] for service in services_collection.find(query, {"_id": 1}).limit(BATCH_SIZE)]
+        if not candidates:
+            return archived
+        run_id = ObjectId()
+        services_collection.update_many(
+            {"_id": {"$in": candidates}, **claimable},
+            {"$set": {"archive_run": run_id, "archive_claimed_at": datetime.utcnow()}}
+        )
+        batch = list(services_collection.find({"_id": {"$in": candidates}, "archive_run": run_id},
+                                              ARCHIVE_CLAIM_PROJECTION))
+        if batch:
+            ids = [service["_id"] for service in batch]
+            now = datetime.utcnow()
+            archive_collection.bulk_write(
+                [ReplaceOne({"_id": service["_id"]},
+                            {**service, "pet_image": None, "archive_run": None, "archived_at": now}, upsert=True)
+                 for service in batch],
+                ordered=False
+            )
+            ReplyModel.archive_for_services(ids)
+            for service in batch:
+                if service.get("pet_image"):
+                    try:
+                        delete_image(service["pet_image"])
+                    except Exception as e:
+                        print(f"Could not delete image {service['pet_image']} of {service['_id']}: {e}")
+            result = services_collection.delete_many({"_id": {"$in": ids}, "archive_run": run_id})
+            archived += result.deleted_count
+            _emit_status_changes(emitter, batch, "archived")
+        if len(candidates) < BATCH_SIZE:
+            return archived
+
+
+def run_service_lifecycle(emitter=None, today=None):
+    """
+    One pass of the lifecycle job
+
+    Args:
+        emitter: A SocketIO instance to emit service_status with, or None to emit nothing
+        today: The current day, for tests and backfills
+
+    Returns:
+        dict: Posts moved per transition, and the number archived
+    """
+    report = {}
+    for from_status, to_status in END_OF_AVAILABILITY_TRANSITIONS:
+        report[f"{from_status}->{to_status}"] = transition_ended_posts(from_status, to_status, today, emitter)
+    report["archived"] = archive_finished_posts(emitter=emitter)
+    return report
+
+
+def init_service_lifecycle(app, socketio):
+    """
+    Run the lifecycle job every SERVICE_LIFECYCLE_INTERVAL_SECONDS as a Socket.IO background task
+    """
+    for key in LIFECYCLE_SETTINGS:
+        if key in app.config:
+            LIFECYCLE_SETTINGS[key] = app.config[key]
+    if not LIFECYCLE_SETTINGS["SERVICE_LIFECYCLE_ENABLED"]:
+        print("Service lifecycle job disabled")
+        return
+
+    def run_periodically():
+        while True:
+            socketio.sleep(LIFECYCLE_SETTINGS["SERVICE_LIFECYCLE_INTERVAL_SECONDS"])
+            try:
+                report = run_service_lifecycle(emitter=socketio)
+                print(f"Service lifecycle: {report}")
+            except Exception as e:
+                print(f"Service lifecycle job failed: {e}")
+
+    socketio.start_background_task(run_periodically)
@@ -1,54 +1,224 @@
-from flask_socketio import SocketIO
+import os
+import time
+from collections import deque
+from flask import request, session
+from flask_socketio import SocketIO, join_room, leave_room
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+"""
+Room-scoped Socket.IO fan-out.
+A connection is only accepted with a valid JWT cookie and is joined to its user:<name> room.
+Clients then subscribe to the item:<id> / event:<id> rooms (and the events feed room) they
+are looking at, and every emit targets a room, so each update reaches only interested clients.
+
+With SOCKETIO_MESSAGE_QUEUE set (redis://, rediss://, amqp:// or any other Kombu URL), every
+emit is published to the queue and delivered by whichever worker holds the recipient's
+connection, so the app can run on several eventlet workers. Left unset (or "local"), emits
+stay in-process, which is what a single worker and local development need.
+"""
+
+# Message queue settings, overridable from app.config in init_socketio()
+SOCKETIO_SETTINGS = {
+    "SOCKETIO_MESSAGE_QUEUE": os.getenv("SOCKETIO_MESSAGE_QUEUE", "local"),
+    "SOCKETIO_CHANNEL": os.getenv("SOCKETIO_CHANNEL", "pawfectly-socketio"),
+    # Chat messages one connection may send per CHAT_RATE_WINDOW_SECONDS
+    "SOCKETIO_CHAT_RATE_LIMIT": int(os.getenv("SOCKETIO_CHAT_RATE_LIMIT", 10)),
+}
 
 # Initialize without app
 socketio = SocketIO()
 
+# Room for clients showing the event feed, they receive new_event
+EVENTS_FEED_ROOM = "events"
+
+# Rooms a client may join itself; user rooms are only joined at connect time
+SUBSCRIBABLE_PREFIXES = ("item:", "event:")
+
+# Upper bound on rooms one connection can subscribe to
+MAX_SUBSCRIPTIONS = 200
+
+# Backpressure. Inbound: packet size (max_http_buffer_size) and a per-connection chat rate.
+# Outbound: Engine.IO writes to each connection from its own task, so a slow client never blocks
+# the hub; a client that stops reading stops answering pings and is disconnected once
+# PING_TIMEOUT_SECONDS pass, which releases its buffer. It reconnects and fetches the gap with ?since=.
+MAX_INBOUND_BYTES = 64 * 1024
+CHAT_RATE_WINDOW_SECONDS = 5
+PING_INTERVAL_SECONDS = 20
+PING_TIMEOUT_SECONDS = 15
+
+
+def user_room(user_name):
+    return f"user:{user_name}"
+
+
+def item_room(item_id):
+    return f"item:{item_id}"
+
+
+def event_room(event_id):
+    return f"event:{event_id}"
+
+
+def message_queue_url():
+    """
+    The configured message queue URL, or None for the in-process backend
+    """
+    url = SOCKETIO_SETTINGS["SOCKETIO_MESSAGE_QUEUE"]
+    if not url or url == "local":
+        return None
+    return url
+
+
+def create_external_emitter():
+    """
+    A write-only SocketIO for processes that emit but serve no clients (scripts, background jobs).
+    Emits go through the message queue to the workers holding the connections; without a queue
+    there is no way to reach another process, so the in-process instance is returned.
+    """
+    url = message_queue_url()
+    if url is None:
+        return socketio
+    return SocketIO(message_queue=url, channel=SOCKETIO_SETTINGS["SOCKETIO_CHANNEL"])
+
+
 def init_socketio(app):
-    # Configure socketio with app
-    socketio.init_app(app, cors_allowed_origins="*")
-    
+    for key in SOCKETIO_SETTINGS:
+        if key in app.config:
+            SOCKETIO_SETTINGS[key] = app.config[key]
+
+    # Configure socketio with app, sharing emits across workers when a message queue is configured
+    url = message_queue_url()
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        message_queue=url,
+        channel=SOCKETIO_SETTINGS["SOCKETIO_CHANNEL"],
+        max_http_buffer_size=MAX_INBOUND_BYTES,
+        ping_interval=PING_INTERVAL_SECONDS,
+        ping_timeout=PING_TIMEOUT_SECONDS,
+    )
+    print(f"Socket.IO message queue: {url or 'local (single process)'}")
+
     # Register socket event handlers
     register_handlers()
-    
+
     return socketio
 
+
+def _allow_chat_send():
+    # Sliding-window rate limit per connection
+    now = time.monotonic()
+    sent = session.setdefault("chat_sent", deque())
+    while sent and now - sent[0] > CHAT_RATE_WINDOW_SECONDS:
+        sent.popleft()
+    if len(sent) >= SOCKETIO_SETTINGS["SOCKETIO_CHAT_RATE_LIMIT"]:
+        return False
+    sent.append(now)
+    return True
+
+
+def _can_subscribe(room):
+    return isinstance(room, str) and (room == EVENTS_FEED_ROOM or room.startswith(SUBSCRIBABLE_PREFIXES))
+
+
 # add your socketio event handlers here
 def register_handlers():
     # Socket.IO event handlers
     @socketio.on('connect')
-    def handle_connect():
-        print('Client connected')
+    def handle_connect(auth=None):
+        # Authenticate with the same JWT cookie as the REST API
+        try:
+            verify_jwt_in_request(locations=["cookies"])
+        except Exception as e:
+            print(f'Rejected socket connection: {e}')
+            return False
+
+        user_name = get_jwt_identity()
+        session["user_name"] = user_name
+        session["subscriptions"] = set()
+        join_room(user_room(user_name))
+        print(f'Client connected: {user_name} ({request.sid})')
 
     @socketio.on('disconnect')
     def handle_disconnect():
-        print('Client disconnected')
-
-    @socketio.on('message')
-    def handle_message(data):
-        print(f'Received message: {data}')
-        # Broadcast to all clients
-        socketio.emit('message', data)
-    
-    # Follow-related event handlers
+        # Rooms are left automatically when the connection closes
+        print(f'Client disconnected: {session.get("user_name")} ({request.sid})')
+
+    @socketio.on('subscribe')
+    def handle_subscribe(data):
+        subscriptions = session.setdefault("subscriptions", set())
+        rooms = [room for room in (data or {}).get("rooms", []) if _can_subscribe(room)]
+        for room in rooms:
+            if room in subscriptions:
+                continue
+            if len(subscriptions) >= MAX_SUBSCRIPTIONS:
+                return {"error": "Too many subscriptions", "subscribed": sorted(subscriptions)}
+            join_room(room)
+            subscriptions.add(room)
+        return {"subscribed": sorted(subscriptions)}
+
+    @socketio.on('unsubscribe')
+    def handle_unsubscribe(data):
+        subscriptions = session.setdefault("subscriptions", set())
+        for room in (data or {}).get("rooms", []):
+            if room in subscriptions:
+                leave_room(room)
+                subscriptions.discard(room)
+        return {"subscribed": sorted(subscriptions)}
+
+    @socketio.on('chat_send')
+    def handle_chat_send(data):
+        # Persisted and pushed to item:<id> by the same path as POST /chats/send;
+        # the sender is the authenticated user, not whatever the client claims
+        from src.routes.chat_routes import publish_message, MAX_MESSAGE_LENGTH
+        from src.models.user_model import find_user_by_username
+
+        data = data or {}
+        item_id = data.get("item_id")
+        content = (data.get("content") or "").strip()
+        if not item_id or not content or len(content) > MAX_MESSAGE_LENGTH:
+            return {"error": "Invalid message"}
+        if not _allow_chat_send():
+            return {"error": "Too many messages, slow down"}
+
+        if "user_id" not in session:
+            user = find_user_by_username(session.get("user_name"))
+            if not user:
+                return {"error": "Unknown user"}
+            session["user_id"] = str(user["_id"])
+
+        message = publish_message(item_id, session["user_id"], session["user_name"], content)
+        return {"message": message, "client_id": data.get("client_id")}
+
+    # Follow-related event handlers, each delivered to the users involved only
     @socketio.on('follow_request')
     def handle_follow_request(data):
         print(f'Follow request: {data}')
-        socketio.emit('follow_request_received', data)
-    
+        target = (data or {}).get("to")
+        if target:
+            socketio.emit('follow_request_received', {**data, "from": session.get("user_name")},
+                          room=user_room(target))
+
     @socketio.on('follow_request_response')
     def handle_follow_response(data):
         print(f'Follow response: {data}')
-        socketio.emit('follow_request_updated', data)
-    
+        target = (data or {}).get("to")
+        if target:
+            socketio.emit('follow_request_updated', {**data, "from": session.get("user_name")},
+                          room=user_room(target))
+
     @socketio.on('unfollow')
     def handle_unfollow(data):
         print(f'Unfollow: {data}')
-        socketio.emit('follower_update', data)
+        following = (data or {}).get("following")
+        if following:
+            emit_follow_update({**data, "follower": session.get("user_name")},
+                               [session.get("user_name"), following])
 
 def send_message(event_name, data, room=None):
     """
     Send a message to a specific room or broadcast
-    
+
     Args:
         event_name: The event name the client will listen for
         data: The data to send
@@ -59,11 +229,13 @@ def send_message(event_name, data, room=None):
     else:
         socketio.emit(event_name, data)
 
-def emit_follow_update(data):
+def emit_follow_update(data, user_names):
     """
-    Emit a follow update event to all connected clients
-    
+    Emit a follow update event to the users it concerns
+
     Args:
         data: Dictionary containing follower and following counts
+        user_names: The users whose rooms receive the update, usually follower and followed
     """
-    socketio.emit('follower_update', data)
\ No newline at end of file
+    for user_name in set(name for name in user_names if name):
+        socketio.emit('follower_update', data, room=user_room(user_name))
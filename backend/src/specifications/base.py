@@ -0,0 +1,83 @@
+class Specification:
+    def to_query(self):
+        raise NotImplementedError("You must implement to_query() in subclasses")
+
+    def fields(self):
+        # Top-level document fields this spec filters on, used to choose an index hint
+        return set(self.to_query().keys())
+
+    def __and__(self, other):
+        return AndSpec(self, other)
+
+    def __or__(self, other):
+        return OrSpec(self, other)
+
+    def __invert__(self):
+        return NotSpec(self)
+
+
+class AndSpec(Specification):
+    def __init__(self, *specs):
+        # Flatten nested ANDs so (a & b) & c compiles to a single $and
+        self.specs = []
+        for spec in specs:
+            if isinstance(spec, AndSpec):
+                self.specs.extend(spec.specs)
+            elif spec is not None:
+                self.specs.append(spec)
+
+    def to_query(self):
+        queries = [spec.to_query() for spec in self.specs]
+        queries = [q for q in queries if q]
+        if not queries:
+            return {}
+        if len(queries) == 1:
+            return queries[0]
+
+        # Keep the flat form when no two clauses touch the same key, otherwise use an explicit $and
+        # so that e.g. two price ranges both apply instead of the last one silently winning
+        keys = [key for q in queries for key in q]
+        if len(keys) == len(set(keys)):
+            merged = {}
+            for q in queries:
+                merged.update(q)
+            return merged
+        return {"$and": queries}
+
+    def fields(self):
+        return set().union(*(spec.fields() for spec in self.specs)) if self.specs else set()
+
+
+class OrSpec(Specification):
+    def __init__(self, *specs):
+        self.specs = []
+        for spec in specs:
+            if isinstance(spec, OrSpec):
+                self.specs.extend(spec.specs)
+            elif spec is not None:
+                self.specs.append(spec)
+
+    def to_query(self):
+        # An empty $or is rejected by MongoDB, and {} would match everything instead of nothing
+        if not self.specs:
+            raise ValueError("OrSpec needs at least one specification")
+        queries = [spec.to_query() for spec in self.specs]
+        if len(queries) == 1:
+            return queries[0]
+        return {"$or": queries}
+
+    def fields(self):
+        # An $or can only use an index per branch, so it never narrows the compound index choice
+        return set()
+
+
+class NotSpec(Specification):
+    def __init__(self, spec):
+        self.spec = spec
+
+    def to_query(self):
+        # MongoDB has no top-level $not; $nor with a single clause is the equivalent
+        return {"$nor": [self.spec.to_query()]}
+
+    def fields(self):
+        return set()
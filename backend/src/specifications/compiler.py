@@ -0,0 +1,141 @@
+from src.specifications.base import AndSpec, OrSpec, NotSpec
+
+"""
+Compiles a specification tree into a MongoDB query plus the index it is expected to use.
+The expected index is only advisory: queries run without a hint so they keep working (and let
+the planner choose) on databases where `flask ensure-indexes` has not been run yet. explain()
+and the benchmarks can force it to compare plans.
+Geo specs ($near / $geoNear) must sit at the top level of the tree, since MongoDB rejects them
+inside $or / $nor, so the compiler lifts them out and returns them separately.
+"""
+
+
+class IndexHint:
+    def __init__(self, name, required_fields):
+        self.name = name
+        self.required_fields = set(required_fields)
+
+    def matches(self, fields):
+        return self.required_fields.issubset(fields)
+
+
+class CompiledQuery:
+    def __init__(self, query, geo=None, hint=None):
+        self.query = query
+        self.geo = geo
+        self.hint = hint
+
+    def find(self, collection, projection=None, force_hint=False):
+        """
+        Run the query. The hint is only applied when force_hint is set (explain / benchmarks):
+        hinting an index that does not exist fails the whole query.
+        """
+        cursor = collection.find(self.query, projection)
+        if force_hint and self.hint:
+            cursor = cursor.hint(self.hint)
+        return cursor
+
+
+def _contains_geo(spec):
+    if getattr(spec, "is_geo", False):
+        return True
+    if isinstance(spec, (AndSpec, OrSpec)):
+        return any(_contains_geo(child) for child in spec.specs)
+    if isinstance(spec, NotSpec):
+        return _contains_geo(spec.spec)
+    return False
+
+
+def compile_specification(spec, index_hints=()):
+    """
+    Compile a specification into a CompiledQuery
+
+    Args:
+        spec: A Specification, usually an AndSpec of the active filters
+        index_hints: IndexHint candidates in order of preference; the first whose required
+            fields are all filtered on is recorded as the expected index. Geo queries never get
+            one since $geoNear always runs on the 2dsphere index.
+
+    Raises:
+        ValueError: If more than one geo spec is given or a geo spec is nested under OR / NOT
+    """
+    clauses = spec.specs if isinstance(spec, AndSpec) else [spec]
+
+    geo_specs = [clause for clause in clauses if getattr(clause, "is_geo", False)]
+    if len(geo_specs) > 1:
+        raise ValueError("Only one geo specification can be applied to a query")
+    rest = AndSpec(*[clause for clause in clauses if not getattr(clause, "is_geo", False)])
+    if _contains_geo(rest):
+        raise ValueError("Geo specifications cannot be nested under OR / NOT")
+
+    geo = geo_specs[0] if geo_specs else None
+    hint = None
+    if geo is None:
+        fields = rest.fields()
+        hint = next((candidate.name for candidate in index_hints if candidate.matches(fields)), None)
+
+    return CompiledQuery(rest.to_query(), geo=geo, hint=hint)
+
+
+def _collect_plan(node, stages, index_names):
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "indexName" in node:
+            index_names.append(node["indexName"])
+        for value in node.values():
+            _collect_plan(value, stages, index_names)
+    elif isinstance(node, list):
+        for value in node:
+            _collect_plan(value, stages, index_names)
+
+
+def _find_winning_plan(node):
+    if isinstance(node, dict):
+        if "winningPlan" in node:
+            return node["winningPlan"]
+        for value in node.values():
+            plan = _find_winning_plan(value)
+            if plan is not None:
+                return plan
+    elif isinstance(node, list):
+        for value in node:
+            plan = _find_winning_plan(value)
+            if plan is not None:
+                return plan
+    return None
+
+
+def explain(collection, compiled, force_hint=False):
+    """
+    Ask MongoDB which plan it picks for a compiled query
+
+    Args:
+        force_hint: Explain the plan with the expected index forced, instead of the planner's choice
+
+    Returns:
+        dict: The query, the expected index, whether the winning plan uses it, the stages and
+            index names of the winning plan, and the raw plan
+    """
+    if compiled.geo:
+        pipeline = [compiled.geo.to_geo_near_stage(compiled.query)]
+        result = collection.database.command(
+            "explain",
+            {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+            verbosity="queryPlanner",
+        )
+    else:
+        result = compiled.find(collection, force_hint=force_hint).explain()
+
+    winning_plan = _find_winning_plan(result) or {}
+    stages, index_names = [], []
+    _collect_plan(winning_plan, stages, index_names)
+    return {
+        "query": compiled.query,
+        "hint": compiled.hint,
+        "uses_hint": compiled.hint in index_names if compiled.hint else None,
+        "geo": compiled.geo is not None,
+        "stages": stages,
+        "index_names": index_names,
+        "winning_plan": winning_plan,
+    }
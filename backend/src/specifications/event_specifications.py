@@ -0,0 +1,59 @@
+from src.specifications.base import Specification, AndSpec
+from src.specifications.compiler import IndexHint, compile_specification
+from src.specifications.geo_specifications import DistanceSpec
+
+# Feed order is (event_date, event_time, _id); the same index serves upcoming (ascending)
+# and past (descending) pages. event_date / event_time are "YYYY-MM-DD" / "HH:MM" strings,
+# which sort chronologically as plain strings.
+EVENTS_DATE_INDEX = "event_date_1_event_time_1__id_1"
+EVENTS_LOCATION_INDEX = "location_2dsphere"
+
+# Expected index of the feed query, reported by explain(). Not forced at runtime: the feed has to
+# keep working before `flask ensure-indexes` has built it.
+EVENT_FEED_INDEX_HINTS = [
+    IndexHint(EVENTS_DATE_INDEX, {"event_date"}),
+]
+
+
+class DateWindowSpec(Specification):
+    def __init__(self, on_or_after=None, on_or_before=None, before=None):
+        self.on_or_after = on_or_after
+        self.on_or_before = on_or_before
+        self.before = before
+
+    def to_query(self):
+        bounds = {}
+        if self.on_or_after:
+            bounds["$gte"] = self.on_or_after
+        if self.on_or_before:
+            bounds["$lte"] = self.on_or_before
+        if self.before:
+            bounds["$lt"] = self.before
+        if not bounds:
+            return {}
+        return {
+            "event_date": bounds
+        }
+
+
+# Page predicate: resume the feed after the last (event_date, event_time, _id) seen.
+class AfterEventSpec(Specification):
+    def __init__(self, event_date, event_time, last_id, descending=False):
+        self.event_date = event_date
+        self.event_time = event_time
+        self.last_id = last_id
+        self.descending = descending
+
+    def to_query(self):
+        op = "$lt" if self.descending else "$gt"
+        return {
+            "$or": [
+                {"event_date": {op: self.event_date}},
+                {"event_date": self.event_date, "event_time": {op: self.event_time}},
+                {"event_date": self.event_date, "event_time": self.event_time, "_id": {op: self.last_id}},
+            ]
+        }
+
+
+def compile_event_feed_query(specs):
+    return compile_specification(AndSpec(*specs), EVENT_FEED_INDEX_HINTS)
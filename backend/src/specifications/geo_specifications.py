@@ -0,0 +1,54 @@
+from src.specifications.base import Specification
+from src.utils.geo import geo_near_stage, EARTH_RADIUS_KM
+
+# Shared by every collection that stores a GeoJSON Point under "location" with a 2dsphere index.
+
+EARTH_RADIUS_METERS = EARTH_RADIUS_KM * 1000
+
+
+class DistanceSpec(Specification):
+    is_geo = True
+
+    def __init__(self, lng, lat, radius_meters, min_distance_meters=None):
+        self.lng = lng
+        self.lat = lat
+        self.radius = radius_meters
+        self.min_distance = min_distance_meters
+
+    def to_query(self):
+        near = {
+            "$geometry": {
+                "type": "Point",
+                "coordinates": [self.lng, self.lat]
+            },
+            "$maxDistance": self.radius
+        }
+        if self.min_distance is not None:
+            near["$minDistance"] = self.min_distance
+        return {
+            "location": {
+                "$near": near
+            }
+        }
+
+    def to_geo_near_stage(self, query=None):
+        # $geoNear returns the distance from the database instead of just sorting by it
+        return geo_near_stage(self.lng, self.lat, self.radius, query, self.min_distance)
+
+
+# $geoWithin filters without sorting by distance, so it can sit next to any other predicate
+# (including under $or) and leaves the listing's own sort order in place.
+class WithinRadiusSpec(Specification):
+    def __init__(self, lng, lat, radius_meters):
+        self.lng = lng
+        self.lat = lat
+        self.radius = radius_meters
+
+    def to_query(self):
+        return {
+            "location": {
+                "$geoWithin": {
+                    "$centerSphere": [[self.lng, self.lat], self.radius / EARTH_RADIUS_METERS]
+                }
+            }
+        }
@@ -1,6 +1,14 @@
-class Specification:
-    def to_query(self):
-        raise NotImplementedError("You must implement to_query() in subclasses")
+from src.specifications.base import Specification, AndSpec
+from src.specifications.compiler import IndexHint, compile_specification
+from src.specifications.geo_specifications import DistanceSpec
+
+# Compound index for marketplace filters, in equality / sort / range order:
+# type equality, then _id for the keyset sort, then the price range
+PETS_TYPE_PRICE_INDEX = "type_1__id_1_price_1"
+
+MARKETPLACE_INDEX_HINTS = [
+    IndexHint(PETS_TYPE_PRICE_INDEX, {"type"}),
+]
 
 
 class PriceRangeSpec(Specification):
@@ -27,28 +35,27 @@ class TypeSpec(Specification):
         }
 
 
-class DistanceSpec(Specification):
-    def __init__(self, lng, lat, radius_meters):
-        self.lng = lng
-        self.lat = lat
-        self.radius = radius_meters
+# Page predicates: compose with the filters above to resume a listing after a cursor.
+class AfterIdSpec(Specification):
+    def __init__(self, last_id):
+        self.last_id = last_id
 
     def to_query(self):
         return {
-            "location": {
-                "$near": {
-                    "$geometry": {
-                        "type": "Point",
-                        "coordinates": [self.lng, self.lat]
-                    },
-                    "$maxDistance": self.radius
-                }
-            }
+            "_id": {"$gt": self.last_id}
         }
 
 
-def combine_specifications(specs):
-    query = {}
-    for spec in specs:
-        query.update(spec.to_query())
-    return query
+class ExcludeIdsSpec(Specification):
+    def __init__(self, ids):
+        self.ids = ids
+
+    def to_query(self):
+        return {
+            "_id": {"$nin": self.ids}
+        }
+
+
+def compile_marketplace_query(specs):
+    return compile_specification(AndSpec(*specs), MARKETPLACE_INDEX_HINTS)
+
@@ -0,0 +1,142 @@
+from src.specifications.base import Specification, AndSpec
+from src.specifications.compiler import IndexHint, compile_specification
+from src.specifications.geo_specifications import WithinRadiusSpec, DistanceSpec
+
+# Board order is (post_time, _id), newest first. Each compound index puts one equality filter
+# in front of that order, so a filtered page is an index range read that stops after `limit`.
+SERVICES_CATEGORY_INDEX = "service_category_1_post_time_-1__id_-1"
+SERVICES_TYPE_INDEX = "service_type_1_post_time_-1__id_-1"
+SERVICES_STATUS_INDEX = "status_1_post_time_-1__id_-1"
+SERVICES_USER_INDEX = "user_name_1_post_time_-1__id_-1"
+SERVICES_POST_TIME_INDEX = "post_time_-1__id_-1"
+# The other board orders. Filters combine with these through the planner (equality-prefixed
+# variants of every order would be one index per filter per order).
+SERVICES_START_INDEX = "availability.start_-1__id_-1"
+SERVICES_END_INDEX = "availability.end_-1__id_-1"
+SERVICES_ACTIVITY_INDEX = "last_activity_at_-1__id_-1"
+# Geo prefix for $geoWithin / $geoNear, then the matchmaking equality fields and the start of
+# the availability interval, so a nearby-candidates search is answered from one index
+SERVICES_LOCATION_INDEX = "location_2dsphere_service_category_1_service_type_1_status_1_availability.start_1"
+# Matchmaking without a location: equality on the open opposite-side posts of a category, then
+# availability as an interval key. start <= request end bounds the scan, end >= request start is
+# checked on the index keys, so non-overlapping posts are skipped without fetching them.
+SERVICES_MATCH_INDEX = "service_category_1_service_type_1_status_1_availability.start_1_availability.end_1"
+
+# Board sort keys: query parameter -> field. Every order is (field, _id).
+# last_activity_at is the latest reply time, or the post time while a post has no replies.
+BOARD_SORT_FIELDS = {
+    "post_time": "post_time",
+    "start": "availability.start",
+    "end": "availability.end",
+    "last_activity": "last_activity_at",
+}
+
+BOARD_SORT_INDEXES = {
+    "start": SERVICES_START_INDEX,
+    "end": SERVICES_END_INDEX,
+    "last_activity": SERVICES_ACTIVITY_INDEX,
+}
+
+# Expected index of a post_time board page, reported by explain(). Not forced at runtime: the
+# board has to keep working before `flask ensure-indexes` has built it.
+# In order of preference: the most selective filter that is present picks the index
+SERVICE_BOARD_INDEX_HINTS = [
+    IndexHint(SERVICES_USER_INDEX, {"user_name"}),
+    IndexHint(SERVICES_LOCATION_INDEX, {"location"}),
+    IndexHint(SERVICES_CATEGORY_INDEX, {"service_category"}),
+    IndexHint(SERVICES_TYPE_INDEX, {"service_type"}),
+    IndexHint(SERVICES_STATUS_INDEX, {"status"}),
+    IndexHint(SERVICES_POST_TIME_INDEX, set()),
+]
+
+
+class FieldEqualsSpec(Specification):
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def to_query(self):
+        return {
+            self.field: self.value
+        }
+
+
+# Offers posted for "either" pet type match any pet type filter
+class PetTypeSpec(Specification):
+    def __init__(self, pet_type):
+        self.pet_type = pet_type
+
+    def to_query(self):
+        return {
+            "pet_type": {"$in": [self.pet_type, "either"]}
+        }
+
+
+class FieldPresentSpec(Specification):
+    def __init__(self, field, present=True):
+        self.field = field
+        self.present = present
+
+    def to_query(self):
+        if self.present:
+            return {self.field: {"$nin": [None, ""]}}
+        return {self.field: {"$in": [None, ""]}}
+
+
+# Overlap of the post's availability with [available_from, available_to]. Dates are
+# "YYYY-MM-DD" strings, which compare chronologically as plain strings.
+class AvailabilityWindowSpec(Specification):
+    def __init__(self, available_from=None, available_to=None):
+        self.available_from = available_from
+        self.available_to = available_to
+
+    def to_query(self):
+        query = {}
+        if self.available_from:
+            query["availability.end"] = {"$gte": self.available_from}
+        if self.available_to:
+            query["availability.start"] = {"$lte": self.available_to}
+        return query
+
+
+# Page predicate: resume the board after the last (field, _id) seen. Missing values sort as null,
+# below every value, and range operators never match null, so nulls get their own branches.
+class AfterSortKeySpec(Specification):
+    def __init__(self, field, value, last_id, descending=True):
+        self.field = field
+        self.value = value
+        self.last_id = last_id
+        self.descending = descending
+
+    def to_query(self):
+        op = "$lt" if self.descending else "$gt"
+        if self.value is None:
+            same_value = {self.field: None, "_id": {op: self.last_id}}
+            if self.descending:
+                return same_value
+            return {"$or": [same_value, {self.field: {"$ne": None}}]}
+
+        branches = [
+            {self.field: {op: self.value}},
+            {self.field: self.value, "_id": {op: self.last_id}},
+        ]
+        if self.descending:
+            branches.append({self.field: None})
+        return {"$or": branches}
+
+
+# Expected index of a matchmaking query without a location, for explain(); not forced at runtime
+MATCHMAKING_INDEX_HINTS = [
+    IndexHint(SERVICES_MATCH_INDEX, {"service_category", "service_type", "status"}),
+]
+
+
+def compile_service_board_query(specs, sort="post_time"):
+    if sort in BOARD_SORT_INDEXES:
+        return compile_specification(AndSpec(*specs), [IndexHint(BOARD_SORT_INDEXES[sort], set())])
+    return compile_specification(AndSpec(*specs), SERVICE_BOARD_INDEX_HINTS)
+
+
+def compile_matchmaking_query(specs):
+    return compile_specification(AndSpec(*specs), MATCHMAKING_INDEX_HINTS)
+
@@ -0,0 +1,106 @@
+import numpy as np
+
+"""
+Batch geo helpers for location-based queries.
+Distances are computed for a whole batch of GeoJSON points in one NumPy pass instead of
+running a haversine per document, and $geoNear stages let MongoDB return the distance itself
+when a 2dsphere index is available.
+"""
+
+EARTH_RADIUS_KM = 6371.0
+_MISSING_POINT = (np.nan, np.nan)
+
+
+def _point_or_missing(location):
+    if isinstance(location, dict) and location.get("type") == "Point":
+        point = location.get("coordinates")
+        if isinstance(point, (list, tuple)) and len(point) == 2:
+            return point
+    return _MISSING_POINT
+
+
+def to_geojson_point(location):
+    """
+    Normalize a client-supplied location to a GeoJSON Point
+
+    Accepts a GeoJSON Point, {"coordinate": [lng, lat]} as sent by the map pickers,
+    or {"lng": ..., "lat": ...}
+
+    Raises:
+        ValueError: If no valid longitude / latitude can be found
+    """
+    if not isinstance(location, dict):
+        raise ValueError("Location must be an object")
+    try:
+        if location.get("type") == "Point":
+            lng, lat = location["coordinates"]
+        elif "coordinate" in location:
+            lng, lat = location["coordinate"]
+        else:
+            lng, lat = location["lng"], location["lat"]
+        lng, lat = float(lng), float(lat)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Location must include longitude and latitude")
+    if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+        raise ValueError("Location coordinates are out of range")
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def extract_coordinates(documents, field="location"):
+    """
+    Pull [lng, lat] pairs out of GeoJSON Point fields
+
+    Returns:
+        np.ndarray: An (n, 2) float array, with NaN rows for documents without a valid point
+    """
+    points = [_point_or_missing(doc.get(field)) for doc in documents]
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def haversine_km(coords, lat, lng):
+    """
+    Great-circle distance from (lat, lng) to every [lng, lat] row in coords
+
+    Returns:
+        np.ndarray: Distances in kilometers, NaN where the coordinates are missing
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    lng1 = np.radians(coords[:, 0])
+    lat1 = np.radians(coords[:, 1])
+    lat2 = np.radians(lat)
+    lng2 = np.radians(lng)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def annotate_distances(documents, lat, lng, field="location", distance_field="distance"):
+    """
+    Set distance_field (km) on each document that has a valid point, in a single batch
+    """
+    if not documents:
+        return documents
+    distances = haversine_km(extract_coordinates(documents, field), lat, lng)
+    for doc, distance in zip(documents, distances.tolist()):
+        if distance == distance:  # NaN marks a document without a valid point
+            doc[distance_field] = distance
+    return documents
+
+
+def geo_near_stage(lng, lat, max_distance_meters, query=None, min_distance_meters=None,
+                   key="location", distance_field="distance"):
+    """
+    Build a $geoNear aggregation stage that returns distance_field in meters, sorted nearest first
+    """
+    stage = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": distance_field,
+        "maxDistance": max_distance_meters,
+        "spherical": True,
+        "key": key,
+    }
+    if query:
+        stage["query"] = query
+    if min_distance_meters is not None:
+        stage["minDistance"] = min_distance_meters
+    return {"$geoNear": stage}
@@ -0,0 +1,48 @@
+import base64
+import json
+
+"""
+Opaque keyset cursors shared by the paginated list endpoints.
+A cursor is the position of the last item a client has seen, serialized as url-safe base64 JSON,
+so clients can pass it back verbatim as ?cursor= without knowing its contents.
+"""
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(position):
+    if position is None:
+        return None
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        dict or None: The cursor position, or None when no cursor was given
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def parse_limit(raw_limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(raw_limit) if raw_limit is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
@@ -0,0 +1,134 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import g, has_request_context
+from src.db_config import db
+
+"""
+Request-scoped loader for user documents.
+Every lookup made during one request goes through the same cache, keyed by both _id and
+user_name, so each distinct user is fetched at most once. prime() batches several lookups into
+a single $in query. Documents never include the password hash; auth code that needs it keeps
+using find_user_by_username.
+"""
+
+# Fields never returned by the loader
+USER_LOADER_PROJECTION = {"password": 0}
+
+_MISSING = object()
+
+
+def _normalize_id(user_id):
+    if isinstance(user_id, ObjectId):
+        return user_id
+    try:
+        return ObjectId(user_id)
+    except (InvalidId, TypeError):
+        # Some legacy documents use plain string ids
+        return user_id
+
+
+class UserLoader:
+    def __init__(self):
+        self._by_name = {}
+        self._by_id = {}
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    def _cached(self, user_name=None, user_id=None):
+        if user_name is not None:
+            return self._by_name.get(user_name, _MISSING)
+        return self._by_id.get(user_id, _MISSING)
+
+    def _store(self, user):
+        self._by_name[user.get("user_name")] = user
+        self._by_id[user["_id"]] = user
+
+    def prime(self, user_names=(), user_ids=()):
+        """
+        Load every uncached user among user_names / user_ids with a single query
+        """
+        names = [n for n in dict.fromkeys(user_names) if n and n not in self._by_name]
+        ids = [i for i in dict.fromkeys(_normalize_id(i) for i in user_ids if i) if i not in self._by_id]
+        if not names and not ids:
+            return
+
+        clauses = []
+        if names:
+            clauses.append({"user_name": {"$in": names}})
+        if ids:
+            clauses.append({"_id": {"$in": ids}})
+        query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+        self.queries += 1
+        for user in db.users.find(query, USER_LOADER_PROJECTION):
+            self._store(user)
+
+        # Remember misses too, so a missing user is not queried again in this request
+        for name in names:
+            self._by_name.setdefault(name, None)
+        for user_id in ids:
+            self._by_id.setdefault(user_id, None)
+
+    def load_by_name(self, user_name):
+        if not user_name:
+            return None
+        user = self._cached(user_name=user_name)
+        if user is _MISSING:
+            self.misses += 1
+            self.prime(user_names=[user_name])
+            return self._by_name.get(user_name)
+        self.hits += 1
+        return user
+
+    def load_by_id(self, user_id):
+        if not user_id:
+            return None
+        user_id = _normalize_id(user_id)
+        user = self._cached(user_id=user_id)
+        if user is _MISSING:
+            self.misses += 1
+            self.prime(user_ids=[user_id])
+            return self._by_id.get(user_id)
+        self.hits += 1
+        return user
+
+    def invalidate(self, user_name=None, user_id=None):
+        """
+        Drop a user from the cache after it was modified in this request
+        """
+        user = self._by_name.pop(user_name, None) if user_name else None
+        if user_id is not None:
+            user = self._by_id.pop(_normalize_id(user_id), None) or user
+        if user:
+            self._by_name.pop(user.get("user_name"), None)
+            self._by_id.pop(user["_id"], None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "queries": self.queries}
+
+
+def get_user_loader():
+    """
+    Return the loader for the current request (a fresh one outside of a request)
+    """
+    if not has_request_context():
+        return UserLoader()
+    if "user_loader" not in g:
+        g.user_loader = UserLoader()
+    return g.user_loader
+
+
+def init_user_loader(app):
+    """
+    Report the loader's cache statistics on every response that used it
+    """
+    @app.after_request
+    def add_user_loader_stats(response):
+        loader = g.get("user_loader")
+        if loader is not None:
+            stats = loader.stats()
+            response.headers["X-User-Loader"] = (
+                f"hits={stats['hits']}; misses={stats['misses']}; queries={stats['queries']}"
+            )
+        return response
@@ -0,0 +1,48 @@
+// chat.js
+// Chat API functions: history over REST, live messages over Socket.IO
+import socketService from "./socketService";
+
+const BASE_URL = "http://localhost:5000/chats";
+
+// Resolves to { messages, before, after, has_more }, messages oldest first.
+// No cursor: the latest page. { before }: the page preceding it. { after }: the page following it.
+// has_more tells whether another page exists in the same direction.
+export async function fetchMessages(itemId, { before = null, after = null, limit = null } = {}) {
+  const params = new URLSearchParams();
+  if (before) params.append("before", before);
+  if (after) params.append("after", after);
+  if (limit) params.append("limit", limit);
+  const query = params.toString() ? `?${params.toString()}` : "";
+  const res = await fetch(`${BASE_URL}/${itemId}${query}`);
+  if (!res.ok) throw new Error("Failed to fetch messages");
+  return await res.json();
+}
+
+// Sends over the socket when connected (the server persists and pushes it to the item room),
+// otherwise falls back to the REST endpoint. Either way the server sets the sender from the
+// signed-in user. Resolves to the stored message.
+export function sendChatMessage({ itemId, content, clientId }) {
+  if (socketService.socket && socketService.connected) {
+    return new Promise((resolve, reject) => {
+      socketService.socket.emit("chat_send", { item_id: itemId, content, client_id: clientId }, (ack) => {
+        if (ack && ack.message) resolve(ack.message);
+        else reject(new Error((ack && ack.error) || "Failed to send message"));
+      });
+    });
+  }
+
+  return fetch(`${BASE_URL}/send`, {
+    method: "POST",
+    credentials: "include",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      itemId,
+      message: { content },
+    }),
+  })
+    .then((res) => res.json())
+    .then((data) => {
+      if (!data.success) throw new Error(data.error || "Failed to send message");
+      return data.message;
+    });
+}
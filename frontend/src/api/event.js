@@ -42,9 +42,15 @@ async function postEvent({ name, description, date, time, location, image }) {
     return res.json();
 }
 
-// Get all events from the server.
-async function getAllEvents() {
-    const res = await fetch(`${BASE_URL}/event`, {
+// Get one page of the event feed.
+// Resolves to { events, next_cursor, mode, limit }; pass next_cursor back to load the next page.
+async function getAllEvents({ mode = "upcoming", cursor = null, from = null, to = null } = {}) {
+    const params = new URLSearchParams({ mode });
+    if (cursor) params.append("cursor", cursor);
+    if (from) params.append("from", from);
+    if (to) params.append("to", to);
+
+    const res = await fetch(`${BASE_URL}/event?${params.toString()}`, {
         method: "GET",
         credentials: "include", // include credentials for CORS
     });
@@ -59,6 +65,26 @@ async function getAllEvents() {
     return data;
 }
 
+// Get upcoming events near a point, nearest first, each with "distance" in km.
+// Resolves to { events, limit }.
+async function getNearbyEvents({ lat, lng, radius = 10, from = null, to = null, limit = 20 }) {
+    const params = new URLSearchParams({ lat, lng, radius, limit });
+    if (from) params.append("from", from);
+    if (to) params.append("to", to);
+
+    const res = await fetch(`${BASE_URL}/event/nearby?${params.toString()}`, {
+        method: "GET",
+        credentials: "include", // include credentials for CORS
+    });
+
+    if (!res.ok) {
+        console.error("Error getting nearby events:", res.statusText);
+        throw new Error("Failed to get nearby events");
+    }
+
+    return res.json();
+}
+
 async function deleteEvent(eventId) {
     const res = await fetch(`${BASE_URL}/event/${eventId}/`, {
         method: "DELETE",
@@ -94,4 +120,4 @@ async function toggleAttendance(eventId) {
     return res.json();
 }
 
-export { postEvent, getAllEvents, toggleAttendance, deleteEvent };
+export { postEvent, getAllEvents, getNearbyEvents, toggleAttendance, deleteEvent };
@@ -1,5 +1,6 @@
 const BASE_URL = "http://127.0.0.1:5000/pets";
 
+// Resolves to { pets, next_cursor, limit }; pass next_cursor back as filters.cursor for the next page
 export async function fetchPets(filters = {}) {
   const params = new URLSearchParams(filters).toString();
   const res = await fetch(`${BASE_URL}?${params}`);
@@ -149,10 +149,12 @@ export const completeUserProfile = async (formData) => {
     };
   };
   
-  export const getFollowers = async (username) => {
+  // Resolves to { users, next_cursor, total }; pass next_cursor back to load the next page
+  export const getFollowers = async (username, cursor = null) => {
     if (!username) throw new Error("Username is required");
     
-    const res = await fetch(`${BASE_URL}/followers/${username}`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${BASE_URL}/followers/${username}${query}`, {
       method: "GET",
       credentials: "include",
     });
@@ -164,10 +166,12 @@ export const completeUserProfile = async (formData) => {
     return res.json();
   };
   
-  export const getFollowing = async (username) => {
+  // Resolves to { users, next_cursor, total }; pass next_cursor back to load the next page
+  export const getFollowing = async (username, cursor = null) => {
     if (!username) throw new Error("Username is required");
     
-    const res = await fetch(`${BASE_URL}/following/${username}`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${BASE_URL}/following/${username}${query}`, {
       method: "GET",
       credentials: "include",
     });
@@ -259,11 +263,13 @@ export const completeUserProfile = async (formData) => {
     }
   };
   
-  export const getUserReviews = async (username) => {
+  // Resolves to { reviews, next_cursor, rating, total_reviews, histogram }
+  export const getUserReviews = async (username, cursor = null) => {
     if (!username) throw new Error("Username is required");
     
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
     try {
-        const res = await fetch(`${BASE_URL}/reviews/${username}`, {
+        const res = await fetch(`${BASE_URL}/reviews/${username}${query}`, {
             method: "GET",
             credentials: "include",
             headers: {
@@ -312,11 +318,28 @@ export const completeUserProfile = async (formData) => {
     }
   };
   
-  export const getNotifications = async () => {
-    const response = await fetch(`${BASE_URL}/notifications`, {
+  // Returns { notifications, next_cursor, unread_count }; new ones arrive on the "notification" socket event
+  export const getNotifications = async (cursor = null, includeRead = false) => {
+    const params = new URLSearchParams();
+    if (cursor) params.set('cursor', cursor);
+    if (includeRead) params.set('include_read', 'true');
+    const query = params.toString();
+    const response = await fetch(`${BASE_URL}/notifications${query ? `?${query}` : ''}`, {
       credentials: 'include'
     });
     if (!response.ok) throw new Error('Failed to fetch notifications');
     return response.json();
   };
+
+  // Mark the given notification ids read, or everything when ids is omitted
+  export const markNotificationsRead = async (ids = null) => {
+    const response = await fetch(`${BASE_URL}/notifications/read`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      credentials: 'include',
+      body: JSON.stringify(ids ? { ids } : {})
+    });
+    if (!response.ok) throw new Error('Failed to mark notifications read');
+    return response.json();
+  };
   
\ No newline at end of file
@@ -42,8 +42,16 @@ export const postOffer = async (formData) => {
     return { status: res.status, data };
 };
 
-export const getServices = async () => {
-    const res = await fetch(`${BASE_URL}/`, {
+// One page of the board, newest first: { services, next_cursor, limit }.
+// Params: category, type (request / offer), status, pet_type, user_name, has_image, has_location,
+// available_from / available_to (YYYY-MM-DD), lat / lng / radius_km,
+// sort (post_time / start / end / last_activity), order (asc / desc), cursor, limit
+export const getServices = async (params = {}) => {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') query.set(key, value);
+    });
+    const res = await fetch(`${BASE_URL}/?${query.toString()}`, {
         method: "GET",
         credentials: "include",
     });
@@ -77,8 +85,10 @@ export const postReply = async (replyData) => {
     return { status: res.status, data };
 }
 
-export const getReplies = async (serviceId) => {
-    const res = await fetch(`${BASE_URL}/reply/${serviceId}`, {
+// { threads, reply_count, next_cursor }; each thread has its latest replies and a `before` cursor
+export const getReplies = async (serviceId, cursor = null) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const res = await fetch(`${BASE_URL}/reply/${serviceId}${query}`, {
         method: "GET",
         credentials: "include",
     });
@@ -88,75 +98,52 @@ export const getReplies = async (serviceId) => {
     return res.json();
 }
 
-// Filtered version of getServices
-export const getFilteredServices = async (filters = {}) => {
-    const allServices = await getServices();
-  
-    const { userName, serviceType, serviceCategory, petType, hasImage, hasLocation, hasRealName } = filters;
-  
-    return allServices.filter(service => {
-      if ((userName !== undefined) && service.user_name !== userName) return false;
-      if ((serviceType !== undefined) && service.service_type !== serviceType) return false;
-      if ((serviceCategory !== undefined) && service.service_category !== serviceCategory) return false;
-      if ((petType !== undefined) && service.pet_type !== petType && service.pet_type !== 'either') return false;
-      if ((hasImage !== undefined) && (hasImage !== !!(service.pet_image && service.pet_image !== 'null'))) return false;
-      if ((hasLocation !== undefined) && (hasLocation !== !!(service.location && service.location.place_name))) return false;
-      if ((hasRealName !== undefined) && (hasRealName !== !!(service.first_name && service.last_name))) return false;
-      return true;
+// Older replies of one thread: { replies, before, has_more }
+export const getThreadReplies = async (serviceId, threadOwner, before) => {
+    const query = before ? `?before=${encodeURIComponent(before)}` : '';
+    const res = await fetch(`${BASE_URL}/reply/${serviceId}/${encodeURIComponent(threadOwner)}${query}`, {
+        method: "GET",
+        credentials: "include",
     });
+    if (!res.ok) {
+      throw new Error(`Failed to fetch thread replies: ${res.status}`);
+    }
+    return res.json();
+}
+
+const SERVICE_TYPE_PARAM = { 0: 'request', 1: 'offer', request: 'request', offer: 'offer' };
+
+// Filtered version of getServices; the filters and the sort are applied by the server, one page at a time
+export const getFilteredServices = async (filters = {}, cursor = null, sortOptions = null) => {
+    const { userName, serviceType, serviceCategory, petType, hasImage, hasLocation } = filters;
+
+    const page = await getServices({
+      user_name: userName,
+      type: SERVICE_TYPE_PARAM[serviceType],
+      category: serviceCategory,
+      pet_type: petType,
+      has_image: hasImage,
+      has_location: hasLocation,
+      ...(sortOptions ? boardSortParams(sortOptions) : {}),
+      cursor,
+    });
+    return page;
   };
 
-export const sortServices = async (services, sortOptions) => {
-    const { by, order } = sortOptions;
+// Sort bar option -> server sort key. For the time-of-activity options the bar's 'asc' lists
+// the most recent posts first; for the availability options it lists the earliest first.
+const BOARD_SORTS = {
+    'Post Time': { sort: 'post_time', newestFirst: true },
+    'Latest Reply Time': { sort: 'last_activity', newestFirst: true },
+    'Start Time': { sort: 'start', newestFirst: false },
+    'End Time': { sort: 'end', newestFirst: false },
+};
+
+// { sort, order } query parameters for the sort bar's { by, order }
+export const boardSortParams = ({ by, order }) => {
+    const { sort, newestFirst } = BOARD_SORTS[by] || BOARD_SORTS['Post Time'];
     const isAsc = order === 'asc';
-  
-    if (by === 'Post Time') {
-      return services.sort((a, b) =>
-        (! isAsc) ? new Date(a.post_time) - new Date(b.post_time) : new Date(b.post_time) - new Date(a.post_time)
-      );
-    }
-  
-    if (by === 'Start Time') {
-      return services.sort((a, b) => {
-        const aTime = new Date(a.availability?.start || 0);
-        const bTime = new Date(b.availability?.start || 0);
-        return isAsc ? aTime - bTime : bTime - aTime;
-      });
-    }
-  
-    if (by === 'End Time') {
-      return services.sort((a, b) => {
-        const aTime = new Date(a.availability?.end || 0);
-        const bTime = new Date(b.availability?.end || 0);
-        return isAsc ? aTime - bTime : bTime - aTime;
-      });
-    }
-  
-    if (by === 'Latest Reply Time') {
-      const servicesWithReplies = await Promise.all(services.map(async (service) => {
-        try {
-          const replies = await getReplies(service._id);
-          let latestReplyTime = service.post_time;
-          Object.values(replies).forEach(thread => {
-            thread.forEach(replyObj => {
-              const [_, timestamp] = Object.values(replyObj)[0];
-              if (timestamp && (!latestReplyTime || timestamp > latestReplyTime)) {
-                latestReplyTime = timestamp;
-              }
-            });
-          });
-          return { ...service, latestReplyTime };
-        } catch {
-          return { ...service, latestReplyTime: service.post_time };
-        }
-      }));
-  
-      return servicesWithReplies.sort((a, b) =>
-        (! isAsc) ? new Date(a.latestReplyTime) - new Date(b.latestReplyTime) : new Date(b.latestReplyTime) - new Date(a.latestReplyTime)
-      );
-    }
-  
-    return services;
+    return { sort, order: isAsc === newestFirst ? 'desc' : 'asc' };
   };
   
 export const deleteService = async (serviceId) => {
@@ -171,6 +158,19 @@ export const deleteService = async (serviceId) => {
     return { status: res.status, data };
 };
 
+// Open posts of the other side ranked for this one: { candidates: [{ ...service, match: { score, overlap_days, distance_km } }] }
+export const getMatchCandidates = async (serviceId, radiusKm) => {
+    const query = radiusKm ? `?radius_km=${radiusKm}` : '';
+    const res = await fetch(`${BASE_URL}/${serviceId}/candidates${query}`, {
+        method: "GET",
+        credentials: "include",
+    });
+    if (!res.ok) {
+        throw new Error(`Failed to fetch match candidates: ${res.status}`);
+    }
+    return res.json();
+};
+
 export const confirmMatch = async (serviceId, targetUserName) => {
     const res = await fetch(`${BASE_URL}/match`, {
         method: "PUT",
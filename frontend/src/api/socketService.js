@@ -7,6 +7,8 @@ class SocketService {
     constructor() {
         this.socket = null;
         this.connected = false;
+        // rooms to (re)join on every connect, e.g. "events", "event:<id>", "item:<id>"
+        this.rooms = new Set();
     }
 
     connect() {
@@ -20,6 +22,10 @@ class SocketService {
         this.socket.on("connect", () => {
             console.log("Connected to socket server");
             this.connected = true;
+            // the server forgets subscriptions when the connection drops
+            if (this.rooms.size > 0) {
+                this.emitSubscribe([...this.rooms]);
+            }
         });
 
         this.socket.on("disconnect", () => {
@@ -33,6 +39,7 @@ class SocketService {
             this.socket.disconnect();
             this.socket = null;
             this.connected = false;
+            this.rooms.clear();
         }
     }
 
@@ -46,6 +53,44 @@ class SocketService {
         }
     }
 
+    // Join rooms to receive their updates; the user's own room is joined by the server.
+    // onRefused(rooms, error) is called with the rooms the server would not join,
+    // e.g. once the connection holds too many subscriptions
+    subscribe(rooms, onRefused) {
+        const added = rooms.filter((room) => !this.rooms.has(room));
+        added.forEach((room) => this.rooms.add(room));
+        if (added.length > 0 && this.socket && this.connected) {
+            this.emitSubscribe(added, onRefused);
+        }
+    }
+
+    emitSubscribe(rooms, onRefused) {
+        this.socket.emit("subscribe", { rooms }, (response) => {
+            if (!response || !response.error) return;
+            const joined = new Set(response.subscribed || []);
+            const refused = rooms.filter((room) => !joined.has(room));
+            // forget them, so they are neither counted as joined nor re-sent on reconnect
+            refused.forEach((room) => this.rooms.delete(room));
+            console.warn(`Socket: ${response.error}, not subscribed to ${refused.length} room(s)`);
+            if (onRefused) onRefused(refused, response.error);
+        });
+    }
+
+    unsubscribe(rooms) {
+        const removed = rooms.filter((room) => this.rooms.has(room));
+        removed.forEach((room) => this.rooms.delete(room));
+        if (removed.length > 0 && this.socket && this.connected) {
+            this.socket.emit("unsubscribe", { rooms: removed });
+        }
+    }
+
+    // Stop listening to an event
+    off(event, callback) {
+        if (this.socket) {
+            this.socket.off(event, callback);
+        }
+    }
+
     // Subscribe to an event
     on(event, callback) {
         if (this.socket) {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect } from 'react';
 import {
   Badge,
   IconButton,
@@ -14,32 +14,80 @@ import {
   Alert
 } from '@mui/material';
 import NotificationsIcon from '@mui/icons-material/Notifications';
-import { getNotifications } from '../api/profile';
+import { getNotifications, markNotificationsRead } from '../api/profile';
+import socketService from '../api/socketService';
+
+const describe = (notification) => {
+  const name = notification.from_user.name || notification.from_user.user_name;
+  switch (notification.type) {
+    case 'follow':
+      return `${name} started following you`;
+    case 'review':
+      return `${name} rated you ${notification.data.rating} stars`;
+    default:
+      return `New notification from ${name}`;
+  }
+};
 
 const NotificationBadge = () => {
   const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [anchorEl, setAnchorEl] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
-  const intervalRef = useRef(null);
 
   useEffect(() => {
     const fetchNotifications = async () => {
       try {
-        // Only fetch regular notifications, no follow requests
-        const notifs = await getNotifications();
-        setNotifications(notifs);
+        const page = await getNotifications();
+        setNotifications(page.notifications);
+        setNextCursor(page.next_cursor);
+        setUnreadCount(page.unread_count);
       } catch (err) {
         console.error('Error fetching notifications:', err);
       }
     };
-    
+
+    // Fetch once, then the server pushes new notifications to the user's room
+    const handleNotification = (payload) => {
+      setNotifications((prev) =>
+        prev.some((n) => n.id === payload.notification.id) ? prev : [payload.notification, ...prev]
+      );
+      setUnreadCount(payload.unread_count);
+    };
+
     fetchNotifications();
-    // Set up polling if needed
-    const interval = setInterval(fetchNotifications, 30000);
-    return () => clearInterval(interval);
+    socketService.on('notification', handleNotification);
+    return () => socketService.off('notification', handleNotification);
   }, []);
 
+  const loadMore = async () => {
+    if (!nextCursor || loading) return;
+    setLoading(true);
+    try {
+      const page = await getNotifications(nextCursor);
+      setNotifications((prev) => [...prev, ...page.notifications]);
+      setNextCursor(page.next_cursor);
+      setUnreadCount(page.unread_count);
+    } catch (err) {
+      setError('Failed to load notifications');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const markAllRead = async () => {
+    try {
+      const result = await markNotificationsRead();
+      setNotifications([]);
+      setNextCursor(null);
+      setUnreadCount(result.unread_count);
+    } catch (err) {
+      setError('Failed to mark notifications as read');
+    }
+  };
+
   const handleClick = (event) => {
     setAnchorEl(event.currentTarget);
   };
@@ -57,7 +105,7 @@ const NotificationBadge = () => {
   return (
     <>
       <IconButton color="inherit" onClick={handleClick}>
-        <Badge badgeContent={notifications.length} color="error">
+        <Badge badgeContent={unreadCount} color="error">
           <NotificationsIcon />
         </Badge>
       </IconButton>
@@ -81,11 +129,21 @@ const NotificationBadge = () => {
               {notifications.map((notification) => (
                 <ListItem key={notification.id} divider>
                   <ListItemText
-                    primary={notification.title}
-                    secondary={new Date(notification.date).toLocaleDateString()}
+                    primary={describe(notification)}
+                    secondary={new Date(notification.created_at).toLocaleDateString()}
                   />
                 </ListItem>
               ))}
+              <Box sx={{ display: 'flex', justifyContent: 'space-between', p: 1 }}>
+                <Button size="small" onClick={markAllRead}>
+                  Mark all as read
+                </Button>
+                {nextCursor && (
+                  <Button size="small" onClick={loadMore} disabled={loading}>
+                    {loading ? 'Loading...' : 'Load more'}
+                  </Button>
+                )}
+              </Box>
             </List>
           ) : (
             <Box sx={{ p: 2, textAlign: 'center' }}>
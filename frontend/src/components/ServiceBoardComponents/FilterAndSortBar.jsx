@@ -46,7 +46,6 @@ export default function FilterAndSortBar({ filters, setFilters, sortOptions, set
       petType: '',
       hasImage: '',
       hasLocation: '',
-      hasRealName: '',
       myServicesOnly: false,
     };
   
@@ -58,8 +57,6 @@ export default function FilterAndSortBar({ filters, setFilters, sortOptions, set
         newFilters.hasLocation = val === 'true';
       } else if (key === 'hasImage') {
         newFilters.hasImage = val === 'true';
-      } else if (key === 'hasRealName') {
-        newFilters.hasRealName = val === 'true';
       } else {
         newFilters[key] = val;
       }
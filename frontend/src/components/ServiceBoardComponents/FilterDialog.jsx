@@ -46,9 +46,6 @@ const groupedFilterOptions = [
   { group: 'Has Location', label: 'true', value: 'hasLocation:true' },
   { group: 'Has Location', label: 'false', value: 'hasLocation:false' },
 
-  { group: 'Has Real Name', label: 'true', value: 'hasRealName:true' },
-  { group: 'Has Real Name', label: 'false', value: 'hasRealName:false' },
-
   { group: 'My Services', label: 'true', value: 'myServices:true' },
   { group: 'My Services', label: 'false', value: 'myServices:false' },
 ];
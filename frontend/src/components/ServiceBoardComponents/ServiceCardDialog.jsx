@@ -17,8 +17,11 @@ import {
 import {
   postReply,
   getReplies,
+  getThreadReplies,
+  getMatchCandidates,
   confirmMatch
 } from '../../api/serviceBoard';
+import socketService from '../../api/socketService';
 
 const formatTime = (isoString) => {
   const date = new Date(isoString);
@@ -38,27 +41,82 @@ const categoryToDisplayNameMap = {
 
 const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) => {
   const [reply, setReply] = useState('');
-  const [replies, setReplies] = useState({});
+  const [threads, setThreads] = useState([]);
+  const [threadsCursor, setThreadsCursor] = useState(null);
+  const [candidates, setCandidates] = useState([]);
   const [replyInputs, setReplyInputs] = useState({});
   const [replyContentMap, setReplyContentMap] = useState({});
 
   const [matchDlgOpen, setMatchDlgOpen]   = useState(false);
   const [matchTarget, setMatchTarget]     = useState('');
 
+  // Add a reply pushed by the server (or returned by our own POST) to its thread
+  const mergeReply = ({ thread_owner, reply, reply_count }) => {
+    setThreads((prev) => {
+      const existing = prev.find((t) => t.thread_owner === thread_owner);
+      if (!existing) {
+        return [...prev, { thread_owner, replies: [reply], reply_count, has_more: false, before: null }];
+      }
+      if (existing.replies.some((r) => r._id === reply._id)) return prev;
+      return prev.map((t) => t.thread_owner === thread_owner
+        ? { ...t, replies: [...t.replies, reply], reply_count }
+        : t);
+    });
+  };
+
   useEffect(() => {
     if (open && service?._id) {
       const fetchReplies = async () => {
         try {
           const res = await getReplies(service._id);
-          setReplies(res);
+          setThreads(res.threads);
+          setThreadsCursor(res.next_cursor);
         } catch (err) {
           console.error("Failed to fetch replies:", err);
         }
       };
       fetchReplies();
+
+      // New replies arrive over the socket for posts we authored or replied to
+      const handleReply = (payload) => {
+        if (payload.service_id === service._id) mergeReply(payload);
+      };
+      socketService.on('service_reply', handleReply);
+      return () => socketService.off('service_reply', handleReply);
     }
   }, [open, service]);
 
+  // Suggested matches are only shown to the post's author while it is still open
+  useEffect(() => {
+    setCandidates([]);
+    if (open && service?._id && service.user_name === currentUser && !service.matched_user) {
+      getMatchCandidates(service._id)
+        .then((res) => setCandidates(res.candidates))
+        .catch((err) => console.error("Failed to fetch match candidates:", err));
+    }
+  }, [open, service, currentUser]);
+
+  const loadMoreThreads = async () => {
+    try {
+      const res = await getReplies(service._id, threadsCursor);
+      setThreads((prev) => [...prev, ...res.threads]);
+      setThreadsCursor(res.next_cursor);
+    } catch (err) {
+      console.error("Failed to fetch replies:", err);
+    }
+  };
+
+  const loadEarlierReplies = async (thread) => {
+    try {
+      const res = await getThreadReplies(service._id, thread.thread_owner, thread.before);
+      setThreads((prev) => prev.map((t) => t.thread_owner === thread.thread_owner
+        ? { ...t, replies: [...res.replies, ...t.replies], before: res.before, has_more: res.has_more }
+        : t));
+    } catch (err) {
+      console.error("Failed to fetch thread replies:", err);
+    }
+  };
+
   const handleSendReply = async () => {
     if (!reply.trim()) return;
     const currentTime = new Date().toISOString();
@@ -72,8 +130,7 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
       const res = await postReply(replyData);
       if (res.status === 201) {
         setReply('');
-        const updatedReplies = await getReplies(service._id);
-        setReplies(updatedReplies);
+        mergeReply(res.data);
       } else {
         alert("Failed to post reply.");
       }
@@ -109,8 +166,7 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
         alert("Reply posted!");
         setReplyContentMap((prev) => ({ ...prev, [threadOwner]: '' }));
         setReplyInputs((prev) => ({ ...prev, [threadOwner]: false }));
-        const updatedReplies = await getReplies(service._id);
-        setReplies(updatedReplies);
+        mergeReply(res.data);
       }
     } catch (err) {
       console.error("Reply failed:", err);
@@ -119,7 +175,7 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
 
   // Confirm match logics
   const isOwner = currentUser === service?.user_name;
-  const replyUsernames  = Object.keys(replies || {}).filter(name => name !== service?.user_name);
+  const replyUsernames  = threads.map(t => t.thread_owner).filter(name => name !== service?.user_name);
   const openMatchDialog  = () => setMatchDlgOpen(true);
   const closeMatchDialog = () => { setMatchDlgOpen(false); setMatchTarget(''); };
   const handleMatchConfirm = async () => {
@@ -134,18 +190,9 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
     }
   };
 
-  const sortedThreadEntries = (replies && typeof replies === 'object') ? (
-      Object.entries(replies)
-        .filter(([, messages]) => Array.isArray(messages) && messages.length > 0)
-        .sort((a, b) => {
-          const aTime = new Date(a[1][0][Object.keys(a[1][0])[0]][1]);
-          const bTime = new Date(b[1][0][Object.keys(b[1][0])[0]][1]);
-          return aTime - bTime;
-        })
-      )
-    : ([]);
-  
-  
+  // Threads come from the server in the order they were started
+  const sortedThreadEntries = threads.filter((thread) => thread.replies.length > 0);
+
 
   if (!service) return null;
 
@@ -194,8 +241,8 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
               <Typography variant="body2"><strong>Location:</strong></Typography>
               <Typography variant="body2">
                 {
-                  ((service.location && service.location.place_name) ? 
-                    service.location.place_name :
+                  (service.place_name ? 
+                    service.place_name :
                     'No location provided.')
                 }
               </Typography>
@@ -208,13 +255,22 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
               <Divider sx={{ my: 1 }} />
                 <Typography variant="subtitle1" sx={{ mb: 1 }}><strong>Replies</strong></Typography>
                   {sortedThreadEntries.length > 0 ? (
-                    sortedThreadEntries.map(([threadOwner, messages], idx) => (
-                      <Box key={idx} sx={{ mb: 2 }}>
-                        {messages.map((msgObj, j) => {
-                          const name = Object.keys(msgObj)[0];
-                          const [text, time] = msgObj[name];
+                    sortedThreadEntries.map((thread) => {
+                      const threadOwner = thread.thread_owner;
+                      const messages = thread.replies;
+                      return (
+                      <Box key={threadOwner} sx={{ mb: 2 }}>
+                        {thread.has_more && (
+                          <Button size="small" variant="text" onClick={() => loadEarlierReplies(thread)}>
+                            Show earlier replies
+                          </Button>
+                        )}
+                        {messages.map((msg, j) => {
+                          const name = msg.user_name;
+                          const text = msg.content;
+                          const time = msg.timestamp;
                           return (
-                            <Box key={j} sx={{ display: 'flex', flexDirection: 'column', pl: j > 0 ? 4 : 0, my: 0.5 }}>
+                            <Box key={msg._id} sx={{ display: 'flex', flexDirection: 'column', pl: (j > 0 || thread.has_more) ? 4 : 0, my: 0.5 }}>
                               <Typography variant="body2">
                                 <strong>{name}</strong>: {text}
                                 <Typography component="span" variant="caption" color="text.secondary" sx={{ ml: 1 }}>
@@ -261,10 +317,32 @@ const ServiceCardDialog = ({ open, onClose, service, imageUrl, currentUser }) =>
                           </Box>
                         )}
                       </Box>
-                    ))
+                      );
+                    })
                   ) : (
                     <Typography variant="body2" color="text.secondary">No replies yet.</Typography>
                 )}
+                {threadsCursor && (
+                  <Button size="small" variant="text" onClick={loadMoreThreads}>
+                    Show more threads
+                  </Button>
+                )}
+                {candidates.length > 0 && (
+                  <>
+                    <Divider sx={{ my: 1 }} />
+                    <Typography variant="subtitle1" sx={{ mb: 1 }}><strong>Suggested matches</strong></Typography>
+                    {candidates.map((candidate) => (
+                      <Typography key={candidate._id} variant="body2" sx={{ my: 0.5 }}>
+                        <strong>{candidate.user_name}</strong>
+                        {` · ${candidate.availability?.start || 'N/A'} - ${candidate.availability?.end || 'N/A'}`}
+                        {candidate.match.distance_km !== null && ` · ${candidate.match.distance_km} km`}
+                        <Typography component="span" variant="caption" color="text.secondary" sx={{ ml: 1 }}>
+                          ({Math.round(candidate.match.score * 100)}% match)
+                        </Typography>
+                      </Typography>
+                    ))}
+                  </>
+                )}
             </Grid>
           </Grid>
         </DialogContent>
@@ -0,0 +1,113 @@
+import { useState, useEffect, useCallback, useRef } from 'react';
+import socketService from '../api/socketService';
+import { fetchMessages, sendChatMessage } from '../api/chat';
+
+// Live chat thread for one marketplace item: loads the latest page, then receives new messages
+// from the item:<id> room. Older pages load on demand, and after a reconnect only the gap since
+// the last message is fetched.
+export const useItemChat = (itemId, enabled = true, { senderId, senderName } = {}) => {
+  const [messages, setMessages] = useState([]);
+  const [loading, setLoading] = useState(false);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const cursorRef = useRef(null);
+
+  // Append messages we do not have yet
+  const mergeMessages = useCallback((incoming) => {
+    if (incoming.length === 0) return;
+    setMessages((prev) => {
+      const known = new Set(prev.map((m) => m._id));
+      return [...prev, ...incoming.filter((m) => !known.has(m._id))];
+    });
+  }, []);
+
+  const catchUp = useCallback(async () => {
+    if (!itemId) return;
+    let hasMore = true;
+    while (hasMore) {
+      // Without a cursor (empty thread when loaded) the latest page covers the gap
+      const data = await fetchMessages(itemId, { after: cursorRef.current });
+      mergeMessages(data.messages || []);
+      cursorRef.current = data.after;
+      hasMore = Boolean(cursorRef.current) && data.has_more;
+    }
+  }, [itemId, mergeMessages]);
+
+  const loadOlder = useCallback(async () => {
+    if (!itemId || !olderCursor) return;
+    const data = await fetchMessages(itemId, { before: olderCursor });
+    setMessages((prev) => {
+      const known = new Set(prev.map((m) => m._id));
+      return [...(data.messages || []).filter((m) => !known.has(m._id)), ...prev];
+    });
+    setOlderCursor(data.has_more ? data.before : null);
+  }, [itemId, olderCursor]);
+
+  useEffect(() => {
+    if (!enabled || !itemId) return;
+    const room = `item:${itemId}`;
+    let cancelled = false;
+
+    setLoading(true);
+    setMessages([]);
+    setOlderCursor(null);
+    cursorRef.current = null;
+    fetchMessages(itemId)
+      .then((data) => {
+        if (cancelled) return;
+        setMessages(data.messages || []);
+        cursorRef.current = data.after;
+        setOlderCursor(data.has_more ? data.before : null);
+      })
+      .catch((err) => console.error("Failed to pull the messages:", err))
+      .finally(() => !cancelled && setLoading(false));
+
+    const handleMessage = (message) => {
+      if (message.item_id !== itemId) return;
+      setMessages((prev) => (prev.some((m) => m._id === message._id) ? prev : [...prev, message]));
+      cursorRef.current = message.cursor || cursorRef.current;
+    };
+    const handleReconnect = () => {
+      catchUp().catch((err) => console.error("Failed to catch up on messages:", err));
+    };
+
+    socketService.subscribe([room]);
+    socketService.on("chat_message", handleMessage);
+    socketService.on("connect", handleReconnect);
+
+    return () => {
+      cancelled = true;
+      socketService.off("chat_message", handleMessage);
+      socketService.off("connect", handleReconnect);
+      socketService.unsubscribe([room]);
+    };
+  }, [itemId, enabled, catchUp]);
+
+  const sendMessage = useCallback(async (content) => {
+    const clientId = `local-${Date.now()}`;
+    const optimisticMsg = {
+      _id: clientId,
+      item_id: itemId,
+      sender_id: senderId,
+      sender_name: senderName,
+      content,
+      timestamp: new Date().toISOString(),
+    };
+    setMessages((prev) => [...prev, optimisticMsg]);
+
+    try {
+      const stored = await sendChatMessage({ itemId, content, clientId });
+      // The room broadcast may already have delivered the stored copy
+      setMessages((prev) => {
+        const withoutOptimistic = prev.filter((m) => m._id !== clientId);
+        return withoutOptimistic.some((m) => m._id === stored._id)
+          ? withoutOptimistic
+          : [...withoutOptimistic, stored];
+      });
+    } catch (err) {
+      console.error("Send Message Failed:", err);
+      setMessages((prev) => prev.filter((m) => m._id !== clientId));
+    }
+  }, [itemId, senderId, senderName]);
+
+  return { messages, loading, sendMessage, hasOlder: Boolean(olderCursor), loadOlder };
+};
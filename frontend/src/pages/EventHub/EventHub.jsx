@@ -1,5 +1,5 @@
 // EventHub.jsx
-import React, { useEffect } from "react";
+import React, { useEffect, useRef } from "react";
 import { useState } from "react";
 import { Pets as PetsIcon } from "@mui/icons-material";
 import NewEventDiaglog from "./NewEventDialog";
@@ -11,11 +11,19 @@ import ResponsiveGrid from "./ResponsiveGrid";
 import { getCurrentUser } from "../../api/auth";
 import socketService from "../../api/socketService";
 import EventCalendar from "./EventCalendar";
+import { Box, Button, ToggleButton, ToggleButtonGroup } from "@mui/material";
 
 const EventHub = () => {
     const [newEventDialogOpen, setNewEventDialogOpen] = useState(false);
     const [eventList, setEventList] = useState([]);
     const [currentUser, setCurrentUser] = useState(null);
+    const [feedMode, setFeedMode] = useState("upcoming");
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    // read by the socket handlers, which are registered once
+    const currentUserIdRef = useRef(null);
+    // event:<id> rooms joined for the events currently listed
+    const eventRoomsRef = useRef(new Set());
 
     const handleNewEventDialogOpen = () => {
         setNewEventDialogOpen(!newEventDialogOpen);
@@ -27,6 +35,7 @@ const EventHub = () => {
             try {
                 const userData = await getCurrentUser();
                 setCurrentUser(userData);
+                currentUserIdRef.current = userData?._id;
             } catch (error) {
                 console.error("Error fetching user data in ResponsiveGrid:", error);
                 alert("Failed to fetch user data. Try logging in again.");
@@ -36,12 +45,13 @@ const EventHub = () => {
         fetchUser();
     }, []);
 
-    // fetch all events when the component mounts
+    // fetch the first page of the feed when the component mounts or the mode changes
     useEffect(() => {
         async function fetchData() {
             try {
-                const data = await getAllEvents();
-                setEventList(data.map((event) => ({ ...event, display: true })));
+                const data = await getAllEvents({ mode: feedMode });
+                setEventList(data.events.map((event) => ({ ...event, display: true })));
+                setNextCursor(data.next_cursor);
                 console.log("Event data from server:", data);
             } catch (error) {
                 console.error("Error fetching events:", error);
@@ -49,19 +59,68 @@ const EventHub = () => {
         }
 
         fetchData();
-    }, []);
+    }, [feedMode]);
+
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const data = await getAllEvents({ mode: feedMode, cursor: nextCursor });
+            setEventList((prevEvents) => [...prevEvents, ...data.events.map((event) => ({ ...event, display: true }))]);
+            setNextCursor(data.next_cursor);
+        } catch (error) {
+            console.error("Error fetching more events:", error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    // receive updates for every event currently listed, and only for those
+    useEffect(() => {
+        const subscribed = eventRoomsRef.current;
+        const listed = new Set(eventList.map((event) => `event:${event._id}`));
+        const left = [...subscribed].filter((room) => !listed.has(room));
+        const added = [...listed].filter((room) => !subscribed.has(room));
+        left.forEach((room) => subscribed.delete(room));
+        added.forEach((room) => subscribed.add(room));
+        socketService.unsubscribe(left);
+        socketService.subscribe(added, (refused) => {
+            // past the server's limit the extra events just don't update live
+            refused.forEach((room) => subscribed.delete(room));
+        });
+    }, [eventList]);
+
+    // leave every event room when the feed switches mode or the page unmounts
+    useEffect(() => {
+        const subscribed = eventRoomsRef.current;
+        return () => {
+            socketService.unsubscribe([...subscribed]);
+            subscribed.clear();
+        };
+    }, [feedMode]);
 
     // socket connection
     useEffect(() => {
+        // new events are broadcast to everyone on the feed
+        socketService.subscribe(["events"]);
+
         socketService.on("new_event", (newEvent) => {
             console.log("Socket: New event created:", newEvent);
-            setEventList((prevEvents) => [...prevEvents, newEvent]);
+            setEventList((prevEvents) => [...prevEvents, { ...newEvent, attending: false, display: true }]);
         });
 
-        socketService.on("event_updated", (updatedEvent) => {
-            console.log("Socket: Event updated:", updatedEvent);
+        // attendance changes arrive as a delta: one user joined or left
+        socketService.on("event_attendance", (delta) => {
+            console.log("Socket: Event attendance changed:", delta);
             setEventList((prevEvents) =>
-                prevEvents.map((event) => (event._id === updatedEvent._id ? updatedEvent : event))
+                prevEvents.map((event) => {
+                    if (event._id !== delta._id) return event;
+                    return {
+                        ...event,
+                        attending: delta.user_id === currentUserIdRef.current ? delta.attending : event.attending,
+                        attendee_count: delta.attendee_count,
+                    };
+                })
             );
         });
 
@@ -71,6 +130,7 @@ const EventHub = () => {
         });
 
         return () => {
+            socketService.unsubscribe(["events"]);
             socketService.disconnect();
         };
     }, []);
@@ -88,7 +148,25 @@ const EventHub = () => {
                 currentUser={currentUser} // Placeholder for current user
             />
             <EventCalendar eventList={eventList} user={currentUser} />
+            <Box sx={{ textAlign: "center", py: 2 }}>
+                <ToggleButtonGroup
+                    value={feedMode}
+                    exclusive
+                    size="small"
+                    onChange={(e, mode) => mode && setFeedMode(mode)}
+                >
+                    <ToggleButton value="upcoming">Upcoming</ToggleButton>
+                    <ToggleButton value="past">Past</ToggleButton>
+                </ToggleButtonGroup>
+            </Box>
             <ResponsiveGrid eventList={eventList} user={currentUser} />
+            {nextCursor && (
+                <Box sx={{ textAlign: "center", py: 3 }}>
+                    <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+                        {loadingMore ? "Loading..." : "Load More"}
+                    </Button>
+                </Box>
+            )}
             <NewEventDiaglog open={newEventDialogOpen} onClose={handleNewEventDialogOpen} />
         </div>
     );
@@ -110,7 +110,7 @@ const ResponsiveGrid = ({ eventList, user }) => {
                                         <>
                                             {event.event_date} - {event.event_time}
                                             <br />
-                                            {event.location.place_name}
+                                            {event.place_name || event.location?.place_name}
                                         </>
                                     }
                                 />
@@ -118,7 +118,7 @@ const ResponsiveGrid = ({ eventList, user }) => {
                                 <CardMedia
                                     component="img"
                                     height="140"
-                                    src={`${base_api_url}/event/image/${event.image}`}
+                                    src={`${base_api_url}/event/image/${event.image}?size=card`}
                                     alt={`${base_api_url}/event/image/${event.image}`}
                                 />
                                 <CardContent>
@@ -128,7 +128,7 @@ const ResponsiveGrid = ({ eventList, user }) => {
                                 </CardContent>
                                 {user._id && (
                                     <CardActions>
-                                        {event.attendees.includes(user._id) ? (
+                                        {event.attending ? (
                                             <UnregisterButton event_id={event._id} />
                                         ) : (
                                             <RegisterButton event_id={event._id} />
@@ -209,7 +209,7 @@ class AttendanceSearchStrategy extends SearchStategy {
         console.log("Attendance search strategy", this.currentUser._id);
 
         return eventList.map((event) => {
-            return { ...event, display: event.attendees.includes(this.currentUser._id) };
+            return { ...event, display: Boolean(event.attending) };
         });
     }
 
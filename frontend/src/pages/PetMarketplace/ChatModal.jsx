@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useState } from "react";
 import {
   Dialog,
   DialogTitle,
@@ -12,76 +12,28 @@ import {
   CircularProgress,
 } from "@mui/material";
 import SendIcon from "@mui/icons-material/Send";
+import { useItemChat } from "../../hooks/useItemChat";
 
 const ChatModal = ({ open, onClose, itemId, itemName }) => {
-  // Message List, load Status, Input Fileds
-  const [messages, setMessages] = useState([]);
-  const [loading, setLoading] = useState(false);
+  // Input Field
   const [newMessage, setNewMessage] = useState("");
 
   // Current User
   const currentUser = localStorage.getItem("userId") || "guest-user";
   const currentUserName = localStorage.getItem("username") || "Guest";
 
-  /* ---------- Pull Messages ---------- */
-  const loadMessages = () => {
-    if (!itemId) return;
-    setLoading(true);
-    fetch(`http://localhost:5000/chats/${itemId}`)
-      .then((res) => res.json())
-      .then((data) => {
-        setMessages(data.messages || []);
-        setLoading(false);
-      })
-      .catch((err) => {
-        console.error("Failed to pull the message:", err);
-        setLoading(false);
-      });
-  };
-
-  /* When the dialog is opened/switched to itemId, pull the history record */
-  useEffect(() => {
-    if (open) loadMessages();
-  }, [open, itemId]);
-
-  /* Enable 5-second polling auto refresh */
-  useEffect(() => {
-    if (!open) return;
-    const timer = setInterval(loadMessages, 5000);
-    return () => clearInterval(timer);
-  }, [open, itemId]);
+  /* ---------- Live thread: history on open, then pushed over the socket ---------- */
+  const { messages, loading, sendMessage, hasOlder, loadOlder } = useItemChat(itemId, open, {
+    senderId: currentUser,
+    senderName: currentUserName,
+  });
 
   /* ---------- Send Message ---------- */
   const handleSendMessage = () => {
     const content = newMessage.trim();
     if (!content) return;
-
-    const optimisticMsg = {
-      _id: Date.now().toString(),
-      item_id: itemId,
-      sender_id: currentUser,
-      sender_name: currentUserName,
-      content,
-      timestamp: new Date().toISOString(),
-    };
-    setMessages((prev) => [...prev, optimisticMsg]);
     setNewMessage("");
-
-    fetch("http://localhost:5000/chats/send", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        itemId,
-        message: {
-          senderId: currentUser,
-          senderName: currentUserName,
-          content,
-        },
-      }),
-    })
-      .then((res) => res.json())
-      .then(() => loadMessages()) 
-      .catch((err) => console.error("Send Message Failed:", err));
+    sendMessage(content);
   };
 
   /* ---------- JSX ---------- */
@@ -105,6 +57,11 @@ const ChatModal = ({ open, onClose, itemId, itemName }) => {
               p: 1,
             }}
           >
+            {hasOlder && (
+              <Button size="small" onClick={loadOlder}>
+                Load earlier messages
+              </Button>
+            )}
             {messages.map((msg) => {
               const isMe = msg.sender_id === currentUser;
               return (
@@ -13,6 +13,7 @@ import {
   CircularProgress,
 } from "@mui/material";
 import SendIcon from "@mui/icons-material/Send";
+import { useItemChat } from "../../hooks/useItemChat";
 
 const PetDetail = () => {
   const { id } = useParams();
@@ -21,13 +22,16 @@ const PetDetail = () => {
   const [editing, setEditing] = useState(false);
   const [formData, setFormData] = useState({});
   // Chat states
-  const [messages, setMessages] = useState([]);
-  const [loadingMessages, setLoadingMessages] = useState(false);
   const [newMessage, setNewMessage] = useState("");
   // Get current user info from localStorage
   const storedUser = JSON.parse(localStorage.getItem("user") || "{}");
   const currentUser = storedUser._id || storedUser.id || "guest-user";
   const currentUserName = storedUser.user_name || storedUser.username || "Guest";
+  // Live thread: history once, then new messages pushed over the socket
+  const { messages, loading: loadingMessages, sendMessage, hasOlder, loadOlder } = useItemChat(id, true, {
+    senderId: currentUser,
+    senderName: currentUserName,
+  });
 
   useEffect(() => {
     fetch(`http://localhost:5000/pets/${id}`)
@@ -43,47 +47,12 @@ const PetDetail = () => {
       });
   }, [id]);
 
-  // Load message history
-  const loadMessages = () => {
-    setLoadingMessages(true);
-    fetch(`http://localhost:5000/chats/${id}`)
-      .then((res) => res.json())
-      .then((data) => {
-        setMessages(data.messages || []);
-        setLoadingMessages(false);
-      })
-      .catch(() => setLoadingMessages(false));
-  };
-  useEffect(() => { loadMessages(); }, [id]);
-
   // Send a new message
   const handleSendMessage = () => {
     const content = newMessage.trim();
     if (!content) return;
-    const optimisticMsg = {
-      _id: Date.now().toString(),
-      item_id: id,
-      sender_id: currentUser,
-      sender_name: currentUserName,
-      content,
-      timestamp: new Date().toISOString(),
-    };
-    setMessages((prev) => [...prev, optimisticMsg]);
     setNewMessage("");
-    fetch("http://localhost:5000/chats/send", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        itemId: id,
-        message: {
-          senderId: currentUser,
-          senderName: currentUserName,
-          content,
-        },
-      }),
-    })
-      .then(() => loadMessages())
-      .catch((err) => console.error("Send failed:", err));
+    sendMessage(content);
   };
 
   const handleDelete = async () => {
@@ -149,6 +118,11 @@ const PetDetail = () => {
             border: "1px solid #eee",
             borderRadius: 1,
           }}>
+            {hasOlder && (
+              <Button size="small" onClick={loadOlder}>
+                Load earlier messages
+              </Button>
+            )}
             {messages.map((msg) => (
               <Box key={msg._id} sx={{ borderBottom: "1px solid #ddd", pb: 1 }}>
                 <Box sx={{ display: "flex", alignItems: "center", mb: 0.5 }}>
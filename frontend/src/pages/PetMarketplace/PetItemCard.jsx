@@ -26,7 +26,7 @@ const PetItemCard = ({ pet }) => {
             pet.image && (pet.image.startsWith("http") || pet.image.startsWith("/"))
             ? pet.image
             : pet.image
-            ? `http://localhost:5000/pets/image/${pet.image}`
+            ? `http://localhost:5000/pets/image/${pet.image}?size=card`
             : "/image/catTree.jpg" 
         }
         alt={pet.name}
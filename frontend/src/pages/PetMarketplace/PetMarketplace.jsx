@@ -18,7 +18,10 @@ import UploadPetModal from "./UploadPetModal";
 
 const PetMarketplace = () => {
   const [pets, setPets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [pageParams, setPageParams] = useState("");
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [priceBounds, setPriceBounds] = useState({ min: 0, max: 100 });
   
 
@@ -58,11 +61,13 @@ const PetMarketplace = () => {
     fetch("http://localhost:5000/pets/")
       .then((r) => r.json())
       .then((data) => {
-        setPets(data);
+        setPets(data.pets);
+        setNextCursor(data.next_cursor);
+        setPageParams("");
         setLoading(false);
 
         // Only keep prices that can be converted to numbers
-        const numericPrices = data
+        const numericPrices = data.pets
           .map((p) => Number(p.price))
           .filter((p) => !isNaN(p));
 
@@ -103,7 +108,9 @@ const PetMarketplace = () => {
     fetch(`http://localhost:5000/pets/?${params.toString()}`)
       .then((r) => r.json())
       .then((data) => {
-        setPets(data);
+        setPets(data.pets);
+        setNextCursor(data.next_cursor);
+        setPageParams(params.toString());
         setLoading(false);
       })
       .catch(() => {
@@ -126,7 +133,9 @@ const PetMarketplace = () => {
     fetch("http://localhost:5000/pets/")
       .then((r) => r.json())
       .then((data) => {
-        setPets(data);
+        setPets(data.pets);
+        setNextCursor(data.next_cursor);
+        setPageParams("");
         setLoading(false);
       })
       .catch(() => {
@@ -135,6 +144,26 @@ const PetMarketplace = () => {
       });
   };
 
+  // Fetch the next page for the current filters
+  const loadMore = () => {
+    if (!nextCursor) return;
+    const params = new URLSearchParams(pageParams);
+    params.set("cursor", nextCursor);
+
+    setLoadingMore(true);
+    fetch(`http://localhost:5000/pets/?${params.toString()}`)
+      .then((r) => r.json())
+      .then((data) => {
+        setPets((prev) => [...prev, ...data.pets]);
+        setNextCursor(data.next_cursor);
+        setLoadingMore(false);
+      })
+      .catch(() => {
+        setLoadingMore(false);
+        alert("Request Failed, Please Try Again Later");
+      });
+  };
+
   // Get current user location with address
   const getCurrentLocation = async () => {
     setLocationLoading(true);
@@ -344,13 +373,26 @@ const PetMarketplace = () => {
           <CircularProgress />
         </Box>
       ) : pets.length ? (
-        <Grid container spacing={2}>
-          {pets.map((pet) => (
-            <Grid item xs={12} sm={6} md={3} key={pet._id}>
-              <PetItemCard pet={pet} />
-            </Grid>
-          ))}
-        </Grid>
+        <>
+          <Grid container spacing={2}>
+            {pets.map((pet) => (
+              <Grid item xs={12} sm={6} md={3} key={pet._id}>
+                <PetItemCard pet={pet} />
+              </Grid>
+            ))}
+          </Grid>
+          {nextCursor && (
+            <Box sx={{ textAlign: "center", py: 3 }}>
+              <Button
+                variant="outlined"
+                onClick={loadMore}
+                disabled={loadingMore}
+              >
+                {loadingMore ? "Loading..." : "Load More"}
+              </Button>
+            </Box>
+          )}
+        </>
       ) : (
         <Box sx={{ textAlign: "center", py: 4 }}>
           <Typography color="text.secondary" mb={2}>
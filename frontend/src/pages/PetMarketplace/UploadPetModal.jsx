@@ -102,6 +102,7 @@ const UploadPetModal = ({ open, onClose, onUploadSuccess }) => {
       const res = await fetch("http://localhost:5000/pets/upload", {
         method: "POST",
         body: form,
+        credentials: "include", // identifies the seller for marketplace chats
       });
       const data = await res.json();
       if (res.ok) {
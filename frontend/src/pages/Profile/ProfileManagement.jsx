@@ -59,8 +59,8 @@ const ProfileManagement = () => {
             getFollowing(profileData.user_name),
           ]);
           setFollowStats({
-            followersCount: followers.length,
-            followingCount: following.length,
+            followersCount: followers.total,
+            followingCount: following.total,
           });
         } catch (err) {
           console.error("Error loading follow stats:", err);
@@ -175,16 +175,16 @@ const ProfileManagement = () => {
         throw new Error("User information not available");
       }
 
-      const users = type === 'followers' 
+      const page = type === 'followers' 
         ? await getFollowers(profile.user_name)
         : await getFollowing(profile.user_name);
       
-      setFollowModalUsers(users);
+      setFollowModalUsers(page.users);
       
-      // Update follow stats based on the number of users
+      // Update follow stats based on the total number of users
       setFollowStats(prev => ({
         ...prev,
-        [type === 'followers' ? 'followersCount' : 'followingCount']: users.length
+        [type === 'followers' ? 'followersCount' : 'followingCount']: page.total
       }));
     } catch (err) {
       console.error(`Error fetching ${type}:`, err);
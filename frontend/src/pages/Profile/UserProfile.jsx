@@ -40,6 +40,8 @@ const UserProfile = () => {
   const [comment, setComment] = useState("");
   const [isSubmittingRating, setIsSubmittingRating] = useState(false);
   const [reviews, setReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
+  const [totalReviews, setTotalReviews] = useState(0);
   const [isPrivateProfile, setIsPrivateProfile] = useState(false);
   const [successMessage, setSuccessMessage] = useState("");
   const [followLoading, setFollowLoading] = useState(false);
@@ -80,6 +82,8 @@ const UserProfile = () => {
           ]);
           setPets(petsData || []);
           setReviews(reviewsData?.reviews || []);
+          setReviewsCursor(reviewsData?.next_cursor || null);
+          setTotalReviews(reviewsData?.total_reviews || 0);
         } catch (err) {
           console.error("Error loading additional data:", err);
         }
@@ -168,15 +172,16 @@ const UserProfile = () => {
       setShowFollowModal(true);
       setFollowModalUsers([]); 
       
-      const users = type === 'followers' 
+      const page = type === 'followers' 
         ? await getFollowers(username)
         : await getFollowing(username);
+      const users = page?.users || [];
       
       console.log(`${type} users:`, users); 
-      setFollowModalUsers(users || []);
+      setFollowModalUsers(users);
       
       // Update follow stats only if the counts are different
-      const newCount = users?.length || 0;
+      const newCount = page?.total || 0;
       setFollowStats(prevStats => {
         const updatedStats = {
           ...prevStats,
@@ -215,6 +220,9 @@ const UserProfile = () => {
       await rateUser(username, rating, comment);
       const reviewsData = await getUserReviews(username);
       setReviews(reviewsData.reviews);
+      setReviewsCursor(reviewsData.next_cursor || null);
+      setTotalReviews(reviewsData.total_reviews || 0);
+      setProfile(prev => ({ ...prev, rating: reviewsData.rating }));
       setShowRatingModal(false);
       setRating(0);
       setComment("");
@@ -225,6 +233,17 @@ const UserProfile = () => {
     }
   };
 
+  const handleLoadMoreReviews = async () => {
+    if (!reviewsCursor) return;
+    try {
+      const reviewsData = await getUserReviews(username, reviewsCursor);
+      setReviews(prev => [...prev, ...(reviewsData.reviews || [])]);
+      setReviewsCursor(reviewsData.next_cursor || null);
+    } catch (err) {
+      setError(err.message);
+    }
+  };
+
   if (isLoading) return <div className="loading-spinner">Loading profile...</div>;
   if (error) return <div className="error-message">{error}</div>;
   if (!profile) return <div className="error-message">Profile not found.</div>;
@@ -357,12 +376,12 @@ const UserProfile = () => {
                               ))}
                             </div>
                             <p className="rating-text">{profile.rating ? `${profile.rating.toFixed(1)} / 5` : 'No ratings yet'}</p>
-                            <p className="total-reviews">({reviews.length} {reviews.length === 1 ? 'review' : 'reviews'})</p>
+                            <p className="total-reviews">({totalReviews} {totalReviews === 1 ? 'review' : 'reviews'})</p>
                           </div>
                           {reviews.length > 0 ? (
                             <div className="reviews-list">
-                              {reviews.map((review, index) => (
-                                <div key={index} className="review-item">
+                              {reviews.map((review) => (
+                                <div key={review.id} className="review-item">
                                   <div className="review-header">
                                     <div className="review-rating">
                                       {[1, 2, 3, 4, 5].map((star) => (
@@ -382,6 +401,11 @@ const UserProfile = () => {
                                   <div className="review-reviewer">By: {review.reviewer}</div>
                                 </div>
                               ))}
+                              {reviewsCursor && (
+                                <button className="load-more-button" onClick={handleLoadMoreReviews}>
+                                  Load more reviews
+                                </button>
+                              )}
                             </div>
                           ) : (
                             <p className="no-reviews-message">No reviews yet</p>
@@ -552,8 +576,8 @@ const UserProfile = () => {
               <div className="modal reviews-modal" onClick={(e) => e.stopPropagation()}>
                 <h3>Reviews</h3>
                 <div className="reviews-list">
-                  {reviews.map((review, index) => (
-                    <div key={index} className="review-item">
+                  {reviews.map((review) => (
+                    <div key={review.id} className="review-item">
                       <div className="review-header">
                         <div className="review-rating">
                           {[1, 2, 3, 4, 5].map((star) => (
@@ -573,6 +597,11 @@ const UserProfile = () => {
                       <div className="review-reviewer">By: {review.reviewer}</div>
                     </div>
                   ))}
+                  {reviewsCursor && (
+                    <button className="load-more-button" onClick={handleLoadMoreReviews}>
+                      Load more reviews
+                    </button>
+                  )}
                 </div>
                 <button className="close-button" onClick={() => setShowReviewsModal(false)}>
                   Close
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import {
-  Box, Typography,Card, CardContent, Fab
+  Box, Typography,Card, CardContent, Fab, Button
 } from '@mui/material';
 import { Add as AddIcon, Pets as PetsIcon, Sort as SortIcon, FilterAlt as FilterAltIcon } from '@mui/icons-material';
 import { Link } from 'react-router-dom';
@@ -8,7 +8,7 @@ import {
   getServices,
   getImageById,
   getFilteredServices,
-  sortServices
+  boardSortParams
  } from '../../api/serviceBoard'; // Adjust the import path as necessary
 
 import {
@@ -133,7 +133,9 @@ const FirstAddServiceCard = ({ category, serviceName }) => {
 
 
 
-const ScrollableCardRow = ({ category, serviceName, services, handleOpenDialog }) => (
+const CATEGORIES = ['pet_spa', 'pet_walking', 'pet_daycare', 'pet_house_sitting'];
+
+const ScrollableCardRow = ({ category, serviceName, services, handleOpenDialog, hasMore, onLoadMore }) => (
   <Box sx={{ flex: 1, display: 'flex', flexDirection: 'column', overflow: 'hidden' }}>
     <Typography variant="h6">{categoryToDisplayNameMap[category]}</Typography>
     <Typography variant="body2" color="text.secondary" mb={1}>
@@ -145,6 +147,11 @@ const ScrollableCardRow = ({ category, serviceName, services, handleOpenDialog }
       {services.map((service => 
         <ServiceCard key={service._id} service={service} onClick={handleOpenDialog} />
       ))}
+      {hasMore && (
+        <Button variant="outlined" onClick={() => onLoadMore(category)} sx={{ flexShrink: 0 }}>
+          Load more
+        </Button>
+      )}
     </Box>
   </Box>
 );
@@ -164,11 +171,14 @@ export default function ServiceBoardPage() {
     hasLocation: '',
     myServicesOnly: false,
   });
-  const [allServices, setAllServices] = useState([]);  // fetched once
+  // category -> { services, nextCursor }, one server page at a time
+  const [rows, setRows] = useState({});
   const [sortOptions, setSortOptions] = useState({
     by: 'Post Time',
     order: 'asc',
   });
+  // Every sort option is applied by the server, so "Load more" continues in the same order
+  const { sort, order } = boardSortParams(sortOptions);
 
   const handleOpenDialog = (service, imageUrl) => {
     setSelectedService(service);
@@ -197,32 +207,39 @@ export default function ServiceBoardPage() {
         userName: newFilters.myServicesOnly ? user.user_name : undefined,
       };
   
-      const data = await getFilteredServices(enrichedFilters);
-      categoriseAndStore(data);
+      const page = await getFilteredServices(enrichedFilters, null, sortOptions);
+      const grouped = {};
+      page.services.forEach(s => {
+        const cat = s.service_category;
+        if (!grouped[cat]) grouped[cat] = { services: [], nextCursor: null };
+        grouped[cat].services.push(s);
+      });
+      setRows(grouped);
     } catch (err) {
       console.error('Failed to apply filters:', err);
     }
   };
   
 
+  const fetchRow = async (category, cursor = null) => {
+    try {
+      const page = await getServices({ category, sort, order, cursor });
+      setRows(prev => ({
+        ...prev,
+        [category]: {
+          services: cursor ? [...(prev[category]?.services || []), ...page.services] : page.services,
+          nextCursor: page.next_cursor,
+        },
+      }));
+    } catch (err) {
+      console.error(`Failed to fetch ${category} services:`, err);
+    }
+  };
+
+  // Every row loads its own first page, sorted on the server
   useEffect(() => {
-    const fetchServices = async () => {
-      try {
-        const data = await getServices();
-        setAllServices(data);  
-        const categorized = {};
-        data.forEach(service => {
-          const cat = service.service_category;
-          if (!categorized[cat]) categorized[cat] = [];
-          categorized[cat].push(service);
-        });
-        setServicesByCategory(categorized);
-      } catch (err) {
-        console.error('Failed to fetch services:', err);
-      }
-    };
-    fetchServices();
-  }, []);
+    CATEGORIES.forEach(category => fetchRow(category));
+  }, [sort, order]);
 
   useEffect(() => {
     const fetchUser = async () => {
@@ -236,43 +253,13 @@ export default function ServiceBoardPage() {
     fetchUser();
   }, []);
 
-  const categoriseAndStore = (serviceArray) => {
-    const grouped = {};
-    serviceArray.forEach(s => {
-      const cat = s.service_category;
-      if (!grouped[cat]) grouped[cat] = [];
-      grouped[cat].push(s);
-    });
-    setServicesByCategory(grouped);
-  };
-  
-
-  useEffect(() => {
-    const fetchServices = async () => {
-      try {
-        const data = await getServices();          // backend default order
-        setAllServices(data);                      // keep original list
-  
-        // initial categorised view, still respecting current sortOptions
-        const sorted = await sortServices(data, sortOptions);
-        categoriseAndStore(sorted);
-      } catch (err) {
-        console.error('Failed to fetch services:', err);
-      }
-    };
-    fetchServices();
-  }, []);
-  
-  
   useEffect(() => {
-    const applySort = async () => {
-      const sorted = await sortServices(allServices, sortOptions);
-      categoriseAndStore(sorted);          // <<< per‑category rows preserved
-    };
-    applySort();
-  }, [allServices, sortOptions]);
-  
-  
+    const loaded = {};
+    for (const category of CATEGORIES) {
+      loaded[category] = rows[category]?.services || [];
+    }
+    setServicesByCategory(loaded);
+  }, [rows]);
 
   return (
     <Box sx={{ display: 'flex', flexDirection: 'column', height: 'calc(100vh - 64px)', p: 2 }}>
@@ -292,24 +279,32 @@ export default function ServiceBoardPage() {
           serviceName="Become a pet spa provider!"
           services={servicesByCategory["pet_spa"] || []}
           handleOpenDialog={handleOpenDialog}
+          hasMore={!!rows["pet_spa"]?.nextCursor}
+          onLoadMore={(category) => fetchRow(category, rows[category]?.nextCursor)}
         />
         <ScrollableCardRow
           category="pet_walking"
           serviceName="Post a pet walking request or offer!"
           services={servicesByCategory["pet_walking"] || []}
           handleOpenDialog={handleOpenDialog}
+          hasMore={!!rows["pet_walking"]?.nextCursor}
+          onLoadMore={(category) => fetchRow(category, rows[category]?.nextCursor)}
         />
         <ScrollableCardRow
           category="pet_daycare"
           serviceName="Post a daycare request or offer!"
           services={servicesByCategory["pet_daycare"] || []}
           handleOpenDialog={handleOpenDialog}
+          hasMore={!!rows["pet_daycare"]?.nextCursor}
+          onLoadMore={(category) => fetchRow(category, rows[category]?.nextCursor)}
         />
         <ScrollableCardRow
           category="pet_house_sitting"
           serviceName="Post a house sitting request or offer!"
           services={servicesByCategory["pet_house_sitting"] || []}
           handleOpenDialog={handleOpenDialog}
+          hasMore={!!rows["pet_house_sitting"]?.nextCursor}
+          onLoadMore={(category) => fetchRow(category, rows[category]?.nextCursor)}
         />
       </Box>
       <ServiceCardDialog
@@ -40,6 +40,8 @@ const ConfirmDialog = ({ open, title, content, onCancel, onConfirm }) => (
   
 export default function ServiceFilterResultPage() {
   const [services, setServices] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [activeFilters, setActiveFilters] = useState({});
   const [currentUser, setCurrentUser] = useState('');
   const [dialogOpen, setDialogOpen] = useState(false);
   const [selectedService, setSelectedService] = useState(null);
@@ -96,8 +98,10 @@ export default function ServiceFilterResultPage() {
         filters.userName = filters.myServicesOnly ? user.user_name : undefined;
         if (filters.serviceType === 'request') filters.serviceType = 0;
         if (filters.serviceType === 'offer') filters.serviceType = 1;
-        const result = await getFilteredServices(filters);
-        setServices(result);
+        const page = await getFilteredServices(filters);
+        setActiveFilters(filters);
+        setServices(page.services);
+        setNextCursor(page.next_cursor);
       } catch (err) {
         console.error("Error fetching filtered services:", err);
       }
@@ -107,6 +111,16 @@ export default function ServiceFilterResultPage() {
   }, [searchParams]);
   
 
+  const loadMore = async () => {
+    try {
+      const page = await getFilteredServices(activeFilters, nextCursor);
+      setServices((prev) => [...prev, ...page.services]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error("Error loading more services:", err);
+    }
+  };
+
   const handleOpenDialog = (service, imageUrl) => {
     setSelectedService(service);
     setSelectedServiceImage(imageUrl);
@@ -126,7 +140,6 @@ export default function ServiceFilterResultPage() {
     petType: "Pet",
     hasLocation: "Has Location",
     hasImage: "Has Image",
-    hasRealName: "Has Real Name",
   };
 
   const parsedFilters = Array.from(searchParams.entries())
@@ -244,6 +257,14 @@ export default function ServiceFilterResultPage() {
         ))}
       </Grid>
 
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={loadMore}>
+            Load more
+          </Button>
+        </Box>
+      )}
+
 
       <ServiceCardDialog
         open={dialogOpen}